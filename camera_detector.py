@@ -1,363 +1,557 @@
-#!/usr/bin/env python3
-"""
-相机型号识别系统
-从RAW文件中提取相机品牌和型号信息
-"""
-
-import os
-import re
-from typing import Optional, Tuple, Dict
-import rawpy
-
-
-class CameraDetector:
-    """相机型号检测器"""
-
-    def __init__(self):
-        """初始化相机检测器"""
-        # 品牌映射表 - 标准化品牌名称
-        self.brand_mapping = {
-            'Canon': 'Canon',
-            'NIKON': 'Nikon',
-            'NIKON CORPORATION': 'Nikon',
-            'Sony': 'Sony',
-            'SONY': 'Sony',
-            'Fujifilm': 'Fujifilm',
-            'FUJIFILM': 'Fujifilm',
-            'Olympus': 'Olympus',
-            'OLYMPUS IMAGING CORP.': 'Olympus',
-            'Panasonic': 'Panasonic',
-            'Panasonic Corporation': 'Panasonic',
-            'LEICA': 'Leica',
-            'Leica': 'Leica',
-            'Leica Camera AG': 'Leica',
-            'Pentax': 'Pentax',
-            'PENTAX': 'Pentax',
-            'RICOH IMAGING COMPANY, LTD.': 'Pentax',
-            'Samsung': 'Samsung',
-            'SAMSUNG': 'Samsung',
-            'Apple': 'Apple',
-            'Hasselblad': 'Hasselblad',
-            'Phase One': 'PhaseOne',
-            'Mamiya': 'Mamiya',
-            'Leaf': 'Leaf',
-            'Contax': 'Contax',
-            'Kodak': 'Kodak',
-        }
-
-        # 型号清理规则
-        self.model_cleanup_rules = [
-            # 移除公司名称
-            (r'\b(Canon|NIKON|SONY|Fujifilm|FUJIFILM|Olympus|Panasonic|Leica|Pentax|Samsung|Apple)\s+', ''),
-            # 移除常见前缀
-            (r'^(EOS|DSC|ILCE|DMC|GR|K-|X-T|GFX|Hasselblad|Phase\s+One)\s*', ''),
-            # 清理多余空格和符号
-            (r'\s+', ' '),
-            (r'[()]', ''),
-            (r'\s*-\s*', ' '),
-        ]
-
-        # 品牌前缀模式 - 用于从型号中识别品牌
-        self.brand_prefix_patterns = {
-            'Canon': [r'^EOS', r'^PowerShot', r'^IXUS'],
-            'Nikon': [r'^D\d+', r'^Z\d+', r'^COOLPIX'],
-            'Sony': [r'^ILCE-', r'^ILCA-', r'^DSC', r'^α'],
-            'Fujifilm': [r'^X-', r'^GFX', r'^FinePix'],
-            'Olympus': [r'^E-', r'^STYLUS', r'^TOUGH'],
-            'Panasonic': [r'^DMC-', r'^LUMIX'],
-            'Leica': [r'^M\d+', r'^SL\d+', r'^Q\d+', r'^CL'],
-            'Pentax': [r'^K-\d+', r'^KP', r'^645D', r'^645Z'],
-            'Samsung': [r'^NX\d+', r'^Galaxy'],
-            'Apple': [r'^iPhone', r'^iPad'],
-        }
-
-    def extract_camera_info(self, raw_path: str) -> Optional[Dict[str, str]]:
-        """
-        从RAW文件中提取相机信息
-
-        Args:
-            raw_path: RAW文件路径
-
-        Returns:
-            包含相机信息的字典，失败返回None
-        """
-        if not os.path.exists(raw_path):
-            return None
-
-        try:
-            with rawpy.imread(raw_path) as raw:
-                # 从RAW元数据获取相机信息
-                metadata = getattr(raw, 'raw_metadata', {})
-
-                # 尝试不同的元数据字段
-                camera_make = (
-                    metadata.get('camera_make') or
-                    metadata.get('Make') or
-                    metadata.get('make') or
-                    ''
-                )
-
-                camera_model = (
-                    metadata.get('camera_model') or
-                    metadata.get('Model') or
-                    metadata.get('model') or
-                    ''
-                )
-
-                # 如果没有从raw_metadata获取到，尝试其他属性
-                if not camera_make or not camera_model:
-                    # 尝试从其他属性获取
-                    if hasattr(raw, 'color_desc') and raw.color_desc:
-                        # 某些情况下可以从color_desc推断
-                        pass
-
-                return {
-                    'make': camera_make.strip(),
-                    'model': camera_model.strip(),
-                }
-
-        except Exception as e:
-            print(f"警告: 读取RAW元数据失败 {raw_path}: {str(e)}")
-            return None
-
-    def normalize_camera_model(self, make: str, model: str) -> Tuple[str, str]:
-        """
-        标准化相机品牌和型号名称用于ICM匹配
-
-        Args:
-            make: 相机制造商
-            model: 相机型号
-
-        Returns:
-            (标准化品牌, 标准化型号)
-        """
-        # 标准化品牌
-        brand = self._normalize_brand(make)
-
-        # 如果无法确定品牌，尝试从型号推断
-        if brand == 'Unknown':
-            brand = self._infer_brand_from_model(model)
-
-        # 标准化型号
-        normalized_model = self._normalize_model(model, brand)
-
-        return brand, normalized_model
-
-    def _normalize_brand(self, make: str) -> str:
-        """标准化相机品牌"""
-        if not make:
-            return 'Unknown'
-
-        make_clean = make.strip()
-
-        # 直接匹配
-        if make_clean in self.brand_mapping:
-            return self.brand_mapping[make_clean]
-
-        # 模糊匹配
-        make_lower = make_clean.lower()
-        for mapped_make, standard_name in self.brand_mapping.items():
-            if mapped_make.lower() in make_lower or make_lower in mapped_make.lower():
-                return standard_name
-
-        return 'Unknown'
-
-    def _infer_brand_from_model(self, model: str) -> str:
-        """从型号推断相机品牌"""
-        if not model:
-            return 'Unknown'
-
-        model_clean = model.strip()
-
-        for brand, patterns in self.brand_prefix_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, model_clean, re.IGNORECASE):
-                    return brand
-
-        return 'Unknown'
-
-    def _normalize_model(self, model: str, brand: str) -> str:
-        """标准化相机型号"""
-        if not model:
-            return 'Unknown'
-
-        # 基础清理
-        model_clean = model.strip()
-
-        # 应用清理规则
-        for pattern, replacement in self.model_cleanup_rules:
-            model_clean = re.sub(pattern, replacement, model_clean, flags=re.IGNORECASE)
-
-        # 品牌特定清理
-        model_clean = self._brand_specific_model_cleanup(model_clean, brand)
-
-        # 最终清理
-        model_clean = re.sub(r'\s+', ' ', model_clean).strip()
-
-        # 确保型号不为空
-        if not model_clean:
-            return 'Unknown'
-
-        return model_clean
-
-    def _brand_specific_model_cleanup(self, model: str, brand: str) -> str:
-        """品牌特定的型号清理"""
-        if brand == 'Canon':
-            # Canon特殊处理
-            model = re.sub(r'Canon\s*', '', model, flags=re.IGNORECASE)
-            model = re.sub(r'^EOS\s+', 'EOS', model, flags=re.IGNORECASE)
-            # 处理Rebel系列
-            model = re.sub(r'Rebel\s+([A-Z]\d+)', r'EOS \1', model, flags=re.IGNORECASE)
-
-        elif brand == 'Nikon':
-            # Nikon特殊处理
-            model = re.sub(r'Nikon\s*', '', model, flags=re.IGNORECASE)
-            # 标准化D系列
-            model = re.sub(r'^D(\d+)', r'D\1', model, flags=re.IGNORECASE)
-            # 标准化Z系列
-            model = re.sub(r'^Z\s*(\d+)', r'Z\1', model, flags=re.IGNORECASE)
-
-        elif brand == 'Sony':
-            # Sony特殊处理
-            model = re.sub(r'Sony\s*', '', model, flags=re.IGNORECASE)
-            # 标准化ILCE系列
-            model = re.sub(r'^ILCE[-\s]*(\d+)', r'α\1', model, flags=re.IGNORECASE)
-            model = re.sub(r'^α\s*(\d+)', r'α\1', model, flags=re.IGNORECASE)
-
-        elif brand == 'Fujifilm':
-            # Fujifilm特殊处理
-            model = re.sub(r'Fujifilm\s*', '', model, flags=re.IGNORECASE)
-            # 标准化X系列
-            model = re.sub(r'^X[-\s]*(\w+)', r'X-\1', model, flags=re.IGNORECASE)
-            # 标准化GFX系列
-            model = re.sub(r'^GFX\s*(\w+)', r'GFX\1', model, flags=re.IGNORECASE)
-
-        elif brand == 'Olympus':
-            # Olympus特殊处理
-            model = re.sub(r'Olympus\s*', '', model, flags=re.IGNORECASE)
-
-        elif brand == 'Panasonic':
-            # Panasonic特殊处理
-            model = re.sub(r'Panasonic\s*', '', model, flags=re.IGNORECASE)
-            # 标准化DMC系列
-            model = re.sub(r'^DMC[-\s]*(\w+)', r'DMC-\1', model, flags=re.IGNORECASE)
-
-        return model
-
-    def detect_camera_from_raw(self, raw_path: str) -> Optional[Tuple[str, str]]:
-        """
-        从RAW文件检测相机品牌和型号
-
-        Args:
-            raw_path: RAW文件路径
-
-        Returns:
-            (品牌, 型号) 或 None
-        """
-        camera_info = self.extract_camera_info(raw_path)
-        if not camera_info:
-            return None
-
-        make = camera_info.get('make', '')
-        model = camera_info.get('model', '')
-
-        if not make and not model:
-            return None
-
-        brand, normalized_model = self.normalize_camera_model(make, model)
-
-        if brand != 'Unknown' and normalized_model != 'Unknown':
-            return brand, normalized_model
-
-        return None
-
-    def get_supported_file_extensions(self) -> list:
-        """获取支持的RAW文件扩展名"""
-        return [
-            '.arw',   # Sony
-            '.cr2', '.cr3',  # Canon
-            '.dng',   # Adobe DNG
-            '.nef',   # Nikon
-            '.raw',   # Generic
-            '.orf',   # Olympus
-            '.rw2',   # Panasonic
-            '.pef',   # Pentax
-            '.srw',   # Samsung
-            '.mos',   # Leica
-            '.mrw',   # Minolta
-            '.erf',   # Epson
-            '.k25', '.kc2', '.kdc',  # Kodak
-            '.raf',   # Fujifilm
-            '.3fr',   # Hasselblad
-            '.fff',   # Hasselblad
-            '.iiq',   # Phase One
-            '.mos',   # Leaf
-            '.crw',   # Canon old format
-            '.bay',   # Casio
-            '.bmq',   # Nokia
-            '.cap',   # Phase One
-            '.cine',  # Imacon
-            '.cs1',   # Captureshop
-            '.dc2',   # Sinar
-            '.dcr',   # Kodak
-            '.dcs',   # Kodak
-            '.drf',   # Kodak
-            '.dsc',   # Konica Minolta
-            '.exr',   # OpenEXR
-            '.fff',   # Hasselblad
-            '.ia',    # Imacon
-            '.jpg',   # JPEG (for testing)
-            '.jpeg',  # JPEG (for testing)
-            '.tif', '.tiff',  # TIFF
-        ]
-
-    def is_raw_file(self, file_path: str) -> bool:
-        """检查文件是否为RAW格式"""
-        ext = os.path.splitext(file_path)[1].lower()
-        return ext in self.get_supported_file_extensions()
-
-
-# 全局相机检测器实例
-_camera_detector = None
-
-def get_camera_detector() -> CameraDetector:
-    """获取全局相机检测器实例"""
-    global _camera_detector
-    if _camera_detector is None:
-        _camera_detector = CameraDetector()
-    return _camera_detector
-
-
-if __name__ == "__main__":
-    # 测试代码
-    detector = CameraDetector()
-
-    print("=== 相机检测器测试 ===")
-
-    # 测试标准化功能
-    test_cases = [
-        ('Canon', 'Canon EOS R5'),
-        ('NIKON CORPORATION', 'NIKON Z9'),
-        ('SONY', 'ILCE-7RM4'),
-        ('FUJIFILM', 'GFX100S'),
-        ('OLYMPUS IMAGING CORP.', 'E-M1 Mark III'),
-        ('Apple', 'iPhone 13 Pro'),
-        ('', 'EOS R6'),  # 只有型号
-        ('Canon', ''),   # 只有品牌
-        ('', ''),        # 都为空
-    ]
-
-    print("测试型号标准化:")
-    for make, model in test_cases:
-        brand, normalized_model = detector.normalize_camera_model(make, model)
-        print(f"输入: {make!r} + {model!r}")
-        print(f"输出: {brand!r} + {normalized_model!r}")
-        print("---")
-
-    # 显示支持的文件格式
-    print(f"支持的文件格式 ({len(detector.get_supported_file_extensions())}):")
-    formats = detector.get_supported_file_extensions()
-    print(", ".join(formats[:15]) + "...")  # 显示前15个
-
-    # 如果当前目录有RAW文件，可以测试检测
+#!/usr/bin/env python3
+"""
+相机型号识别系统
+从RAW文件中提取相机品牌和型号信息
+"""
+
+import io
+import logging
+import os
+import re
+import struct
+import functools
+import concurrent.futures
+from typing import Optional, Tuple, Dict, List, Iterator
+import rawpy
+
+# 可选的EXIF解析库，支持比内置TIFF解析更多的文件结构
+try:
+    import exifread
+    EXIFREAD_AVAILABLE = True
+except ImportError:
+    EXIFREAD_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# 型号清理规则 - 合并为单个正则，一次扫描完成全部替换
+_COMPANY_NAMES = r'Canon|Nikon|Sony|Fujifilm|Olympus|Panasonic|Leica|Pentax|Samsung|Apple'
+_MODEL_CLEANUP_PATTERN = (
+    # 移除常见前缀（允许前面带有公司名称）
+    rf'(?P<prefix>^(?:(?:{_COMPANY_NAMES})\s+)*(?:EOS|DSC|ILCE|DMC|GR|K-|X-T|GFX|Hasselblad|Phase\s+One)\s*)'
+    # 移除公司名称
+    rf'|(?P<company>\b(?:{_COMPANY_NAMES})\s+)'
+)
+# 连字符替换为空格
+_MODEL_DASH_PATTERN = r'|(?P<dash>\s*-\s*)'
+_MODEL_CLEANUP_RE = re.compile(_MODEL_CLEANUP_PATTERN + _MODEL_DASH_PATTERN, re.IGNORECASE)
+
+# 以下品牌的型号中，紧跟括号、连字符或位于末尾的自身品牌名称也要移除
+_MODEL_CLEANUP_RE_BY_BRAND = {
+    brand: re.compile(
+        _MODEL_CLEANUP_PATTERN + rf'|(?P<make>{brand}[\s-]*)' + _MODEL_DASH_PATTERN,
+        re.IGNORECASE
+    )
+    for brand in ('Canon', 'Nikon', 'Sony', 'Fujifilm', 'Olympus', 'Panasonic')
+}
+
+
+def _model_cleanup_replacement(match: re.Match) -> str:
+    """型号清理正则的替换函数"""
+    return ' ' if match.lastgroup == 'dash' else ''
+
+
+# 移除括号
+_PAREN_TABLE = str.maketrans('', '', '()')
+
+# 品牌前缀模式 - 用于从型号中识别品牌
+_BRAND_PREFIX_PATTERNS = {
+    'Canon': [r'^EOS', r'^PowerShot', r'^IXUS'],
+    'Nikon': [r'^D\d+', r'^Z\d+', r'^COOLPIX'],
+    'Sony': [r'^ILCE-', r'^ILCA-', r'^DSC', r'^α'],
+    'Fujifilm': [r'^X-', r'^GFX', r'^FinePix'],
+    'Olympus': [r'^E-', r'^STYLUS', r'^TOUGH'],
+    'Panasonic': [r'^DMC-', r'^LUMIX'],
+    'Leica': [r'^M\d+', r'^SL\d+', r'^Q\d+', r'^CL'],
+    'Pentax': [r'^K-\d+', r'^KP', r'^645D', r'^645Z'],
+    'Samsung': [r'^NX\d+', r'^Galaxy'],
+    'Apple': [r'^iPhone', r'^iPad'],
+}
+
+# 合并为单个正则，命中的分组名即为品牌（按上面的品牌顺序优先匹配）
+_BRAND_INFER_RE = re.compile(
+    '|'.join(
+        f"(?P<{brand}>{'|'.join(patterns)})"
+        for brand, patterns in _BRAND_PREFIX_PATTERNS.items()
+    ),
+    re.IGNORECASE
+)
+
+# 品牌特定清理规则 - 品牌 -> ((模式, 替换), ...)
+_BRAND_CLEANUP_RULES = {
+    'Canon': (
+        (re.compile(r'^EOS\s+', re.IGNORECASE), 'EOS'),
+        # 处理Rebel系列
+        (re.compile(r'Rebel\s+([A-Z]\d+)', re.IGNORECASE), r'EOS \1'),
+    ),
+    'Nikon': (
+        # 标准化D系列
+        (re.compile(r'^D(\d+)', re.IGNORECASE), r'D\1'),
+        # 标准化Z系列
+        (re.compile(r'^Z\s*(\d+)', re.IGNORECASE), r'Z\1'),
+    ),
+    'Sony': (
+        # 标准化ILCE系列
+        (re.compile(r'^ILCE[-\s]*(\d+)', re.IGNORECASE), r'α\1'),
+        (re.compile(r'^α\s*(\d+)', re.IGNORECASE), r'α\1'),
+    ),
+    'Fujifilm': (
+        # 标准化X系列
+        (re.compile(r'^X[-\s]*(\w+)', re.IGNORECASE), r'X-\1'),
+        # 标准化GFX系列
+        (re.compile(r'^GFX\s*(\w+)', re.IGNORECASE), r'GFX\1'),
+    ),
+    'Panasonic': (
+        # 标准化DMC系列
+        (re.compile(r'^DMC[-\s]*(\w+)', re.IGNORECASE), r'DMC-\1'),
+    ),
+}
+
+
+# 支持的RAW文件扩展名
+_RAW_EXTENSIONS = frozenset({
+    '.arw',   # Sony
+    '.cr2', '.cr3',  # Canon
+    '.dng',   # Adobe DNG
+    '.nef',   # Nikon
+    '.raw',   # Generic
+    '.orf',   # Olympus
+    '.rw2',   # Panasonic
+    '.pef',   # Pentax
+    '.srw',   # Samsung
+    '.mos',   # Leica / Leaf
+    '.mrw',   # Minolta
+    '.erf',   # Epson
+    '.k25', '.kc2', '.kdc',  # Kodak
+    '.raf',   # Fujifilm
+    '.3fr',   # Hasselblad
+    '.fff',   # Hasselblad
+    '.iiq',   # Phase One
+    '.crw',   # Canon old format
+    '.bay',   # Casio
+    '.bmq',   # Nokia
+    '.cap',   # Phase One
+    '.cine',  # Imacon
+    '.cs1',   # Captureshop
+    '.dc2',   # Sinar
+    '.dcr',   # Kodak
+    '.dcs',   # Kodak
+    '.drf',   # Kodak
+    '.dsc',   # Konica Minolta
+    '.exr',   # OpenEXR
+    '.ia',    # Imacon
+    '.jpg',   # JPEG (for testing)
+    '.jpeg',  # JPEG (for testing)
+    '.tif', '.tiff',  # TIFF
+})
+# 供str.endswith使用的元组，较长的扩展名在前
+_RAW_EXT_TUPLE = tuple(sorted(_RAW_EXTENSIONS, key=lambda ext: (-len(ext), ext)))
+
+# EXIF头部读取 - 只读取文件开头部分来获取品牌和型号
+_EXIF_HEADER_SIZE = 64 * 1024
+_TAG_MAKE = 0x010F
+_TAG_MODEL = 0x0110
+_TIFF_TYPE_ASCII = 2
+# 字节序标记后的魔数：标准TIFF为42，ORF为"IIRO"/"IIRS"/"MMOR"，RW2为0x55
+_TIFF_MAGICS = frozenset((42, 0x4F52, 0x5352, 0x55))
+
+# 回退到rawpy时，小于该大小的文件整体读入内存后再交给LibRaw
+_MAX_BUFFERED_READ = 200 * 1024 * 1024
+
+# rawpy元数据中可能的品牌/型号字段名（按优先级）
+_MAKE_KEYS = ('camera_make', 'Make', 'make')
+_MODEL_KEYS = ('camera_model', 'Model', 'model')
+
+
+def _first_value(metadata, keys: Tuple[str, ...]) -> str:
+    """返回元数据中第一个非空字段的值"""
+    get = metadata.get
+    for key in keys:
+        value = get(key)
+        if value:
+            return value
+    return ''
+
+
+def _read_tiff_make_model(header: bytes) -> Tuple[str, str]:
+    """
+    从TIFF结构的文件头中读取IFD0的Make/Model标签
+
+    CR2、NEF、ARW、DNG、ORF、RW2、PEF等大多数RAW格式都基于TIFF结构。
+
+    Args:
+        header: 文件开头的字节数据
+
+    Returns:
+        (制造商, 型号)，无法解析时为空字符串
+    """
+    if len(header) < 8:
+        return '', ''
+
+    byte_order = header[:2]
+    if byte_order == b'II':
+        endian = '<'
+    elif byte_order == b'MM':
+        endian = '>'
+    else:
+        return '', ''
+
+    magic, ifd_offset = struct.unpack_from(endian + 'HI', header, 2)
+    if magic not in _TIFF_MAGICS:
+        return '', ''
+    if ifd_offset + 2 > len(header):
+        return '', ''
+
+    entry_count = struct.unpack_from(endian + 'H', header, ifd_offset)[0]
+    values = {}
+    for i in range(entry_count):
+        entry = ifd_offset + 2 + i * 12
+        if entry + 12 > len(header):
+            break
+
+        tag, tag_type, count = struct.unpack_from(endian + 'HHI', header, entry)
+        if tag not in (_TAG_MAKE, _TAG_MODEL) or tag_type != _TIFF_TYPE_ASCII:
+            continue
+
+        # 不超过4字节的值直接存放在条目中，否则为偏移量
+        if count <= 4:
+            data = header[entry + 8:entry + 8 + count]
+        else:
+            value_offset = struct.unpack_from(endian + 'I', header, entry + 8)[0]
+            if value_offset + count > len(header):
+                # 值不在已读取的文件头内，跳过以免得到截断的名称，交由后备方法读取
+                continue
+            data = header[value_offset:value_offset + count]
+
+        values[tag] = data.split(b'\0', 1)[0].decode('ascii', 'ignore').strip()
+
+    return values.get(_TAG_MAKE, ''), values.get(_TAG_MODEL, '')
+
+
+def _read_exifread_make_model(fh) -> Tuple[str, str]:
+    """
+    使用exifread读取Make/Model标签，读到Model后立即停止解析
+
+    Args:
+        fh: 以二进制模式打开的文件对象
+
+    Returns:
+        (制造商, 型号)，无法解析时为空字符串
+    """
+    try:
+        tags = exifread.process_file(fh, details=False, stop_tag='Image Model')
+    except Exception:
+        return '', ''
+
+    make = tags.get('Image Make')
+    model = tags.get('Image Model')
+    return (str(make).strip() if make else '', str(model).strip() if model else '')
+
+
+class CameraDetector:
+    """相机型号检测器"""
+
+    def __init__(self):
+        """初始化相机检测器"""
+        # 品牌映射表 - 标准化品牌名称
+        self.brand_mapping = {
+            'Canon': 'Canon',
+            'NIKON': 'Nikon',
+            'NIKON CORPORATION': 'Nikon',
+            'Sony': 'Sony',
+            'SONY': 'Sony',
+            'Fujifilm': 'Fujifilm',
+            'FUJIFILM': 'Fujifilm',
+            'Olympus': 'Olympus',
+            'OLYMPUS IMAGING CORP.': 'Olympus',
+            'Panasonic': 'Panasonic',
+            'Panasonic Corporation': 'Panasonic',
+            'LEICA': 'Leica',
+            'Leica': 'Leica',
+            'Leica Camera AG': 'Leica',
+            'Pentax': 'Pentax',
+            'PENTAX': 'Pentax',
+            'RICOH IMAGING COMPANY, LTD.': 'Pentax',
+            'Samsung': 'Samsung',
+            'SAMSUNG': 'Samsung',
+            'Apple': 'Apple',
+            'Hasselblad': 'Hasselblad',
+            'Phase One': 'PhaseOne',
+            'Mamiya': 'Mamiya',
+            'Leaf': 'Leaf',
+            'Contax': 'Contax',
+            'Kodak': 'Kodak',
+        }
+        # 小写品牌 -> 标准品牌，用于忽略大小写的直接匹配
+        self._brand_lower = {k.lower(): v for k, v in self.brand_mapping.items()}
+        # 模糊匹配用的 (小写品牌, 标准品牌) 列表，保持brand_mapping的顺序
+        self._brand_mapping_lower_items = [(k.lower(), v) for k, v in self.brand_mapping.items()]
+
+        # 品牌前缀模式 - 用于从型号中识别品牌
+        self.brand_prefix_patterns = _BRAND_PREFIX_PATTERNS
+
+        # 标准化结果缓存 - 同一相机拍摄的大量文件输入完全相同
+        self.normalize_camera_model = functools.lru_cache(maxsize=1024)(self.normalize_camera_model)
+        self._normalize_brand = functools.lru_cache(maxsize=256)(self._normalize_brand)
+        self._infer_brand_from_model = functools.lru_cache(maxsize=256)(self._infer_brand_from_model)
+
+    def extract_camera_info(self, raw_path: str) -> Optional[Dict[str, str]]:
+        """
+        从RAW文件中提取相机信息
+
+        Args:
+            raw_path: RAW文件路径
+
+        Returns:
+            包含相机信息的字典，失败返回None
+        """
+        try:
+            # 优先只读取文件头解析EXIF，避免完整初始化LibRaw
+            with open(raw_path, 'rb') as fh:
+                header = fh.read(_EXIF_HEADER_SIZE)
+
+                camera_make, camera_model = _read_tiff_make_model(header)
+                if not (camera_make and camera_model) and EXIFREAD_AVAILABLE:
+                    fh.seek(0)
+                    camera_make, camera_model = _read_exifread_make_model(fh)
+                if camera_make and camera_model:
+                    return {
+                        'make': camera_make,
+                        'model': camera_model,
+                    }
+
+                # 非TIFF结构的格式（如CR3、RAF）回退到rawpy
+                # 一次顺序读入内存，比LibRaw按文件名随机读取快得多（网络存储尤甚）
+                if os.fstat(fh.fileno()).st_size <= _MAX_BUFFERED_READ:
+                    fh.seek(0)
+                    raw_source = io.BytesIO(fh.read())
+                else:
+                    raw_source = raw_path
+
+            with rawpy.imread(raw_source) as raw:
+                # 从RAW元数据获取相机信息
+                metadata = getattr(raw, 'raw_metadata', {})
+
+                # 尝试不同的元数据字段
+                camera_make = _first_value(metadata, _MAKE_KEYS)
+                camera_model = _first_value(metadata, _MODEL_KEYS)
+
+                # 如果没有从raw_metadata获取到，尝试其他属性
+                if not camera_make or not camera_model:
+                    # 尝试从其他属性获取
+                    if hasattr(raw, 'color_desc') and raw.color_desc:
+                        # 某些情况下可以从color_desc推断
+                        pass
+
+                return {
+                    'make': camera_make.strip(),
+                    'model': camera_model.strip(),
+                }
+
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # 批量扫描时非RAW文件失败很常见，仅在调试时输出，避免多线程争用stdout
+            logger.debug("读取RAW元数据失败 %s: %s", raw_path, e)
+            return None
+
+    def normalize_camera_model(self, make: str, model: str) -> Tuple[str, str]:
+        """
+        标准化相机品牌和型号名称用于ICM匹配
+
+        Args:
+            make: 相机制造商
+            model: 相机型号
+
+        Returns:
+            (标准化品牌, 标准化型号)
+        """
+        # 标准化品牌
+        brand = self._normalize_brand(make)
+
+        # 如果无法确定品牌，尝试从型号推断
+        if brand == 'Unknown':
+            brand = self._infer_brand_from_model(model)
+
+        # 标准化型号
+        normalized_model = self._normalize_model(model, brand)
+
+        return brand, normalized_model
+
+    def _normalize_brand(self, make: str) -> str:
+        """标准化相机品牌"""
+        if not make:
+            return 'Unknown'
+
+        make_clean = make.strip()
+
+        # 直接匹配（忽略大小写）
+        make_lower = make_clean.lower()
+        hit = self._brand_lower.get(make_lower)
+        if hit:
+            return hit
+
+        # 模糊匹配
+        for mapped_lower, standard_name in self._brand_mapping_lower_items:
+            if mapped_lower in make_lower or make_lower in mapped_lower:
+                return standard_name
+
+        return 'Unknown'
+
+    def _infer_brand_from_model(self, model: str) -> str:
+        """从型号推断相机品牌"""
+        if not model:
+            return 'Unknown'
+
+        match = _BRAND_INFER_RE.match(model.strip())
+        return match.lastgroup if match else 'Unknown'
+
+    def _normalize_model(self, model: str, brand: str) -> str:
+        """标准化相机型号"""
+        if not model:
+            return 'Unknown'
+
+        # 基础清理
+        model_clean = model.strip()
+
+        # 应用清理规则
+        cleanup_re = _MODEL_CLEANUP_RE_BY_BRAND.get(brand, _MODEL_CLEANUP_RE)
+        model_clean = cleanup_re.sub(_model_cleanup_replacement, model_clean)
+        model_clean = model_clean.translate(_PAREN_TABLE)
+
+        # 品牌特定清理
+        model_clean = self._brand_specific_model_cleanup(model_clean, brand)
+
+        # 最终清理
+        model_clean = ' '.join(model_clean.split())
+
+        # 确保型号不为空
+        if not model_clean:
+            return 'Unknown'
+
+        return model_clean
+
+    def _brand_specific_model_cleanup(self, model: str, brand: str) -> str:
+        """品牌特定的型号清理（品牌名称已由型号清理正则移除）"""
+        rules = _BRAND_CLEANUP_RULES.get(brand)
+        if rules:
+            for pattern, replacement in rules:
+                model = pattern.sub(replacement, model)
+
+        return model
+
+    def detect_camera_from_raw(self, raw_path: str) -> Optional[Tuple[str, str]]:
+        """
+        从RAW文件检测相机品牌和型号
+
+        Args:
+            raw_path: RAW文件路径
+
+        Returns:
+            (品牌, 型号) 或 None
+        """
+        camera_info = self.extract_camera_info(raw_path)
+        if not camera_info:
+            return None
+
+        make = camera_info.get('make', '')
+        model = camera_info.get('model', '')
+
+        if not make and not model:
+            return None
+
+        brand, normalized_model = self.normalize_camera_model(make, model)
+
+        if brand != 'Unknown' and normalized_model != 'Unknown':
+            return brand, normalized_model
+
+        return None
+
+    def detect_many(self, raw_paths: List[str],
+                    max_workers: int = 8) -> Dict[str, Optional[Tuple[str, str]]]:
+        """
+        并发检测多个RAW文件的相机品牌和型号
+
+        读取文件头主要是I/O操作，多线程可以同时读取多个文件。
+        本地SSD建议 max_workers = min(32, CPU核心数 * 2)，网络存储(SMB)建议约16。
+
+        Args:
+            raw_paths: RAW文件路径列表
+            max_workers: 最大工作线程数
+
+        Returns:
+            文件路径 -> (品牌, 型号) 或 None
+        """
+        if not raw_paths:
+            return {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self.detect_camera_from_raw, raw_paths)
+            return dict(zip(raw_paths, results))
+
+    def get_supported_file_extensions(self) -> list:
+        """获取支持的RAW文件扩展名"""
+        return sorted(_RAW_EXTENSIONS)
+
+    def is_raw_file(self, file_path: str) -> bool:
+        """检查文件是否为RAW格式"""
+        return file_path.lower().endswith(_RAW_EXT_TUPLE)
+
+    def iter_raw_files(self, directory: str) -> Iterator[os.DirEntry]:
+        """
+        遍历目录中的RAW文件（不递归）
+
+        os.scandir返回的DirEntry自带文件类型信息，无需逐个文件调用os.path.exists。
+
+        Args:
+            directory: 目录路径
+
+        Yields:
+            RAW文件对应的DirEntry
+        """
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(_RAW_EXT_TUPLE) and entry.is_file():
+                    yield entry
+
+
+# 全局相机检测器实例（首次调用时创建）
+@functools.cache
+def get_camera_detector() -> CameraDetector:
+    """获取全局相机检测器实例"""
+    return CameraDetector()
+
+
+if __name__ == "__main__":
+    # 测试代码
+    detector = CameraDetector()
+
+    print("=== 相机检测器测试 ===")
+
+    # 测试标准化功能
+    test_cases = [
+        ('Canon', 'Canon EOS R5'),
+        ('NIKON CORPORATION', 'NIKON Z9'),
+        ('SONY', 'ILCE-7RM4'),
+        ('FUJIFILM', 'GFX100S'),
+        ('OLYMPUS IMAGING CORP.', 'E-M1 Mark III'),
+        ('Apple', 'iPhone 13 Pro'),
+        ('', 'EOS R6'),  # 只有型号
+        ('Canon', ''),   # 只有品牌
+        ('', ''),        # 都为空
+    ]
+
+    print("测试型号标准化:")
+    for make, model in test_cases:
+        brand, normalized_model = detector.normalize_camera_model(make, model)
+        print(f"输入: {make!r} + {model!r}")
+        print(f"输出: {brand!r} + {normalized_model!r}")
+        print("---")
+
+    # 显示支持的文件格式
+    print(f"支持的文件格式 ({len(detector.get_supported_file_extensions())}):")
+    formats = detector.get_supported_file_extensions()
+    print(", ".join(formats[:15]) + "...")  # 显示前15个
+
+    # 如果当前目录有RAW文件，可以测试检测
     print("\n如需测试实际RAW文件检测，请提供RAW文件路径")
\ No newline at end of file
@@ -1,719 +1,1466 @@
-#!/usr/bin/env python3
-"""
-增强RAW转换引擎
-优化转换性能、错误处理和内存管理
-"""
-
-import os
-import rawpy
-import imageio
-import threading
-import time
-import psutil
-from typing import List, Dict, Optional, Tuple, Callable
-from dataclasses import dataclass
-from pathlib import Path
-import concurrent.futures
-from enum import Enum
-from PIL import Image, ImageCms
-import numpy
-
-# 导入ICM管理器和相机检测器
-try:
-    from icm_manager import get_icm_manager
-    from camera_detector import get_camera_detector
-    ICM_AVAILABLE = True
-except ImportError:
-    ICM_AVAILABLE = False
-    print("警告: ICM功能模块未找到，校色功能将被禁用")
-
-# 支持的RAW格式
-SUPPORTED_FORMATS = {
-    '.arw': 'Sony',
-    '.cr2': 'Canon',
-    '.cr3': 'Canon',
-    '.dng': 'Adobe DNG',
-    '.nef': 'Nikon',
-    '.raw': 'Generic',
-    '.orf': 'Olympus',
-    '.rw2': 'Panasonic',
-    '.pef': 'Pentax',
-    '.srw': 'Samsung',
-    '.mos': 'Leica'
-}
-
-class ConversionStatus(Enum):
-    """转换状态枚举"""
-    PENDING = "pending"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    SKIPPED = "skipped"
-
-@dataclass
-class ConversionConfig:
-    """转换配置类"""
-    jpeg_quality: int = 95
-    use_camera_wb: bool = True
-    use_auto_wb: bool = False
-    output_bps: int = 8
-    bright: float = 1.0
-    no_auto_bright: bool = False
-    half_size: bool = False
-    exp_shift: float = 0.0
-    exp_preserve_highlights: bool = True
-    four_color_rgb: bool = False
-    max_threads: Optional[int] = None  # None表示自动检测
-
-    # ICM校色相关配置
-    enable_icm_correction: bool = True  # 启用ICM校色
-    icm_brand: str = ""             # 品牌选择
-    icm_model: str = ""             # 型号选择
-    icm_scene: str = "Generic"     # 校色场景
-    manual_icm_path: Optional[str] = None  # 手动指定的ICM文件路径
-    strict_icm: bool = True        # 严格模式：校色失败则中断
-    auto_detect_camera: bool = True  # 自动检测相机型号
-
-@dataclass
-class ConversionResult:
-    """转换结果类"""
-    input_path: str
-    output_path: str
-    status: ConversionStatus
-    start_time: float
-    end_time: float
-    file_size_input: int
-    file_size_output: int
-    error_message: str = ""
-    processing_time: float = 0.0
-
-    # ICM校色相关信息
-    camera_brand: str = ""
-    camera_model: str = ""
-    icm_applied: bool = False
-    icm_file: str = ""
-
-class ConversionMetrics:
-    """转换性能指标"""
-    def __init__(self):
-        self.total_files = 0
-        self.completed_files = 0
-        self.failed_files = 0
-        self.skipped_files = 0
-        self.total_size_input = 0
-        self.total_size_output = 0
-        self.total_processing_time = 0.0
-        self.average_processing_time = 0.0
-        self.conversion_rate = 0.0  # MB/s
-        self.start_time = 0.0
-        self.end_time = 0.0
-
-    def start_timing(self):
-        """开始计时"""
-        self.start_time = time.time()
-
-    def end_timing(self):
-        """结束计时"""
-        self.end_time = time.time()
-
-    def add_result(self, result: ConversionResult):
-        """添加转换结果"""
-        self.total_files += 1
-
-        if result.status == ConversionStatus.COMPLETED:
-            self.completed_files += 1
-            self.total_size_input += result.file_size_input
-            self.total_size_output += result.file_size_output
-            self.total_processing_time += result.processing_time
-        elif result.status == ConversionStatus.FAILED:
-            self.failed_files += 1
-        elif result.status == ConversionStatus.SKIPPED:
-            self.skipped_files += 1
-
-    def calculate_metrics(self):
-        """计算性能指标"""
-        if self.completed_files > 0:
-            self.average_processing_time = self.total_processing_time / self.completed_files
-
-            total_mb = self.total_size_input / (1024 * 1024)
-            if total_mb > 0 and self.total_processing_time > 0:
-                self.conversion_rate = total_mb / self.total_processing_time
-
-    def get_summary(self) -> Dict:
-        """获取指标摘要"""
-        return {
-            'total_files': self.total_files,
-            'completed': self.completed_files,
-            'failed': self.failed_files,
-            'skipped': self.skipped_files,
-            'success_rate': (self.completed_files / self.total_files * 100) if self.total_files > 0 else 0,
-            'total_time': self.end_time - self.start_time,
-            'avg_time_per_file': self.average_processing_time,
-            'conversion_rate_mbps': self.conversion_rate,
-            'size_compression': (1 - self.total_size_output / self.total_size_input * 100) if self.total_size_input > 0 else 0
-        }
-
-class EnhancedRAWConverter:
-    """增强RAW转换器"""
-
-    def __init__(self, config: Optional[ConversionConfig] = None):
-        self.config = config or ConversionConfig()
-        self.metrics = ConversionMetrics()
-        self.is_converting = False
-        self.progress_callback: Optional[Callable] = None
-        self.status_callback: Optional[Callable] = None
-
-        # 系统资源检测
-        self.max_threads = self._detect_optimal_threads()
-        self.memory_limit = self._detect_memory_limit()
-
-        # ICM校色组件初始化
-        self.icm_manager = None
-        self.camera_detector = None
-        if ICM_AVAILABLE and self.config.enable_icm_correction:
-            try:
-                self.icm_manager = get_icm_manager()
-                self.camera_detector = get_camera_detector()
-            except Exception as e:
-                print(f"警告: ICM组件初始化失败: {str(e)}")
-                self.config.enable_icm_correction = False
-
-    def _detect_optimal_threads(self) -> int:
-        """检测最优线程数"""
-        cpu_count = os.cpu_count() or 1
-        memory_gb = psutil.virtual_memory().total / (1024**3)
-
-        # 基于CPU核心数和内存限制确定线程数
-        if self.config.max_threads:
-            return min(self.config.max_threads, cpu_count)
-
-        # RAW处理比较消耗内存，限制线程数
-        optimal_threads = min(cpu_count, max(1, int(memory_gb / 2)))
-        return min(optimal_threads, 4)  # 最多4个线程
-
-    def _detect_memory_limit(self) -> int:
-        """检测内存限制(MB)"""
-        total_memory = psutil.virtual_memory().total
-        available_memory = psutil.virtual_memory().available
-
-        # 使用70%的可用内存作为限制
-        return int(available_memory * 0.7 / (1024 * 1024))
-
-    def set_progress_callback(self, callback: Callable[[int, int], None]):
-        """设置进度回调函数"""
-        self.progress_callback = callback
-
-    def set_status_callback(self, callback: Callable[[str], None]):
-        """设置状态回调函数"""
-        self.status_callback = callback
-
-    def scan_raw_files(self, input_path: str, recursive: bool = True) -> List[str]:
-        """扫描RAW文件"""
-        raw_files = []
-
-        try:
-            if recursive:
-                for root, dirs, files in os.walk(input_path):
-                    for file in files:
-                        if self._is_raw_file(file):
-                            raw_files.append(os.path.join(root, file))
-            else:
-                for file in os.listdir(input_path):
-                    if self._is_raw_file(file):
-                        raw_files.append(os.path.join(input_path, file))
-
-        except Exception as e:
-            raise Exception(f"扫描文件失败: {str(e)}")
-
-        return sorted(raw_files)
-
-    def _is_raw_file(self, filename: str) -> bool:
-        """检查是否为RAW文件"""
-        ext = Path(filename).suffix.lower()
-        return ext in SUPPORTED_FORMATS
-
-    def prepare_output_path(self, input_path: str, output_dir: str) -> str:
-        """准备输出文件路径"""
-        # 保持相对路径结构
-        relative_path = os.path.relpath(input_path, os.path.dirname(input_path))
-        name_without_ext = os.path.splitext(relative_path)[0]
-
-        # 确保输出目录存在
-        os.makedirs(output_dir, exist_ok=True)
-
-        return os.path.join(output_dir, f"{name_without_ext}.jpg")
-
-    def convert_single_file(self, input_path: str, output_path: str) -> ConversionResult:
-        """转换单个文件"""
-        start_time = time.time()
-        file_size_input = os.path.getsize(input_path) if os.path.exists(input_path) else 0
-
-        # 初始化结果变量
-        camera_brand = ""
-        camera_model = ""
-        icm_applied = False
-        icm_file = ""
-
-        try:
-            # 检查输出目录
-            output_dir = os.path.dirname(output_path)
-            os.makedirs(output_dir, exist_ok=True)
-
-            # 检查输出文件是否已存在
-            if os.path.exists(output_path):
-                return ConversionResult(
-                    input_path=input_path,
-                    output_path=output_path,
-                    status=ConversionStatus.SKIPPED,
-                    start_time=start_time,
-                    end_time=time.time(),
-                    file_size_input=file_size_input,
-                    file_size_output=0,
-                    error_message="输出文件已存在"
-                )
-
-            # 相机检测
-            if self.config.auto_detect_camera and self.camera_detector:
-                camera_brand, camera_model = self.detect_camera_from_file(input_path)
-
-            # 确定ICM文件
-            if self.config.enable_icm_correction:
-                icm_file = self.determine_icm_file(input_path, camera_brand, camera_model)
-
-            # 执行转换
-            self._convert_with_rawpy(input_path, output_path, camera_brand, camera_model)
-
-            # 标记ICM应用状态
-            icm_applied = self.config.enable_icm_correction and bool(icm_file)
-
-            end_time = time.time()
-            file_size_output = os.path.getsize(output_path) if os.path.exists(output_path) else 0
-
-            return ConversionResult(
-                input_path=input_path,
-                output_path=output_path,
-                status=ConversionStatus.COMPLETED,
-                start_time=start_time,
-                end_time=end_time,
-                file_size_input=file_size_input,
-                file_size_output=file_size_output,
-                processing_time=end_time - start_time,
-                camera_brand=camera_brand,
-                camera_model=camera_model,
-                icm_applied=icm_applied,
-                icm_file=icm_file
-            )
-
-        except Exception as e:
-            end_time = time.time()
-            return ConversionResult(
-                input_path=input_path,
-                output_path=output_path,
-                status=ConversionStatus.FAILED,
-                start_time=start_time,
-                end_time=end_time,
-                file_size_input=file_size_input,
-                file_size_output=0,
-                error_message=str(e),
-                processing_time=end_time - start_time,
-                camera_brand=camera_brand,
-                camera_model=camera_model,
-                icm_applied=icm_applied,
-                icm_file=icm_file
-            )
-
-    def _convert_with_rawpy(self, input_path: str, output_path: str,
-                        detected_brand: str = "", detected_model: str = ""):
-        """使用rawpy进行转换"""
-        try:
-            with rawpy.imread(input_path) as raw:
-                # 优化的处理参数
-                rgb = raw.postprocess(
-                    use_camera_wb=self.config.use_camera_wb,
-                    use_auto_wb=self.config.use_auto_wb,
-                    output_bps=self.config.output_bps,
-                    bright=self.config.bright,
-                    no_auto_bright=self.config.no_auto_bright,
-                    half_size=self.config.half_size,
-                    exp_shift=self.config.exp_shift,
-                    exp_preserve_highlights=self.config.exp_preserve_highlights,
-                    four_color_rgb=self.config.four_color_rgb,
-                )
-
-            # 应用ICM校色
-            if self.config.enable_icm_correction:
-                rgb = self.apply_icm_correction(input_path, rgb, detected_brand, detected_model)
-
-            # 保存JPEG
-            imageio.imwrite(output_path, rgb, quality=self.config.jpeg_quality)
-
-        except Exception as e:
-            # 重新抛出转换错误
-            raise Exception(f"RAW转换失败: {str(e)}")
-
-    def convert_batch(self, input_files: List[str], output_dir: str,
-                     max_workers: Optional[int] = None) -> List[ConversionResult]:
-        """批量转换文件"""
-        if not input_files:
-            return []
-
-        self.is_converting = True
-        self.metrics = ConversionMetrics()
-        self.metrics.start_timing()
-
-        # 准备输出路径
-        file_pairs = []
-        for input_file in input_files:
-            output_path = self.prepare_output_path(input_file, output_dir)
-            file_pairs.append((input_file, output_path))
-
-        # 确定工作线程数
-        workers = max_workers or self.max_threads
-
-        results = []
-
-        try:
-            if len(file_pairs) == 1:
-                # 单文件直接转换
-                result = self.convert_single_file(file_pairs[0][0], file_pairs[0][1])
-                results = [result]
-            else:
-                # 多文件并行转换
-                results = self._convert_parallel(file_pairs, workers)
-
-        except Exception as e:
-            if self.status_callback:
-                self.status_callback(f"批量转换失败: {str(e)}")
-            raise
-        finally:
-            self.is_converting = False
-            self.metrics.end_timing()
-
-            # 更新指标
-            for result in results:
-                self.metrics.add_result(result)
-            self.metrics.calculate_metrics()
-
-        return results
-
-    def _convert_parallel(self, file_pairs: List[Tuple[str, str]],
-                         max_workers: int) -> List[ConversionResult]:
-        """并行转换文件"""
-        results = [None] * len(file_pairs)
-        completed_count = 0
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_index = {
-                executor.submit(self.convert_single_file, input_path, output_path): i
-                for i, (input_path, output_path) in enumerate(file_pairs)
-            }
-
-            # 等待任务完成
-            for future in concurrent.futures.as_completed(future_to_index):
-                if not self.is_converting:
-                    # 取消剩余任务
-                    for f in future_to_index:
-                        f.cancel()
-                    break
-
-                index = future_to_index[future]
-                try:
-                    result = future.result()
-                    results[index] = result
-                    completed_count += 1
-
-                    # 更新进度
-                    if self.progress_callback:
-                        self.progress_callback(completed_count, len(file_pairs))
-
-                    # 更新状态
-                    if self.status_callback:
-                        filename = os.path.basename(result.input_path)
-                        if result.status == ConversionStatus.COMPLETED:
-                            self.status_callback(f"已完成: {filename}")
-                        elif result.status == ConversionStatus.FAILED:
-                            self.status_callback(f"失败: {filename} - {result.error_message}")
-                        elif result.status == ConversionStatus.SKIPPED:
-                            self.status_callback(f"跳过: {filename}")
-
-                except Exception as e:
-                    # 创建失败结果
-                    input_path, output_path = file_pairs[index]
-                    results[index] = ConversionResult(
-                        input_path=input_path,
-                        output_path=output_path,
-                        status=ConversionStatus.FAILED,
-                        start_time=time.time(),
-                        end_time=time.time(),
-                        file_size_input=0,
-                        file_size_output=0,
-                        error_message=str(e)
-                    )
-
-        return results
-
-    def stop_conversion(self):
-        """停止转换"""
-        self.is_converting = False
-
-    def get_metrics(self) -> Dict:
-        """获取转换指标"""
-        return self.metrics.get_summary()
-
-    def estimate_conversion_time(self, files: List[str]) -> Tuple[float, float]:
-        """估算转换时间和内存需求"""
-        if not files:
-            return 0.0, 0.0
-
-        total_size = 0
-        sample_count = min(5, len(files))  # 采样5个文件
-
-        # 估算文件大小
-        for file_path in files[:sample_count]:
-            if os.path.exists(file_path):
-                total_size += os.path.getsize(file_path)
-
-        avg_size = total_size / sample_count if sample_count > 0 else 0
-        estimated_total_size = avg_size * len(files)
-
-        # 估算时间 (基于经验值: 约每MB需要0.5-2秒)
-        size_mb = estimated_total_size / (1024 * 1024)
-        estimated_time = size_mb * 1.0  # 1秒每MB的平均估算
-
-        # 估算内存需求 (考虑并行处理)
-        estimated_memory = (estimated_total_size * 3) / (1024 * 1024)  # 3倍文件大小作为缓存
-        estimated_memory = min(estimated_memory, self.memory_limit)
-
-        return estimated_time, estimated_memory
-
-    def validate_environment(self) -> Dict[str, bool]:
-        """验证转换环境"""
-        validation = {
-            'rawpy_available': False,
-            'imageio_available': False,
-            'memory_sufficient': False,
-            'disk_space_sufficient': False,
-            'icm_available': False,
-            'pil_cms_available': False
-        }
-
-        try:
-            import rawpy
-            validation['rawpy_available'] = True
-        except ImportError:
-            pass
-
-        try:
-            import imageio
-            validation['imageio_available'] = True
-        except ImportError:
-            pass
-
-        # 检查PIL ImageCms
-        try:
-            from PIL import ImageCms
-            validation['pil_cms_available'] = True
-        except ImportError:
-            pass
-
-        validation['icm_available'] = ICM_AVAILABLE and self.icm_manager is not None
-
-        # 内存检查
-        memory_gb = psutil.virtual_memory().total / (1024**3)
-        validation['memory_sufficient'] = memory_gb >= 2  # 至少2GB内存
-
-        # 磁盘空间检查 (临时目录)
-        try:
-            temp_usage = psutil.disk_usage('/tmp' if os.name != 'nt' else os.environ.get('TEMP', 'C:\\'))
-            validation['disk_space_sufficient'] = temp_usage.free > (1024**3)  # 至少1GB空闲
-        except:
-            pass
-
-        return validation
-
-    def detect_camera_from_file(self, raw_path: str) -> Tuple[str, str]:
-        """
-        从RAW文件检测相机品牌和型号
-
-        Args:
-            raw_path: RAW文件路径
-
-        Returns:
-            (品牌, 型号)
-        """
-        if not self.camera_detector:
-            return "", ""
-
-        try:
-            result = self.camera_detector.detect_camera_from_raw(raw_path)
-            return result if result else ("", "")
-        except Exception as e:
-            print(f"相机检测失败 {raw_path}: {str(e)}")
-            return "", ""
-
-    def determine_icm_file(self, raw_path: str, detected_brand: str = "", detected_model: str = "") -> Optional[str]:
-        """
-        确定要使用的ICM文件
-
-        Args:
-            raw_path: RAW文件路径
-            detected_brand: 已检测的品牌
-            detected_model: 已检测的型号
-
-        Returns:
-            ICM文件路径或None
-        """
-        if not self.icm_manager:
-            return None
-
-        # 手动指定的ICM文件优先
-        if self.config.manual_icm_path and os.path.exists(self.config.manual_icm_path):
-            return self.config.manual_icm_path
-
-        # 使用配置中的品牌型号
-        brand = self.config.icm_brand or detected_brand
-        model = self.config.icm_model or detected_model
-        scene = self.config.icm_scene
-
-        if not brand or not model:
-            return None
-
-        # 从ICM管理器获取文件
-        return self.icm_manager.get_icm_file(brand, model, scene)
-
-    def apply_icm_correction(self, input_path: str, rgb_array: numpy.ndarray,
-                           detected_brand: str = "", detected_model: str = "") -> numpy.ndarray:
-        """
-        应用ICM校色到RGB数组
-
-        Args:
-            input_path: 输入文件路径
-            rgb_array: RGB数组
-            detected_brand: 已检测的品牌
-            detected_model: 已检测的型号
-
-        Returns:
-            校色后的RGB数组
-
-        Raises:
-            Exception: 校色失败时抛出异常
-        """
-        if not self.config.enable_icm_correction:
-            return rgb_array
-
-        # 确定ICM文件
-        icm_path = self.determine_icm_file(input_path, detected_brand, detected_model)
-        if not icm_path:
-            error_msg = f"找不到ICM文件: {detected_brand} {detected_model} {self.config.icm_scene}"
-            if self.config.strict_icm:
-                raise Exception(error_msg)
-            else:
-                print(f"警告: {error_msg}，跳过校色")
-                return rgb_array
-
-        try:
-            # 加载ICC配置文件
-            if not self.icm_manager:
-                raise Exception("ICM管理器未初始化")
-
-            icc_profile = self.icm_manager.load_icc_profile(icm_path)
-            if not icc_profile:
-                raise Exception(f"加载ICM文件失败: {icm_path}")
-
-            # 转换为PIL图像进行校色
-            pil_image = Image.fromarray(rgb_array)
-
-            # 获取sRGB配置文件作为输出配置
-            try:
-                # 尝试使用系统sRGB配置
-                srgb_profile = ImageCms.createProfile("sRGB")
-            except:
-                # 如果失败，使用默认配置
-                srgb_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("RGB"))
-
-            # 应用校色转换
-            converted_image = ImageCms.profileToProfile(
-                pil_image,
-                icc_profile,
-                srgb_profile,
-                outputMode='RGB',
-                inPlace=False
-            )
-
-            return numpy.array(converted_image)
-
-        except Exception as e:
-            error_msg = f"ICM校色失败: {str(e)}"
-            if self.config.strict_icm:
-                raise Exception(error_msg)
-            else:
-                print(f"警告: {error_msg}，使用原始图像")
-                return rgb_array
-
-# 便利函数
-def create_default_converter() -> EnhancedRAWConverter:
-    """创建默认配置的转换器"""
-    config = ConversionConfig(
-        jpeg_quality=95,
-        use_camera_wb=True,
-        output_bps=8,
-        exp_preserve_highlights=True,
-        max_threads=None,  # 自动检测
-        enable_icm_correction=True,  # 启用ICM校色
-        auto_detect_camera=True,     # 自动检测相机
-        strict_icm=True             # 严格模式
-    )
-    return EnhancedRAWConverter(config)
-
-def create_fast_converter() -> EnhancedRAWConverter:
-    """创建快速转换配置"""
-    config = ConversionConfig(
-        jpeg_quality=85,  # 较低质量但更快
-        use_camera_wb=False,  # 跳过白平衡计算
-        use_auto_wb=True,  # 使用自动白平衡
-        output_bps=8,
-        half_size=True,  # 半尺寸输出
-        no_auto_bright=True,  # 跳过自动亮度调整
-        exp_preserve_highlights=False,
-        max_threads=4,  # 使用更多线程
-        enable_icm_correction=False,  # 快速模式禁用ICM
-        auto_detect_camera=False
-    )
-    return EnhancedRAWConverter(config)
-
-def create_high_quality_converter() -> EnhancedRAWConverter:
-    """创建高质量转换配置"""
-    config = ConversionConfig(
-        jpeg_quality=98,
-        use_camera_wb=True,
-        use_auto_wb=False,
-        output_bps=8,
-        bright=1.0,
-        no_auto_bright=False,
-        half_size=False,  # 全分辨率
-        exp_preserve_highlights=True,
-        max_threads=1,  # 单线程确保质量
-        enable_icm_correction=True,  # 高质量模式启用ICM
-        auto_detect_camera=True,
-        strict_icm=True,            # 严格模式确保质量
-        icm_scene="ProStandard"     # 使用专业标准场景
-    )
-    return EnhancedRAWConverter(config)
-
-def create_icm_converter(brand: str = "", model: str = "", scene: str = "Generic") -> EnhancedRAWConverter:
-    """创建指定ICM配置的转换器"""
-    config = ConversionConfig(
-        jpeg_quality=95,
-        use_camera_wb=True,
-        output_bps=8,
-        exp_preserve_highlights=True,
-        max_threads=None,
-        enable_icm_correction=True,
-        auto_detect_camera=True,
-        strict_icm=True,
-        icm_brand=brand,
-        icm_model=model,
-        icm_scene=scene
-    )
+#!/usr/bin/env python3
+"""
+增强RAW转换引擎
+优化转换性能、错误处理和内存管理
+"""
+
+import os
+import sys
+import json
+import platform
+import tempfile
+import functools
+import contextlib
+import collections
+import rawpy
+import threading
+import multiprocessing
+import time
+import psutil
+from typing import List, Dict, Optional, Tuple, Callable, BinaryIO, Iterator
+import dataclasses
+from dataclasses import dataclass
+import concurrent.futures
+from enum import Enum
+from PIL import Image, ImageCms
+import numpy
+
+# 导入ICM管理器和相机检测器
+try:
+    from icm_manager import get_icm_manager
+    from camera_detector import get_camera_detector
+    ICM_AVAILABLE = True
+except ImportError:
+    ICM_AVAILABLE = False
+    print("警告: ICM功能模块未找到，校色功能将被禁用")
+
+# 可选：numba加速的查找表校色
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 可选：libjpeg-turbo编码JPEG
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJFLAG_FASTDCT, TJFLAG_ACCURATEDCT, TJFLAG_PROGRESSIVE
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+
+# 支持的RAW格式
+SUPPORTED_FORMATS = {
+    '.arw': 'Sony',
+    '.cr2': 'Canon',
+    '.cr3': 'Canon',
+    '.dng': 'Adobe DNG',
+    '.nef': 'Nikon',
+    '.raw': 'Generic',
+    '.orf': 'Olympus',
+    '.rw2': 'Panasonic',
+    '.pef': 'Pentax',
+    '.srw': 'Samsung',
+    '.mos': 'Leica'
+}
+_RAW_EXT = frozenset(SUPPORTED_FORMATS)
+
+# 校色3D查找表每个通道的网格节点数
+CLUT_GRID_SIZE = 33
+
+# 线程数基准测试结果缓存文件
+THREAD_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'raw2jpeg', 'threads.json')
+
+# 无查找表加速时，ImageCms校色每次处理的行数
+ICM_BAND_ROWS = 256
+
+# TurboJPEG编码质量不低于该值时使用精确DCT，低于时使用快速DCT
+ACCURATE_DCT_QUALITY = 90
+
+# Python 3.10+ 的dataclass支持__slots__，每个文件一个结果对象时可减少内存和属性查找开销
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+class ConversionStatus(str, Enum):
+    """转换状态枚举"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+@dataclass(**_DATACLASS_OPTIONS)
+class ConversionConfig:
+    """转换配置类"""
+    jpeg_quality: int = 95
+    jpeg_optimize: bool = False     # 额外一遍哈夫曼表优化（文件略小，编码更慢）
+    jpeg_progressive: bool = False  # 渐进式JPEG
+    jpeg_subsampling: int = 2       # 色度抽样: 0=4:4:4, 1=4:2:2, 2=4:2:0
+    use_camera_wb: bool = True
+    use_auto_wb: bool = False
+    output_bps: int = 8
+    bright: float = 1.0
+    no_auto_bright: bool = False
+    half_size: bool = False
+    exp_shift: float = 0.0
+    exp_preserve_highlights: bool = True
+    four_color_rgb: bool = False
+    max_threads: Optional[int] = None  # None表示自动检测
+    target_max_dimension: Optional[int] = None  # 输出长边上限(像素)，None表示原尺寸；足够小时自动使用半尺寸快速解码
+
+    # ICM校色相关配置
+    enable_icm_correction: bool = True  # 启用ICM校色
+    icm_brand: str = ""             # 品牌选择
+    icm_model: str = ""             # 型号选择
+    icm_scene: str = "Generic"     # 校色场景
+    manual_icm_path: Optional[str] = None  # 手动指定的ICM文件路径
+    strict_icm: bool = True        # 严格模式：校色失败则中断
+    auto_detect_camera: bool = True  # 自动检测相机型号
+
+@dataclass(**_DATACLASS_OPTIONS)
+class ConversionResult:
+    """转换结果类"""
+    input_path: str
+    output_path: str
+    status: ConversionStatus
+    start_time: float
+    end_time: float
+    file_size_input: int
+    file_size_output: int
+    error_message: str = ""
+    processing_time: float = 0.0
+
+    # ICM校色相关信息
+    camera_brand: str = ""
+    camera_model: str = ""
+    icm_applied: bool = False
+    icm_file: str = ""
+
+class ConversionMetrics:
+    """转换性能指标"""
+    def __init__(self):
+        self.total_files = 0
+        self.completed_files = 0
+        self.failed_files = 0
+        self.skipped_files = 0
+        self.total_size_input = 0
+        self.total_size_output = 0
+        self.total_processing_time = 0.0
+        self.average_processing_time = 0.0
+        self.conversion_rate = 0.0  # MB/s
+        self.start_time = 0.0
+        self.end_time = 0.0
+
+        # 按状态分派结果统计
+        self._result_handlers = {
+            ConversionStatus.COMPLETED: self._add_completed,
+            ConversionStatus.FAILED: self._add_failed,
+            ConversionStatus.SKIPPED: self._add_skipped,
+        }
+
+    def start_timing(self):
+        """开始计时"""
+        self.start_time = time.time()
+
+    def end_timing(self):
+        """结束计时"""
+        self.end_time = time.time()
+
+    def add_result(self, result: ConversionResult):
+        """添加转换结果"""
+        self.total_files += 1
+
+        handler = self._result_handlers.get(result.status)
+        if handler:
+            handler(result)
+
+    def _add_completed(self, result: ConversionResult):
+        self.completed_files += 1
+        self.total_size_input += result.file_size_input
+        self.total_size_output += result.file_size_output
+        self.total_processing_time += result.processing_time
+
+    def _add_failed(self, result: ConversionResult):
+        self.failed_files += 1
+
+    def _add_skipped(self, result: ConversionResult):
+        self.skipped_files += 1
+
+    def calculate_metrics(self):
+        """计算性能指标"""
+        if self.completed_files > 0:
+            self.average_processing_time = self.total_processing_time / self.completed_files
+
+            total_mb = self.total_size_input / (1024 * 1024)
+            if total_mb > 0 and self.total_processing_time > 0:
+                self.conversion_rate = total_mb / self.total_processing_time
+
+    def get_summary(self) -> Dict:
+        """获取指标摘要"""
+        return {
+            'total_files': self.total_files,
+            'completed': self.completed_files,
+            'failed': self.failed_files,
+            'skipped': self.skipped_files,
+            'success_rate': (self.completed_files / self.total_files * 100) if self.total_files > 0 else 0,
+            'total_time': self.end_time - self.start_time,
+            'avg_time_per_file': self.average_processing_time,
+            'conversion_rate_mbps': self.conversion_rate,
+            'size_compression': (1 - self.total_size_output / self.total_size_input * 100) if self.total_size_input > 0 else 0
+        }
+
+class EnhancedRAWConverter:
+    """增强RAW转换器"""
+
+    def __init__(self, config: Optional[ConversionConfig] = None):
+        self.config = config or ConversionConfig()
+        self.metrics = ConversionMetrics()
+        self.is_converting = False
+        self.progress_callback: Optional[Callable] = None
+        self.status_callback: Optional[Callable] = None
+        self.result_callback: Optional[Callable] = None
+
+        # rawpy处理参数，配置在批量转换期间不变，只构建一次
+        self._postprocess_kwargs = dict(
+            use_camera_wb=self.config.use_camera_wb,
+            use_auto_wb=self.config.use_auto_wb,
+            output_bps=self.config.output_bps,
+            bright=self.config.bright,
+            no_auto_bright=self.config.no_auto_bright,
+            half_size=self.config.half_size,
+            exp_shift=self.config.exp_shift,
+            exp_preserve_highlights=self.config.exp_preserve_highlights,
+            four_color_rgb=self.config.four_color_rgb,
+        )
+
+        # 系统资源检测
+        self.max_threads = self._detect_optimal_threads()
+        self.memory_limit = self._detect_memory_limit()
+
+        # ICM校色组件初始化
+        self.icm_manager = None
+        self.camera_detector = None
+
+        # 校色转换缓存 (ICM路径, 图像模式) -> ImageCmsTransform
+        self._cms_transforms = {}
+        # 校色3D查找表缓存 ICM路径 -> (查找表, 节点索引表, 节点插值系数表)
+        self._cluts = {}
+        self._cms_lock = threading.Lock()
+
+        # sRGB输出配置文件只创建一次；ICC配置文件按路径缓存
+        self._srgb_profile = ImageCms.createProfile("sRGB")
+        self._icc_cache: Dict[str, ImageCms.ImageCmsProfile] = {}
+        self._icc_lock = threading.Lock()
+
+        # 相机检测与ICM查找结果缓存 - 同一相机的批量文件重复查询相同结果
+        self._detect_camera = functools.lru_cache(maxsize=1024)(self._detect_camera)
+        self._lookup_icm_file = functools.lru_cache(maxsize=256)(self._lookup_icm_file)
+
+        # 每个线程复用的校色行带图像，避免每个行带、每个文件重新分配
+        self._scratch = threading.local()
+        if ICM_AVAILABLE and self.config.enable_icm_correction:
+            try:
+                self.icm_manager = get_icm_manager()
+                self.camera_detector = get_camera_detector()
+            except Exception as e:
+                print(f"警告: ICM组件初始化失败: {str(e)}")
+                self.config.enable_icm_correction = False
+
+    def _detect_optimal_threads(self) -> int:
+        """检测最优线程数"""
+        cpu_count = _available_cpu_count()
+        memory_gb = psutil.virtual_memory().total / (1024**3)
+
+        # 基于CPU核心数和内存限制确定线程数
+        if self.config.max_threads:
+            return min(self.config.max_threads, cpu_count)
+
+        # 优先使用本机基准测试得出的线程数
+        learned = _load_thread_cache().get(_machine_key(), {}).get('last')
+        if learned:
+            return min(int(learned), cpu_count)
+
+        # RAW处理比较消耗内存，按每个进程约2GB限制并行数
+        return min(cpu_count, max(1, int(memory_gb / 2)))
+
+    def benchmark_thread_count(self, sample_files: List[str], goal_duration: float = 10.0) -> int:
+        """
+        基准测试最优并行数
+
+        用样本文件依次以 1, 2, 4, ... 个工作进程转换到临时目录，
+        取吞吐量(文件/秒)最高的并行数，结果按本机配置和样本像素数缓存。
+
+        Args:
+            sample_files: 样本RAW文件（建议来自同一相机）
+            goal_duration: 测试总时长上限(秒)，超出后不再尝试更大的并行数
+
+        Returns:
+            最优并行数
+        """
+        if not sample_files:
+            return self.max_threads
+
+        cpu_count = _available_cpu_count()
+        memory_gb = psutil.virtual_memory().total / (1024**3)
+        machine_key = _machine_key()
+        sample_key = f"{_sample_megapixels(sample_files[0])}MP"
+
+        cache = _load_thread_cache()
+        cached = cache.get(machine_key, {}).get(sample_key)
+        if cached:
+            self.max_threads = min(int(cached), cpu_count)
+            return self.max_threads
+
+        # 候选并行数：2的幂次直到CPU核心数，同时受内存限制
+        limit = min(cpu_count, max(1, int(memory_gb / 2)))
+        candidates = []
+        workers = 1
+        while workers < limit:
+            candidates.append(workers)
+            workers *= 2
+        candidates.append(limit)
+
+        best_workers, best_rate = 1, 0.0
+        benchmark_start = time.time()
+
+        try:
+            for workers in candidates:
+                # 每个进程至少分到两个文件
+                jobs = (sample_files * (workers * 2 // len(sample_files) + 1))[:max(len(sample_files), workers * 2)]
+
+                # 先启动全部工作进程并创建转换器，进程启动和模块导入时间不计入吞吐量
+                executor = _get_process_pool(workers)
+                concurrent.futures.wait([executor.submit(_warm_up_worker, self.config) for _ in range(workers)])
+
+                with tempfile.TemporaryDirectory(prefix='raw2jpeg_bench_') as temp_dir:
+                    file_pairs = [(path, os.path.join(temp_dir, f"{i}.jpg")) for i, path in enumerate(jobs)]
+                    self.is_converting = True
+                    start = time.time()
+                    # 直接使用结果迭代器，不触发进度/状态/结果回调
+                    completed = sum(1 for _, r in self._iter_results(file_pairs, workers)
+                                    if r.status == ConversionStatus.COMPLETED)
+                    elapsed = time.time() - start
+
+                rate = completed / elapsed if elapsed > 0 else 0.0
+                if rate > best_rate:
+                    best_workers, best_rate = workers, rate
+
+                if time.time() - benchmark_start > goal_duration:
+                    break
+        finally:
+            self.is_converting = False
+
+        if best_rate > 0:
+            entry = cache.setdefault(machine_key, {})
+            entry[sample_key] = best_workers
+            entry['last'] = best_workers
+            _save_thread_cache(cache)
+
+        self.max_threads = best_workers
+        return best_workers
+
+    def _detect_memory_limit(self) -> int:
+        """检测内存限制(MB)"""
+        total_memory = psutil.virtual_memory().total
+        available_memory = psutil.virtual_memory().available
+
+        # 使用70%的可用内存作为限制
+        return int(available_memory * 0.7 / (1024 * 1024))
+
+    def set_progress_callback(self, callback: Callable[[int, int], None]):
+        """设置进度回调函数"""
+        self.progress_callback = callback
+
+    def set_status_callback(self, callback: Callable[[str], None]):
+        """设置状态回调函数"""
+        self.status_callback = callback
+
+    def set_result_callback(self, callback: Callable[[int, ConversionResult], None]):
+        """设置单个文件结果回调函数，参数为文件在输入列表中的索引和转换结果"""
+        self.result_callback = callback
+
+    def scan_raw_files(self, input_path: str, recursive: bool = True) -> List[str]:
+        """扫描RAW文件"""
+        raw_files = []
+        pending_dirs = [input_path]
+
+        try:
+            while pending_dirs:
+                directory = pending_dirs.pop()
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive:
+                                    pending_dirs.append(entry.path)
+                                continue
+
+                            name = entry.name
+                            dot = name.rfind('.')
+                            if dot > 0 and name[dot:].lower() in _RAW_EXT and entry.is_file():
+                                raw_files.append(entry.path)
+                except OSError:
+                    # 与os.walk一致：跳过无法访问的子目录，但根目录错误需要报告
+                    if directory is input_path:
+                        raise
+
+        except Exception as e:
+            raise Exception(f"扫描文件失败: {str(e)}")
+
+        raw_files.sort()
+        return raw_files
+
+    def prepare_output_path(self, input_path: str, input_root: Optional[str], output_dir: str) -> str:
+        """
+        准备输出文件路径（不创建目录，由convert_batch统一创建）
+
+        Args:
+            input_path: 输入文件路径
+            input_root: 输入根目录，输出保持相对它的子目录结构；None时直接输出到output_dir
+            output_dir: 输出目录
+
+        Returns:
+            输出JPEG路径
+        """
+        # 保持相对路径结构
+        relative_path = os.path.relpath(input_path, input_root or os.path.dirname(input_path))
+        name_without_ext = os.path.splitext(relative_path)[0]
+
+        return os.path.join(output_dir, f"{name_without_ext}.jpg")
+
+    def convert_single_file(self, input_path: str, output_path: str) -> ConversionResult:
+        """转换单个文件"""
+        start_time = time.time()
+        try:
+            file_size_input = os.stat(input_path).st_size
+        except OSError:
+            file_size_input = 0
+
+        # 初始化结果变量
+        camera_brand = ""
+        camera_model = ""
+        icm_applied = False
+        icm_file = ""
+
+        try:
+            # 以独占方式创建输出文件，已存在则跳过（检查与创建为同一原子操作）
+            try:
+                output_file = open(output_path, 'xb')
+            except FileNotFoundError:
+                # 单独调用时输出目录可能尚未创建（批量转换会预先创建）
+                os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                output_file = open(output_path, 'xb')
+            except FileExistsError:
+                return ConversionResult(
+                    input_path=input_path,
+                    output_path=output_path,
+                    status=ConversionStatus.SKIPPED,
+                    start_time=start_time,
+                    end_time=time.time(),
+                    file_size_input=file_size_input,
+                    file_size_output=0,
+                    error_message="输出文件已存在"
+                )
+
+            try:
+                with output_file:
+                    # 相机检测
+                    if self.config.auto_detect_camera and self.camera_detector:
+                        camera_brand, camera_model = self.detect_camera_from_file(input_path)
+
+                    # 确定ICM文件
+                    if self.config.enable_icm_correction:
+                        icm_file = self.determine_icm_file(input_path, camera_brand, camera_model)
+
+                    # 执行转换
+                    self._convert_with_rawpy(input_path, output_file, camera_brand, camera_model)
+
+                    # 标记ICM应用状态
+                    icm_applied = self.config.enable_icm_correction and bool(icm_file)
+
+                    file_size_output = output_file.tell()
+            except BaseException:
+                # 删除未写完的输出文件，避免下次被当作已转换而跳过
+                try:
+                    os.remove(output_path)
+                except OSError:
+                    pass
+                raise
+
+            end_time = time.time()
+
+            return ConversionResult(
+                input_path=input_path,
+                output_path=output_path,
+                status=ConversionStatus.COMPLETED,
+                start_time=start_time,
+                end_time=end_time,
+                file_size_input=file_size_input,
+                file_size_output=file_size_output,
+                processing_time=end_time - start_time,
+                camera_brand=camera_brand,
+                camera_model=camera_model,
+                icm_applied=icm_applied,
+                icm_file=icm_file
+            )
+
+        except Exception as e:
+            end_time = time.time()
+            return ConversionResult(
+                input_path=input_path,
+                output_path=output_path,
+                status=ConversionStatus.FAILED,
+                start_time=start_time,
+                end_time=end_time,
+                file_size_input=file_size_input,
+                file_size_output=0,
+                error_message=str(e),
+                processing_time=end_time - start_time,
+                camera_brand=camera_brand,
+                camera_model=camera_model,
+                icm_applied=icm_applied,
+                icm_file=icm_file
+            )
+
+    def _convert_with_rawpy(self, input_path: str, output_file: BinaryIO,
+                        detected_brand: str = "", detected_model: str = ""):
+        """
+        使用rawpy进行转换
+
+        解码、缩放、校色和编码的逐像素工作都在C代码中完成并释放GIL
+        （LibRaw postprocess、PIL缩放、numpy/ImageCms校色、libjpeg编码）。
+        不要在这里加入逐像素的纯Python循环，否则多线程校色行带及
+        进程内的其他线程会被GIL串行化。
+        """
+        try:
+            with rawpy.imread(input_path) as raw:
+                # 优化的处理参数
+                rgb = raw.postprocess(**self._postprocess_kwargs_for(raw))
+
+            # 缩小到目标尺寸（在校色之前，校色只需处理缩小后的像素）
+            target = self.config.target_max_dimension
+            if target and max(rgb.shape[:2]) > target:
+                rgb = _downscale_rgb(rgb, target)
+
+            # 应用ICM校色
+            if self.config.enable_icm_correction:
+                rgb = self.apply_icm_correction(input_path, rgb, detected_brand, detected_model)
+
+            # 保存JPEG
+            self._write_jpeg(output_file, rgb)
+
+        except Exception as e:
+            # 重新抛出转换错误
+            raise Exception(f"RAW转换失败: {str(e)}")
+
+    def _postprocess_kwargs_for(self, raw) -> Dict:
+        """
+        根据目标输出尺寸选择rawpy处理参数
+
+        目标尺寸不超过原图一半时使用半尺寸解码（2x2像素合并，跳过去马赛克）
+        并关闭降噪等耗时步骤；不超过四分之一时再跳过自动亮度。
+        """
+        target = self.config.target_max_dimension
+        if not target:
+            return self._postprocess_kwargs
+
+        full_size = max(raw.sizes.width, raw.sizes.height)
+        if target > full_size // 2:
+            return self._postprocess_kwargs
+
+        kwargs = dict(
+            self._postprocess_kwargs,
+            half_size=True,
+            demosaic_algorithm=rawpy.DemosaicAlgorithm.LINEAR,
+            fbdd_noise_reduction=rawpy.FBDDNoiseReductionMode.Off,
+            dcb_iterations=0,
+        )
+        if target <= full_size // 4:
+            kwargs.update(output_bps=8, no_auto_bright=True)
+        return kwargs
+
+    def _write_jpeg(self, output_file: BinaryIO, rgb: numpy.ndarray):
+        """编码JPEG并写入已打开的输出文件，优先使用libjpeg-turbo（两种编码器编码期间均释放GIL）"""
+        # TurboJPEG不支持哈夫曼表优化，需要优化时使用PIL（libjpeg的optimize_coding）
+        encoder = None if self.config.jpeg_optimize else _get_turbojpeg()
+        if encoder is None:
+            # 连续数组可被PIL直接按行导入，不会再隐式复制
+            Image.fromarray(numpy.ascontiguousarray(rgb)).save(
+                output_file,
+                'JPEG',
+                quality=self.config.jpeg_quality,
+                optimize=self.config.jpeg_optimize,
+                progressive=self.config.jpeg_progressive,
+                subsampling=self.config.jpeg_subsampling
+            )
+            return
+
+        # TurboJPEG的色度抽样编号与PIL一致；渐进式编码本身即使用优化的哈夫曼表
+        # 高质量输出使用精确DCT，快速DCT的精度损失在高质量下会显现
+        if self.config.jpeg_quality >= ACCURATE_DCT_QUALITY:
+            flags = TJFLAG_ACCURATEDCT
+        else:
+            flags = TJFLAG_FASTDCT
+        if self.config.jpeg_progressive:
+            flags |= TJFLAG_PROGRESSIVE
+        jpeg_bytes = encoder.encode(
+            numpy.ascontiguousarray(rgb),
+            quality=self.config.jpeg_quality,
+            pixel_format=TJPF_RGB,
+            jpeg_subsample=self.config.jpeg_subsampling,
+            flags=flags
+        )
+        output_file.write(jpeg_bytes)
+
+    def convert_batch(self, input_files: List[str], output_dir: str,
+                     max_workers: Optional[int] = None,
+                     input_root: Optional[str] = None) -> List[ConversionResult]:
+        """
+        批量转换文件
+
+        Args:
+            input_files: 输入RAW文件列表
+            output_dir: 输出目录
+            max_workers: 工作进程数，None表示自动检测
+            input_root: 输入根目录，默认取所有输入文件所在目录的公共父目录
+
+        Returns:
+            转换结果列表，与输入文件一一对应；停止转换时未执行的文件为None
+        """
+        results = [None] * len(input_files)
+        for index, result in self.convert_batch_iter(input_files, output_dir, max_workers, input_root):
+            results[index] = result
+        return results
+
+    def convert_batch_iter(self, input_files: List[str], output_dir: str,
+                           max_workers: Optional[int] = None,
+                           input_root: Optional[str] = None) -> Iterator[Tuple[int, ConversionResult]]:
+        """
+        批量转换文件，按完成顺序逐个产出结果
+
+        参数同convert_batch。每个结果产出前先调用结果/进度/状态回调；
+        提前关闭生成器（或停止转换）会取消尚未开始的任务。
+
+        Yields:
+            (输入文件索引, 转换结果)
+        """
+        if not input_files:
+            return
+
+        if input_root is None:
+            try:
+                input_root = os.path.commonpath(
+                    [os.path.dirname(os.path.abspath(f)) for f in input_files])
+            except ValueError:
+                # 例如Windows下文件分布在不同盘符
+                input_root = None
+
+        self.is_converting = True
+        self.metrics = ConversionMetrics()
+        self.metrics.start_timing()
+
+        # 准备输出路径
+        file_pairs = []
+        for input_file in input_files:
+            output_path = self.prepare_output_path(input_file, input_root, output_dir)
+            file_pairs.append((input_file, output_path))
+
+        # 预先创建所有输出目录，每个目录只创建一次
+        for directory in {os.path.dirname(output_path) for _, output_path in file_pairs}:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        # 确定工作线程数
+        workers = max_workers or self.max_threads
+        total = len(file_pairs)
+
+        try:
+            with contextlib.closing(self._iter_results(file_pairs, workers)) as completed:
+                for completed_count, (index, result) in enumerate(completed, 1):
+                    self.metrics.add_result(result)
+                    self._report_result(index, result, completed_count, total)
+                    yield index, result
+
+        except Exception as e:
+            if self.status_callback:
+                self.status_callback(f"批量转换失败: {str(e)}")
+            raise
+        finally:
+            self.is_converting = False
+            self.metrics.end_timing()
+            self.metrics.calculate_metrics()
+
+    def _iter_results(self, file_pairs: List[Tuple[str, str]],
+                      max_workers: int) -> Iterator[Tuple[int, ConversionResult]]:
+        """
+        转换文件，按完成顺序产出 (索引, 结果)
+
+        单文件直接在当前进程转换。多文件使用两级流水线：IO线程池检查输出是否已存在，
+        进程池负责CPU密集的RAW解码、校色和JPEG编码。
+        在途任务数有上限，一个任务完成立即补充下一个，使进程池始终保持满载。
+        """
+        if len(file_pairs) == 1:
+            yield 0, self.convert_single_file(*file_pairs[0])
+            return
+
+        max_in_flight = max_workers * 2
+        # 进程池跨批次复用，避免每批重新启动工作进程并导入rawpy/numpy等模块
+        executor = _get_process_pool(max_workers)
+        future_to_index = {}
+
+        io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        try:
+            # IO阶段按顺序产出检查结果，已存在的输出不再送入进程池；
+            # 检查随转换进度按需提交，最多领先max_in_flight个文件
+            checked = self._iter_existing_checks(io_executor, file_pairs, max_in_flight)
+            exhausted = False
+
+            while self.is_converting:
+                # 补充任务直到在途任务数达到上限
+                while not exhausted and len(future_to_index) < max_in_flight:
+                    try:
+                        index, skipped = next(checked)
+                    except StopIteration:
+                        exhausted = True
+                        break
+
+                    if skipped is not None:
+                        yield index, skipped
+                        continue
+
+                    input_path, output_path = file_pairs[index]
+                    try:
+                        future = executor.submit(_convert_in_worker, self.config, input_path, output_path)
+                    except concurrent.futures.process.BrokenProcessPool:
+                        # 工作进程异常退出后进程池不可再用，丢弃后下一批重新创建
+                        _discard_process_pool(executor)
+                        raise
+                    future_to_index[future] = index
+
+                if not future_to_index:
+                    break
+
+                # 等待任一任务完成
+                done, _ = concurrent.futures.wait(
+                    future_to_index, return_when=concurrent.futures.FIRST_COMPLETED)
+                if not self.is_converting:
+                    # 等待期间已停止转换，不再产出结果
+                    return
+
+                for future in done:
+                    index = future_to_index.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if isinstance(e, concurrent.futures.process.BrokenProcessPool):
+                            _discard_process_pool(executor)
+                        # 创建失败结果
+                        input_path, output_path = file_pairs[index]
+                        result = ConversionResult(
+                            input_path=input_path,
+                            output_path=output_path,
+                            status=ConversionStatus.FAILED,
+                            start_time=time.time(),
+                            end_time=time.time(),
+                            file_size_input=0,
+                            file_size_output=0,
+                            error_message=str(e)
+                        )
+
+                    yield index, result
+        finally:
+            # 停止转换或提前结束时取消尚未开始的任务；进程池保留给下一批使用
+            for future in future_to_index:
+                future.cancel()
+            # 不等待已提交的输出检查（网络路径上可能较慢）
+            io_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _iter_existing_checks(self, io_executor: concurrent.futures.ThreadPoolExecutor,
+                              file_pairs: List[Tuple[str, str]],
+                              lookahead: int) -> Iterator[Tuple[int, Optional[ConversionResult]]]:
+        """按顺序产出 (索引, 输出检查结果)，最多提前提交lookahead个检查"""
+        pending = collections.deque()
+        for index, file_pair in enumerate(file_pairs):
+            pending.append((index, io_executor.submit(self._check_existing_output, file_pair)))
+            if len(pending) >= lookahead:
+                ready_index, future = pending.popleft()
+                yield ready_index, future.result()
+        while pending:
+            ready_index, future = pending.popleft()
+            yield ready_index, future.result()
+
+    def _check_existing_output(self, file_pair: Tuple[str, str]) -> Optional[ConversionResult]:
+        """IO阶段：输出文件已存在时返回跳过结果，否则返回None"""
+        input_path, output_path = file_pair
+        if not os.path.exists(output_path):
+            return None
+
+        now = time.time()
+        try:
+            file_size_input = os.stat(input_path).st_size
+        except OSError:
+            file_size_input = 0
+
+        return ConversionResult(
+            input_path=input_path,
+            output_path=output_path,
+            status=ConversionStatus.SKIPPED,
+            start_time=now,
+            end_time=now,
+            file_size_input=file_size_input,
+            file_size_output=0,
+            error_message="输出文件已存在"
+        )
+
+    def _report_result(self, index: int, result: ConversionResult, completed_count: int, total: int):
+        """更新进度和状态"""
+        if self.result_callback:
+            self.result_callback(index, result)
+
+        if self.progress_callback:
+            self.progress_callback(completed_count, total)
+
+        if self.status_callback:
+            filename = os.path.basename(result.input_path)
+            if result.status == ConversionStatus.COMPLETED:
+                self.status_callback(f"已完成: {filename}")
+            elif result.status == ConversionStatus.FAILED:
+                self.status_callback(f"失败: {filename} - {result.error_message}")
+            elif result.status == ConversionStatus.SKIPPED:
+                self.status_callback(f"跳过: {filename}")
+
+    def stop_conversion(self):
+        """停止转换"""
+        self.is_converting = False
+
+    def get_metrics(self) -> Dict:
+        """获取转换指标"""
+        return self.metrics.get_summary()
+
+    def estimate_conversion_time(self, files: List[str]) -> Tuple[float, float]:
+        """估算转换时间和内存需求"""
+        if not files:
+            return 0.0, 0.0
+
+        total_size = 0
+        sample_count = min(5, len(files))  # 采样5个文件
+
+        # 估算文件大小
+        for file_path in files[:sample_count]:
+            if os.path.exists(file_path):
+                total_size += os.path.getsize(file_path)
+
+        avg_size = total_size / sample_count if sample_count > 0 else 0
+        estimated_total_size = avg_size * len(files)
+
+        # 估算时间 (基于经验值: 约每MB需要0.5-2秒)
+        size_mb = estimated_total_size / (1024 * 1024)
+        estimated_time = size_mb * 1.0  # 1秒每MB的平均估算
+
+        # 估算内存需求 (考虑并行处理)
+        estimated_memory = (estimated_total_size * 3) / (1024 * 1024)  # 3倍文件大小作为缓存
+        estimated_memory = min(estimated_memory, self.memory_limit)
+
+        return estimated_time, estimated_memory
+
+    def validate_environment(self) -> Dict[str, bool]:
+        """验证转换环境"""
+        validation = {
+            'rawpy_available': False,
+            'imageio_available': False,
+            'memory_sufficient': False,
+            'disk_space_sufficient': False,
+            'icm_available': False,
+            'pil_cms_available': False,
+            'thread_count_tuned': False
+        }
+
+        try:
+            import rawpy
+            validation['rawpy_available'] = True
+        except ImportError:
+            pass
+
+        try:
+            import imageio
+            validation['imageio_available'] = True
+        except ImportError:
+            pass
+
+        # 检查PIL ImageCms
+        try:
+            from PIL import ImageCms
+            validation['pil_cms_available'] = True
+        except ImportError:
+            pass
+
+        validation['icm_available'] = ICM_AVAILABLE and self.icm_manager is not None
+
+        # 内存检查
+        memory_gb = psutil.virtual_memory().total / (1024**3)
+        validation['memory_sufficient'] = memory_gb >= 2  # 至少2GB内存
+
+        # 本机是否有线程数基准测试结果
+        validation['thread_count_tuned'] = bool(_load_thread_cache().get(_machine_key(), {}).get('last'))
+
+        # 磁盘空间检查 (临时目录)
+        try:
+            temp_usage = psutil.disk_usage('/tmp' if os.name != 'nt' else os.environ.get('TEMP', 'C:\\'))
+            validation['disk_space_sufficient'] = temp_usage.free > (1024**3)  # 至少1GB空闲
+        except:
+            pass
+
+        return validation
+
+    def detect_camera_from_file(self, raw_path: str) -> Tuple[str, str]:
+        """
+        从RAW文件检测相机品牌和型号
+
+        Args:
+            raw_path: RAW文件路径
+
+        Returns:
+            (品牌, 型号)
+        """
+        if not self.camera_detector:
+            return "", ""
+
+        # 修改时间和大小参与缓存键，文件被替换后不会命中旧结果
+        try:
+            st = os.stat(raw_path)
+        except OSError:
+            return self._detect_camera.__wrapped__(raw_path, 0, 0)
+
+        return self._detect_camera(raw_path, st.st_mtime_ns, st.st_size)
+
+    def _detect_camera(self, raw_path: str, mtime_ns: int, size: int) -> Tuple[str, str]:
+        """检测相机品牌和型号（按 路径, 修改时间, 大小 缓存）"""
+        try:
+            result = self.camera_detector.detect_camera_from_raw(raw_path)
+            return result if result else ("", "")
+        except Exception as e:
+            print(f"相机检测失败 {raw_path}: {str(e)}")
+            return "", ""
+
+    def determine_icm_file(self, raw_path: str, detected_brand: str = "", detected_model: str = "") -> Optional[str]:
+        """
+        确定要使用的ICM文件
+
+        Args:
+            raw_path: RAW文件路径
+            detected_brand: 已检测的品牌
+            detected_model: 已检测的型号
+
+        Returns:
+            ICM文件路径或None
+        """
+        if not self.icm_manager:
+            return None
+
+        # 使用配置中的品牌型号
+        brand = self.config.icm_brand or detected_brand
+        model = self.config.icm_model or detected_model
+
+        return self._lookup_icm_file(self.config.manual_icm_path, brand, model, self.config.icm_scene)
+
+    def _lookup_icm_file(self, manual_icm_path: Optional[str], brand: str,
+                         model: str, scene: str) -> Optional[str]:
+        """查找ICM文件（按 手动路径, 品牌, 型号, 场景 缓存）"""
+        # 手动指定的ICM文件优先
+        if manual_icm_path and os.path.exists(manual_icm_path):
+            return manual_icm_path
+
+        if not brand or not model:
+            return None
+
+        # 从ICM管理器获取文件
+        return self.icm_manager.get_icm_file(brand, model, scene)
+
+    def apply_icm_correction(self, input_path: str, rgb_array: numpy.ndarray,
+                           detected_brand: str = "", detected_model: str = "") -> numpy.ndarray:
+        """
+        应用ICM校色到RGB数组
+
+        Args:
+            input_path: 输入文件路径
+            rgb_array: RGB数组
+            detected_brand: 已检测的品牌
+            detected_model: 已检测的型号
+
+        Returns:
+            校色后的RGB数组
+
+        Raises:
+            Exception: 校色失败时抛出异常
+        """
+        if not self.config.enable_icm_correction:
+            return rgb_array
+
+        # 确定ICM文件
+        icm_path = self.determine_icm_file(input_path, detected_brand, detected_model)
+        if not icm_path:
+            error_msg = f"找不到ICM文件: {detected_brand} {detected_model} {self.config.icm_scene}"
+            if self.config.strict_icm:
+                raise Exception(error_msg)
+            else:
+                print(f"警告: {error_msg}，跳过校色")
+                return rgb_array
+
+        try:
+            if not self.icm_manager:
+                raise Exception("ICM管理器未初始化")
+
+            # 有numba时使用预计算的3D查找表原地校色（多核并行）
+            if NUMBA_AVAILABLE and rgb_array.dtype == numpy.uint8 and rgb_array.flags.c_contiguous \
+                    and rgb_array.flags.writeable and rgb_array.ndim == 3 and rgb_array.shape[2] == 3:
+                clut, index, frac = self._get_clut(icm_path)
+                _apply_clut_tetrahedral(rgb_array.reshape(-1, 3), clut, index, frac)
+                return rgb_array
+
+            # 按行带校色并写回原数组，PIL中间图像只占一个行带的内存，且能留在缓存中
+            if not (rgb_array.flags.c_contiguous and rgb_array.flags.writeable):
+                rgb_array = numpy.array(rgb_array)
+
+            pooled = rgb_array.dtype == numpy.uint8 and rgb_array.ndim == 3 and rgb_array.shape[2] == 3
+            for y0 in range(0, rgb_array.shape[0], ICM_BAND_ROWS):
+                band = rgb_array[y0:y0 + ICM_BAND_ROWS]
+                if pooled:
+                    band_image = self._get_band_image(band.shape[1], band.shape[0])
+                    band_image.frombytes(band.data)
+                else:
+                    band_image = Image.fromarray(band)
+
+                # 应用校色转换（同一ICM文件的转换只构建一次）
+                transform = self._get_cms_transform(icm_path, band_image.mode)
+                transform.apply_in_place(band_image)
+                band[...] = numpy.asarray(band_image)
+
+            return rgb_array
+
+        except Exception as e:
+            error_msg = f"ICM校色失败: {str(e)}"
+            if self.config.strict_icm:
+                raise Exception(error_msg)
+            else:
+                print(f"警告: {error_msg}，使用原始图像")
+                return rgb_array
+
+    def _get_band_image(self, width: int, rows: int) -> Image.Image:
+        """
+        获取当前线程可复用的RGB行带图像
+
+        同一相机的批量转换尺寸相同，每个线程通常只需整行带和末尾行带两张图像。
+
+        Args:
+            width: 图像宽度
+            rows: 行带行数
+
+        Returns:
+            RGB模式的PIL图像
+        """
+        band_images = getattr(self._scratch, 'band_images', None)
+        if band_images is None:
+            band_images = self._scratch.band_images = {}
+
+        band_image = band_images.get((width, rows))
+        if band_image is None:
+            # 尺寸频繁变化时不无限累积
+            if len(band_images) >= 8:
+                band_images.clear()
+            band_image = band_images[(width, rows)] = Image.new('RGB', (width, rows))
+
+        return band_image
+
+    def _get_cms_transform(self, icm_path: str, mode: str = 'RGB') -> ImageCms.ImageCmsTransform:
+        """
+        获取ICM文件到sRGB的校色转换，按 (ICM路径, 模式) 缓存
+
+        构建转换需要解析配置文件并预计算LittleCMS查找表，
+        同一相机的批量转换只需构建一次。
+
+        Args:
+            icm_path: ICM文件路径
+            mode: 图像模式（输入与输出相同，以便原地转换）
+
+        Returns:
+            校色转换对象
+        """
+        key = (icm_path, mode)
+        transform = self._cms_transforms.get(key)
+        if transform is not None:
+            return transform
+
+        with self._cms_lock:
+            transform = self._cms_transforms.get(key)
+            if transform is None:
+                icc_profile = self._get_icc_profile(icm_path)
+
+                # 使用sRGB配置文件作为输出配置
+                transform = ImageCms.buildTransform(
+                    icc_profile,
+                    self._srgb_profile,
+                    mode,
+                    mode,
+                    renderingIntent=ImageCms.Intent.PERCEPTUAL
+                )
+                self._cms_transforms[key] = transform
+
+        return transform
+
+    def _get_icc_profile(self, icm_path: str) -> ImageCms.ImageCmsProfile:
+        """
+        获取ICC配置文件，按ICM路径缓存
+
+        Args:
+            icm_path: ICM文件路径
+
+        Returns:
+            ICC Profile对象
+        """
+        icc_profile = self._icc_cache.get(icm_path)
+        if icc_profile is not None:
+            return icc_profile
+
+        with self._icc_lock:
+            icc_profile = self._icc_cache.get(icm_path)
+            if icc_profile is None:
+                icc_profile = self.icm_manager.load_icc_profile(icm_path)
+                if not icc_profile:
+                    raise Exception(f"加载ICM文件失败: {icm_path}")
+                self._icc_cache[icm_path] = icc_profile
+
+        return icc_profile
+
+    def _get_clut(self, icm_path: str) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        获取ICM文件到sRGB的3D查找表，按ICM路径缓存
+
+        Args:
+            icm_path: ICM文件路径
+
+        Returns:
+            (查找表, 节点索引表, 节点插值系数表)
+        """
+        clut = self._cluts.get(icm_path)
+        if clut is not None:
+            return clut
+
+        transform = self._get_cms_transform(icm_path, 'RGB')
+        with self._cms_lock:
+            clut = self._cluts.get(icm_path)
+            if clut is None:
+                clut = _build_clut(transform)
+                self._cluts[icm_path] = clut
+
+        return clut
+
+def _build_clut(transform: ImageCms.ImageCmsTransform,
+                grid_size: int = CLUT_GRID_SIZE) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    将校色转换烘焙为3D查找表
+
+    网格节点经一次LittleCMS转换得到输出采样，
+    另生成0-255每个取值对应的下方节点索引和插值系数。
+
+    Args:
+        transform: RGB到RGB的校色转换
+        grid_size: 每个通道的网格节点数
+
+    Returns:
+        (查找表 float32[N,N,N,3], 节点索引表 int32[256], 节点插值系数表 float32[256])
+    """
+    nodes = numpy.round(numpy.linspace(0, 255, grid_size)).astype(numpy.uint8)
+
+    # 按 (R, G, B) 顺序展开网格，作为单行图像送入转换
+    r, g, b = numpy.meshgrid(nodes, nodes, nodes, indexing='ij')
+    grid = numpy.stack((r, g, b), axis=-1).reshape(1, -1, 3)
+    sampled = numpy.asarray(transform.apply(Image.fromarray(grid)))
+    clut = sampled.reshape(grid_size, grid_size, grid_size, 3).astype(numpy.float32)
+
+    values = numpy.arange(256)
+    index = numpy.searchsorted(nodes, values, side='right') - 1
+    index = numpy.minimum(index, grid_size - 2).astype(numpy.int32)
+    lower = nodes[index].astype(numpy.float32)
+    upper = nodes[index + 1].astype(numpy.float32)
+    frac = ((values - lower) / (upper - lower)).astype(numpy.float32)
+
+    return clut, index, frac
+
+if NUMBA_AVAILABLE:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _apply_clut_tetrahedral(pixels, clut, index, frac):
+        """对 (N, 3) uint8像素原地进行四面体插值查表"""
+        for p in numba.prange(pixels.shape[0]):
+            r = pixels[p, 0]
+            g = pixels[p, 1]
+            b = pixels[p, 2]
+            ri = index[r]
+            gi = index[g]
+            bi = index[b]
+            fr = frac[r]
+            fg = frac[g]
+            fb = frac[b]
+
+            for c in range(3):
+                c000 = clut[ri, gi, bi, c]
+                c111 = clut[ri + 1, gi + 1, bi + 1, c]
+
+                # 按三个插值系数的大小关系选择六个四面体之一
+                if fr >= fg:
+                    if fg >= fb:
+                        c100 = clut[ri + 1, gi, bi, c]
+                        c110 = clut[ri + 1, gi + 1, bi, c]
+                        v = c000 + fr * (c100 - c000) + fg * (c110 - c100) + fb * (c111 - c110)
+                    elif fr >= fb:
+                        c100 = clut[ri + 1, gi, bi, c]
+                        c101 = clut[ri + 1, gi, bi + 1, c]
+                        v = c000 + fr * (c100 - c000) + fb * (c101 - c100) + fg * (c111 - c101)
+                    else:
+                        c001 = clut[ri, gi, bi + 1, c]
+                        c101 = clut[ri + 1, gi, bi + 1, c]
+                        v = c000 + fb * (c001 - c000) + fr * (c101 - c001) + fg * (c111 - c101)
+                else:
+                    if fb >= fg:
+                        c001 = clut[ri, gi, bi + 1, c]
+                        c011 = clut[ri, gi + 1, bi + 1, c]
+                        v = c000 + fb * (c001 - c000) + fg * (c011 - c001) + fr * (c111 - c011)
+                    elif fb >= fr:
+                        c010 = clut[ri, gi + 1, bi, c]
+                        c011 = clut[ri, gi + 1, bi + 1, c]
+                        v = c000 + fg * (c010 - c000) + fb * (c011 - c010) + fr * (c111 - c011)
+                    else:
+                        c010 = clut[ri, gi + 1, bi, c]
+                        c110 = clut[ri + 1, gi + 1, bi, c]
+                        v = c000 + fg * (c010 - c000) + fr * (c110 - c010) + fb * (c111 - c110)
+
+                pixels[p, c] = numpy.uint8(min(max(v + 0.5, 0.0), 255.0))
+
+# 每个线程各自的TurboJPEG实例（加载动态库并分配编码句柄，只做一次）
+_turbojpeg_local = threading.local()
+
+def _get_turbojpeg() -> Optional['TurboJPEG']:
+    """获取当前线程的TurboJPEG编码器，不可用时返回None"""
+    if not TURBOJPEG_AVAILABLE:
+        return None
+
+    encoder = getattr(_turbojpeg_local, 'encoder', None)
+    if encoder is None:
+        try:
+            encoder = TurboJPEG()
+        except Exception as e:
+            # 已安装PyTurboJPEG但找不到libturbojpeg动态库
+            print(f"警告: TurboJPEG初始化失败，使用PIL编码: {str(e)}")
+            encoder = False
+        _turbojpeg_local.encoder = encoder
+
+    return encoder or None
+
+def _machine_key() -> str:
+    """本机配置标识 (CPU型号|可用核心数|内存GB)，用作线程数缓存键；CPU亲和性/容器限制变化时随之变化"""
+    cpu_model = platform.processor() or platform.machine()
+    memory_gb = round(psutil.virtual_memory().total / (1024**3))
+    return f"{cpu_model}|{_available_cpu_count()}|{memory_gb}GB"
+
+def _downscale_rgb(rgb: numpy.ndarray, target: int) -> numpy.ndarray:
+    """按比例缩小RGB数组使长边不超过target（LANCZOS），保持原数据类型"""
+    if rgb.dtype == numpy.uint8:
+        image = Image.fromarray(rgb)
+        image.thumbnail((target, target), Image.Resampling.LANCZOS)
+        return numpy.array(image)
+
+    # PIL不支持16位RGB图像，逐通道以32位浮点模式缩放
+    height, width = rgb.shape[:2]
+    scale = target / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    channels = [
+        numpy.asarray(Image.fromarray(rgb[:, :, c].astype(numpy.float32), 'F')
+                      .resize(size, Image.Resampling.LANCZOS))
+        for c in range(rgb.shape[2])
+    ]
+    info = numpy.iinfo(rgb.dtype)
+    return numpy.clip(numpy.rint(numpy.dstack(channels)), info.min, info.max).astype(rgb.dtype)
+
+def _available_cpu_count() -> int:
+    """当前进程可用的CPU核心数，遵循CPU亲和性/容器限制"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def _sample_megapixels(raw_path: str) -> int:
+    """读取样本RAW的像素数(百万)，失败返回0"""
+    try:
+        with rawpy.imread(raw_path) as raw:
+            return round(raw.sizes.width * raw.sizes.height / 1e6)
+    except Exception:
+        return 0
+
+def _load_thread_cache() -> Dict:
+    """读取线程数基准测试缓存"""
+    try:
+        with open(THREAD_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_thread_cache(cache: Dict):
+    """保存线程数基准测试缓存"""
+    # 多个进程可能同时保存，先写临时文件再原子替换，避免留下截断或交错的内容
+    cache_dir = os.path.dirname(THREAD_CACHE_PATH)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir,
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, THREAD_CACHE_PATH)
+    except OSError as e:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        print(f"警告: 保存线程数缓存失败: {str(e)}")
+
+# 跨批次复用的转换进程池 (进程数, 执行器)
+_process_pool: Optional[Tuple[int, concurrent.futures.ProcessPoolExecutor]] = None
+_process_pool_lock = threading.Lock()
+
+def _get_process_pool(max_workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """获取共享进程池，进程数变化时重新创建"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            if _process_pool[0] == max_workers:
+                return _process_pool[1]
+            _process_pool[1].shutdown(wait=False, cancel_futures=True)
+
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_lower_worker_priority
+        )
+        _process_pool = (max_workers, executor)
+        return executor
+
+def _lower_worker_priority():
+    """降低工作进程优先级，批量转换占满CPU时界面和系统仍能及时响应"""
+    try:
+        if os.name == 'nt':
+            psutil.Process().nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            os.nice(5)
+    except (OSError, psutil.Error):
+        pass
+
+def _discard_process_pool(executor: concurrent.futures.ProcessPoolExecutor):
+    """丢弃已损坏的共享进程池"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None and _process_pool[1] is executor:
+            _process_pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_process_pool():
+    """关闭共享进程池（程序退出时调用）"""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool[1].shutdown(wait=False, cancel_futures=True)
+
+# 工作进程中的转换器实例及其创建时的配置；配置不变时在多个文件和批次间复用，
+# 使校色转换等缓存得以保留
+_worker_converter: Optional[EnhancedRAWConverter] = None
+_worker_config: Optional[ConversionConfig] = None
+
+def _get_worker_converter(config: ConversionConfig) -> EnhancedRAWConverter:
+    """获取工作进程中与配置对应的转换器，配置变化时重新创建"""
+    global _worker_converter, _worker_config
+    if _worker_converter is None or _worker_config != config:
+        # 转换器可能修改自身配置（如ICM初始化失败时关闭校色），使用副本以便与后续任务的配置比较
+        _worker_converter = EnhancedRAWConverter(dataclasses.replace(config))
+        _worker_config = config
+    return _worker_converter
+
+def _convert_in_worker(config: ConversionConfig, input_path: str, output_path: str) -> ConversionResult:
+    """在工作进程中转换单个文件"""
+    return _get_worker_converter(config).convert_single_file(input_path, output_path)
+
+def _warm_up_worker(config: ConversionConfig):
+    """预热工作进程：启动进程、导入模块并创建转换器，不转换文件"""
+    _get_worker_converter(config)
+
+# 便利函数
+def create_default_converter() -> EnhancedRAWConverter:
+    """创建默认配置的转换器"""
+    config = ConversionConfig(
+        jpeg_quality=95,
+        use_camera_wb=True,
+        output_bps=8,
+        exp_preserve_highlights=True,
+        max_threads=None,  # 自动检测
+        enable_icm_correction=True,  # 启用ICM校色
+        auto_detect_camera=True,     # 自动检测相机
+        strict_icm=True             # 严格模式
+    )
+    return EnhancedRAWConverter(config)
+
+def create_fast_converter(target_max_dimension: Optional[int] = None) -> EnhancedRAWConverter:
+    """
+    创建快速转换配置
+
+    Args:
+        target_max_dimension: 输出长边上限(像素)。用于预览/缩略图时指定，
+            不超过原图一半时解码使用LibRaw的半尺寸快速路径，再用LANCZOS缩小到该尺寸
+    """
+    config = ConversionConfig(
+        jpeg_quality=85,  # 较低质量但更快
+        use_camera_wb=False,  # 跳过白平衡计算
+        use_auto_wb=True,  # 使用自动白平衡
+        output_bps=8,
+        half_size=True,  # 半尺寸输出
+        no_auto_bright=True,  # 跳过自动亮度调整
+        exp_preserve_highlights=False,
+        max_threads=None,  # 自动检测（有基准测试结果时使用测试值）
+        target_max_dimension=target_max_dimension,
+        enable_icm_correction=False,  # 快速模式禁用ICM
+        auto_detect_camera=False
+    )
+    return EnhancedRAWConverter(config)
+
+def create_high_quality_converter() -> EnhancedRAWConverter:
+    """创建高质量转换配置"""
+    config = ConversionConfig(
+        jpeg_quality=98,
+        jpeg_optimize=True,   # 高质量模式不在意多一遍编码
+        jpeg_subsampling=0,   # 4:4:4 保留完整色度
+        use_camera_wb=True,
+        use_auto_wb=False,
+        output_bps=8,
+        bright=1.0,
+        no_auto_bright=False,
+        half_size=False,  # 全分辨率
+        exp_preserve_highlights=True,
+        max_threads=1,  # 单线程确保质量
+        enable_icm_correction=True,  # 高质量模式启用ICM
+        auto_detect_camera=True,
+        strict_icm=True,            # 严格模式确保质量
+        icm_scene="ProStandard"     # 使用专业标准场景
+    )
+    return EnhancedRAWConverter(config)
+
+def create_icm_converter(brand: str = "", model: str = "", scene: str = "Generic") -> EnhancedRAWConverter:
+    """创建指定ICM配置的转换器"""
+    config = ConversionConfig(
+        jpeg_quality=95,
+        use_camera_wb=True,
+        output_bps=8,
+        exp_preserve_highlights=True,
+        max_threads=None,
+        enable_icm_correction=True,
+        auto_detect_camera=True,
+        strict_icm=True,
+        icm_brand=brand,
+        icm_model=model,
+        icm_scene=scene
+    )
     return EnhancedRAWConverter(config)
\ No newline at end of file
@@ -1,442 +1,631 @@
-#!/usr/bin/env python3
-"""
-ICM文件管理系统
-管理相机校色文件，提供品牌-型号-场景三级选择结构
-"""
-
-import os
-import sys
-import re
-from typing import Dict, List, Optional, Tuple
-from PIL import ImageCms
-import threading
-import time
-
-
-class ICMManager:
-    """ICM文件管理器"""
-
-    def __init__(self, icm_directory: str = "DSLR"):
-        """
-        初始化ICM管理器
-
-        Args:
-            icm_directory: ICM文件目录路径
-        """
-        self.icm_directory = self._get_icm_directory(icm_directory)
-        self.icm_cache = {}  # 文件名 -> ICC Profile缓存
-        self.brand_model_scene_map = {}  # 品牌 -> 型号 -> 场景 -> ICM文件
-        self.brands = []  # 可用品牌列表
-        self.models = {}  # 品牌 -> 型号列表
-        self.scenes = {}  # (品牌, 型号) -> 场景列表
-        self._lock = threading.Lock()
-        self._scanned = False
-
-        # 预定义场景列表
-        self.all_scenes = [
-            "Generic", "Flat", "Landscape", "Monochrome",
-            "Neutral", "Portrait", "Standard", "Vivid",
-            "ProStandard", "Apple", "Daylight", "Flash",
-            "Sunset", "Tungsten"
-        ]
-
-        # 如果目录存在，立即扫描
-        if os.path.exists(self.icm_directory):
-            self.refresh_icm_database()
-
-    def _get_icm_directory(self, default_dir: str) -> str:
-        """
-        获取ICM文件目录路径，支持打包后的环境
-
-        Args:
-            default_dir: 默认目录名
-
-        Returns:
-            ICM文件目录的实际路径
-        """
-        # 首先检查是否在打包环境中运行
-        if hasattr(sys, '_MEIPASS'):
-            # PyInstaller打包环境
-            base_path = sys._MEIPASS
-            icm_path = os.path.join(base_path, default_dir)
-            if os.path.exists(icm_path):
-                return icm_path
-
-        # 检查当前目录
-        if os.path.exists(default_dir):
-            return default_dir
-
-        # 检查脚本所在目录
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        icm_path = os.path.join(script_dir, default_dir)
-        if os.path.exists(icm_path):
-            return icm_path
-
-        # 检查工作目录
-        current_dir = os.getcwd()
-        icm_path = os.path.join(current_dir, default_dir)
-        if os.path.exists(icm_path):
-            return icm_path
-
-        # 最后返回默认路径，即使不存在
-        return default_dir
-
-    def _parse_icm_filename(self, filename: str) -> Optional[Tuple[str, str, str]]:
-        """
-        解析ICM文件名，提取品牌、型号、场景信息
-
-        Args:
-            filename: ICM文件名 (如 "CanonEOSR5-Generic.icm")
-
-        Returns:
-            (品牌, 型号, 场景) 或 None
-        """
-        # 移除.icm扩展名
-        basename = os.path.splitext(filename)[0]
-
-        # 匹配模式：品牌型号-场景
-        # 常见品牌模式
-        brand_patterns = [
-            r'^(Canon)(.+?)-(.+?)$',  # Canon模式
-            r'^(Nikon)(.+?)-(.+?)$',  # Nikon模式
-            r'^(Sony)(.+?)-(.+?)$',   # Sony模式
-            r'^(Fujifilm)(.+?)-(.+?)$', # Fujifilm模式
-            r'^(Olympus)(.+?)-(.+?)$', # Olympus模式
-            r'^(Panasonic)(.+?)-(.+?)$', # Panasonic模式
-            r'^(Leica)(.+?)-(.+?)$',   # Leica模式
-            r'^(Pentax)(.+?)-(.+?)$',  # Pentax模式
-            r'^(Samsung)(.+?)-(.+?)$', # Samsung模式
-            r'^(Apple)(.+?)-(.+?)$',   # Apple模式
-        ]
-
-        for pattern in brand_patterns:
-            match = re.match(pattern, basename, re.IGNORECASE)
-            if match:
-                brand, model, scene = match.groups()
-                # 标准化品牌名
-                brand = brand.title()
-                # 清理型号名
-                model = self._clean_model_name(model)
-                # 标准化场景名
-                scene = self._clean_scene_name(scene)
-                return brand, model, scene
-
-        # 特殊处理：文件系统相关的配置文件
-        if basename.startswith('FileSystem'):
-            return 'FileSystem', basename.replace('FileSystem', ''), 'neutral'
-
-        return None
-
-    def _clean_model_name(self, model: str) -> str:
-        """清理型号名称"""
-        # 移除多余的空格和特殊字符
-        model = re.sub(r'\s+', '', model)
-        model = re.sub(r'[-_]+', ' ', model)
-        return model.strip()
-
-    def _clean_scene_name(self, scene: str) -> str:
-        """清理场景名称"""
-        # 移除版本信息
-        scene = re.sub(r'\s+V\d+$', '', scene)
-        # 标准化场景名称
-        scene_mapping = {
-            'neutral': 'Neutral',
-            'standard': 'Standard',
-            'vivid': 'Vivid',
-            'portrait': 'Portrait',
-            'landscape': 'Landscape',
-            'monochrome': 'Monochrome',
-            'flat': 'Flat',
-            'generic': 'Generic',
-            'prostandard': 'ProStandard',
-            'apple': 'Apple',
-            'daylight': 'Daylight',
-            'flash': 'Flash',
-            'sunset': 'Sunset',
-            'tungsten': 'Tungsten'
-        }
-
-        scene_lower = scene.lower().strip()
-        return scene_mapping.get(scene_lower, scene.title())
-
-    def scan_icm_files(self) -> Dict[str, Dict[str, List[str]]]:
-        """
-        扫描ICM文件并建立品牌-型号-场景映射
-
-        Returns:
-            品牌字典结构
-        """
-        print(f"正在扫描ICM文件目录: {self.icm_directory}")
-
-        if not os.path.exists(self.icm_directory):
-            print(f"警告: ICM目录不存在: {self.icm_directory}")
-            return {}
-
-        with self._lock:
-            # 清空现有数据
-            self.brand_model_scene_map.clear()
-            self.brands.clear()
-            self.models.clear()
-            self.scenes.clear()
-            self.icm_cache.clear()
-
-            scanned_count = 0
-
-            # 扫描目录中的所有.icm文件
-            for filename in os.listdir(self.icm_directory):
-                if filename.lower().endswith('.icm'):
-                    parsed = self._parse_icm_filename(filename)
-                    if parsed:
-                        brand, model, scene = parsed
-
-                        # 添加到品牌-型号-场景映射
-                        if brand not in self.brand_model_scene_map:
-                            self.brand_model_scene_map[brand] = {}
-                        if model not in self.brand_model_scene_map[brand]:
-                            self.brand_model_scene_map[brand][model] = []
-
-                        # 避免重复场景
-                        if scene not in self.brand_model_scene_map[brand][model]:
-                            self.brand_model_scene_map[brand][model].append(scene)
-
-                        scanned_count += 1
-
-            # 构建快速查找列表
-            self.brands = sorted(self.brand_model_scene_map.keys())
-
-            for brand, models_dict in self.brand_model_scene_map.items():
-                self.models[brand] = sorted(models_dict.keys())
-                for model, scenes_list in models_dict.items():
-                    key = (brand, model)
-                    if key not in self.scenes:
-                        self.scenes[key] = []
-                    # 合并场景列表并去重
-                    for scene in scenes_list:
-                        if scene not in self.scenes[key]:
-                            self.scenes[key].append(scene)
-                    self.scenes[key] = sorted(self.scenes[key])
-
-            self._scanned = True
-            print(f"ICM文件扫描完成，共处理 {scanned_count} 个文件")
-            print(f"发现品牌: {len(self.brands)}, 型号: {sum(len(models) for models in self.models.values())}")
-
-            return self.brand_model_scene_map
-
-    def get_available_brands(self) -> List[str]:
-        """
-        获取所有可用品牌列表
-
-        Returns:
-            品牌列表
-        """
-        if not self._scanned:
-            self.scan_icm_files()
-        return self.brands.copy()
-
-    def get_available_models(self, brand: str) -> List[str]:
-        """
-        获取指定品牌的型号列表
-
-        Args:
-            brand: 相机品牌
-
-        Returns:
-            型号列表
-        """
-        if not self._scanned:
-            self.scan_icm_files()
-        return self.models.get(brand, []).copy()
-
-    def get_available_scenes(self, brand: str, model: str) -> List[str]:
-        """
-        获取指定品牌型号的可用场景列表
-
-        Args:
-            brand: 相机品牌
-            model: 相机型号
-
-        Returns:
-            场景列表
-        """
-        if not self._scanned:
-            self.scan_icm_files()
-        key = (brand, model)
-        return self.scenes.get(key, []).copy()
-
-    def get_icm_file(self, brand: str, model: str, scene: str) -> Optional[str]:
-        """
-        获取指定的ICM文件路径
-
-        Args:
-            brand: 相机品牌
-            model: 相机型号
-            scene: 校色场景
-
-        Returns:
-            ICM文件完整路径，如果不存在返回None
-        """
-        if not self._scanned:
-            self.scan_icm_files()
-
-        if brand not in self.brand_model_scene_map:
-            return None
-        if model not in self.brand_model_scene_map[brand]:
-            return None
-        if scene not in self.brand_model_scene_map[brand][model]:
-            return None
-
-        # 构建文件名
-        # 特殊处理FileSystem
-        if brand == 'FileSystem':
-            filename = f"FileSystem{model}-{scene}.icm"
-        else:
-            # 去掉型号中的空格，匹配文件名格式
-            clean_model = model.replace(' ', '')
-            filename = f"{brand}{clean_model}-{scene}.icm"
-
-        icm_path = os.path.join(self.icm_directory, filename)
-        if os.path.exists(icm_path):
-            return icm_path
-
-        # 尝试一些常见的变体
-        variants = [
-            f"{brand}{model}-{scene}.icm",  # 保留空格
-            f"{brand}{model.lower()}-{scene}.icm",  # 小写型号
-            f"{brand}{clean_model}-{scene}.icm",  # 无空格
-        ]
-
-        for variant in variants:
-            test_path = os.path.join(self.icm_directory, variant)
-            if os.path.exists(test_path):
-                return test_path
-
-        # 如果是在打包环境中，尝试在所有可能的路径中查找
-        if hasattr(sys, '_MEIPASS'):
-            base_path = sys._MEIPASS
-            for variant in [filename] + variants:
-                test_path = os.path.join(base_path, "DSLR", variant)
-                if os.path.exists(test_path):
-                    return test_path
-
-        return None
-
-    def load_icc_profile(self, icm_path: str) -> Optional[ImageCms.ImageCmsProfile]:
-        """
-        加载ICC配置文件
-
-        Args:
-            icm_path: ICM文件路径
-
-        Returns:
-            ICC Profile对象，失败返回None
-        """
-        if not os.path.exists(icm_path):
-            return None
-
-        # 检查缓存
-        if icm_path in self.icm_cache:
-            return self.icm_cache[icm_path]
-
-        try:
-            profile = ImageCms.ImageCmsProfile(icm_path)
-
-            # 缓存配置文件（限制缓存大小）
-            with self._lock:
-                if len(self.icm_cache) > 100:  # 限制缓存数量
-                    # 移除最旧的缓存项
-                    oldest_key = next(iter(self.icm_cache))
-                    del self.icm_cache[oldest_key]
-
-                self.icm_cache[icm_path] = profile
-
-            return profile
-        except Exception as e:
-            print(f"警告: 加载ICM文件失败 {icm_path}: {str(e)}")
-            return None
-
-    def refresh_icm_database(self):
-        """刷新ICM文件数据库"""
-        print("正在刷新ICM文件数据库...")
-        self.scan_icm_files()
-
-    def get_statistics(self) -> Dict[str, int]:
-        """
-        获取ICM文件统计信息
-
-        Returns:
-            统计信息字典
-        """
-        if not self._scanned:
-            self.scan_icm_files()
-
-        total_models = sum(len(models) for models in self.models.values())
-        total_scenes = sum(len(scenes) for scenes in self.scenes.values())
-
-        return {
-            'brands': len(self.brands),
-            'models': total_models,
-            'scenes': total_scenes,
-            'icm_files': sum(
-                len(scenes)
-                for brand_dict in self.brand_model_scene_map.values()
-                for scenes in brand_dict.values()
-            )
-        }
-
-
-# 全局ICM管理器实例
-_icm_manager = None
-
-def get_icm_manager() -> ICMManager:
-    """获取全局ICM管理器实例"""
-    global _icm_manager
-    if _icm_manager is None:
-        _icm_manager = ICMManager()
-    return _icm_manager
-
-
-if __name__ == "__main__":
-    # 测试代码
-    manager = ICMManager()
-
-    print("=== ICM文件管理器测试 ===")
-
-    # 显示统计信息
-    stats = manager.get_statistics()
-    print(f"统计信息: {stats}")
-
-    # 显示品牌列表
-    brands = manager.get_available_brands()
-    print(f"可用品牌 ({len(brands)}): {brands[:10]}...")  # 显示前10个
-
-    # 显示每个品牌的型号数量
-    for brand in brands[:5]:  # 前5个品牌
-        models = manager.get_available_models(brand)
-        print(f"{brand}: {len(models)} 个型号")
-        if models:
-            print(f"  示例型号: {models[:3]}")  # 显示前3个型号
-
-            # 显示第一个型号的场景
-            scenes = manager.get_available_scenes(brand, models[0])
-            print(f"  {models[0]} 场景: {scenes}")
-
-    # 测试文件查找
-    test_brand = "Canon"
-    if test_brand in brands:
-        models = manager.get_available_models(test_brand)
-        if models:
-            test_model = models[0]
-            scenes = manager.get_available_scenes(test_brand, test_model)
-            if scenes:
-                test_scene = scenes[0]
-                icm_path = manager.get_icm_file(test_brand, test_model, test_scene)
-                print(f"\n测试查找: {test_brand} {test_model} {test_scene}")
-                print(f"ICM文件路径: {icm_path}")
-
-                # 测试加载ICC配置
-                if icm_path:
-                    profile = manager.load_icc_profile(icm_path)
-                    if profile:
-                        print(f"ICC配置加载成功: {os.path.basename(icm_path)}")
-                    else:
+#!/usr/bin/env python3
+"""
+ICM文件管理系统
+管理相机校色文件，提供品牌-型号-场景三级选择结构
+"""
+
+import os
+import io
+import sys
+import json
+import tempfile
+import functools
+from collections import OrderedDict, defaultdict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+from PIL import ImageCms
+import threading
+
+
+# PyInstaller打包环境的资源解压目录，非打包环境为None
+_MEIPASS = getattr(sys, '_MEIPASS', None)
+
+# 文件名品牌前缀（小写 -> 标准名，已驻留），按长度降序匹配
+_BRAND_PREFIX = {
+    b.lower(): sys.intern(b.title()) for b in (
+        'Canon', 'Nikon', 'Sony', 'Fujifilm', 'Olympus',
+        'Panasonic', 'Leica', 'Pentax', 'Samsung', 'Apple'
+    )
+}
+_BRAND_PREFIX_ITEMS = sorted(_BRAND_PREFIX.items(), key=lambda item: len(item[0]), reverse=True)
+
+# 场景名称标准化映射
+_SCENE_MAPPING = {
+    'neutral': 'Neutral',
+    'standard': 'Standard',
+    'vivid': 'Vivid',
+    'portrait': 'Portrait',
+    'landscape': 'Landscape',
+    'monochrome': 'Monochrome',
+    'flat': 'Flat',
+    'generic': 'Generic',
+    'prostandard': 'ProStandard',
+    'apple': 'Apple',
+    'daylight': 'Daylight',
+    'flash': 'Flash',
+    'sunset': 'Sunset',
+    'tungsten': 'Tungsten'
+}
+
+# 预定义场景列表
+_ALL_SCENES = (
+    "Generic", "Flat", "Landscape", "Monochrome",
+    "Neutral", "Portrait", "Standard", "Vivid",
+    "ProStandard", "Apple", "Daylight", "Flash",
+    "Sunset", "Tungsten"
+)
+# 已是标准形式的场景名，清理时直接返回
+_CANONICAL_SCENES = frozenset(_ALL_SCENES)
+
+# 解析结果缓存文件：ICM目录绝对路径 -> {目录修改时间, 品牌-型号-场景映射}
+_ICM_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'raw2jpeg', 'icm_index.json')
+# 文件名解析规则变化时递增，使旧缓存失效
+_ICM_INDEX_VERSION = 2
+
+# 图形界面进程扫描后预读ICM文件字节的内存上限（转换工作进程不预读）
+_PRELOAD_BUDGET = 64 * 1024 * 1024
+
+
+def _load_icm_index(directory: str, mtime_ns: int) -> Optional[Dict]:
+    """读取目录修改时间一致的缓存条目 {'map': 映射, 'files': [[品牌, 型号, 场景, 文件名], ...]}，没有或已过期返回None"""
+    try:
+        with open(_ICM_INDEX_PATH, 'r', encoding='utf-8') as f:
+            entry = json.load(f).get(directory)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+    if not isinstance(entry, dict) or entry.get('mtime_ns') != mtime_ns \
+            or entry.get('version') != _ICM_INDEX_VERSION:
+        return None
+    return entry
+
+
+def _save_icm_index(directory: str, mtime_ns: int, mapping: Dict[str, Dict[str, List[str]]],
+                    files: List[List[str]]):
+    """保存映射和文件名到缓存文件，失败时忽略"""
+    try:
+        with open(_ICM_INDEX_PATH, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if not isinstance(index, dict):
+            index = {}
+    except (OSError, ValueError):
+        index = {}
+
+    index[directory] = {'version': _ICM_INDEX_VERSION, 'mtime_ns': mtime_ns, 'map': mapping, 'files': files}
+    # 图形界面和各转换进程都可能写入，先写临时文件再原子替换，避免留下截断或交错的内容
+    cache_dir = os.path.dirname(_ICM_INDEX_PATH)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir,
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, _ICM_INDEX_PATH)
+    except OSError:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class ICMManager:
+    """ICM文件管理器"""
+
+    all_scenes = _ALL_SCENES
+
+    def __init__(self, icm_directory: str = "DSLR", preload_budget: int = 0):
+        """
+        初始化ICM管理器
+
+        Args:
+            icm_directory: ICM文件目录路径
+            preload_budget: 扫描后预读ICM文件字节的内存上限（字节），0表示不预读
+        """
+        self.icm_directory = self._get_icm_directory(icm_directory)
+        self.icm_cache = OrderedDict()  # 文件名 -> (ICC Profile, 文件字节) 缓存（LRU顺序）
+        self._map = {}  # 品牌 -> 型号 -> 排序后的场景元组（唯一数据源，品牌/型号元组由它派生）
+        self._path_index = {}  # (品牌, 型号, 场景) -> ICM文件路径
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}  # 正在加载的ICM路径 -> 完成事件
+        self._blob_cache: Dict[str, bytes] = {}  # ICM路径 -> 预读的文件字节
+        self._preload_budget = preload_budget
+        self._ready = threading.Event()  # 首次扫描完成后置位
+        self._stats = {'brands': 0, 'models': 0, 'scenes': 0, 'icm_files': 0}  # 扫描时统计
+        self._last_mtime = None  # 上次扫描时ICM目录的修改时间
+
+        # 不在构造时扫描，首次查询时再扫描
+
+    def _get_icm_directory(self, default_dir: str) -> str:
+        """
+        获取ICM文件目录路径，支持打包后的环境
+
+        Args:
+            default_dir: 默认目录名
+
+        Returns:
+            ICM文件目录的实际路径
+        """
+        # 首先检查是否在打包环境中运行
+        if _MEIPASS:
+            # PyInstaller打包环境
+            icm_path = os.path.join(_MEIPASS, default_dir)
+            if os.path.exists(icm_path):
+                return icm_path
+
+        # 检查当前目录
+        if os.path.exists(default_dir):
+            return default_dir
+
+        # 检查脚本所在目录
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        icm_path = os.path.join(script_dir, default_dir)
+        if os.path.exists(icm_path):
+            return icm_path
+
+        # 检查工作目录
+        current_dir = os.getcwd()
+        icm_path = os.path.join(current_dir, default_dir)
+        if os.path.exists(icm_path):
+            return icm_path
+
+        # 最后返回默认路径，即使不存在
+        return default_dir
+
+    @staticmethod
+    def _parse_icm_filename(filename: str) -> Optional[Tuple[str, str, str]]:
+        """
+        解析ICM文件名，提取品牌、型号、场景信息
+
+        Args:
+            filename: ICM文件名 (如 "CanonEOSR5-Generic.icm")
+
+        Returns:
+            (品牌, 型号, 场景) 或 None
+        """
+        # 移除.icm扩展名
+        basename = os.path.splitext(filename)[0]
+
+        # 匹配模式：品牌型号-场景
+        # 型号至少一个字符，到其后第一个'-'为止；场景为其余部分且不能为空
+        basename_lower = basename.lower()
+        for prefix, brand in _BRAND_PREFIX_ITEMS:
+            if basename_lower.startswith(prefix):
+                rest = basename[len(prefix):]
+                dash = rest.find('-', 1)
+                if dash != -1 and dash < len(rest) - 1:
+                    # 清理型号名
+                    model = ICMManager._clean_model_name(rest[:dash])
+                    # 标准化场景名
+                    scene = ICMManager._clean_scene_name(rest[dash + 1:])
+                    return brand, model, scene
+                break
+
+        # 特殊处理：文件系统相关的配置文件
+        if basename.startswith('FileSystem'):
+            return 'FileSystem', basename.replace('FileSystem', ''), 'neutral'
+
+        return None
+
+    @staticmethod
+    def _clean_model_name(model: str) -> str:
+        """清理型号名称"""
+        # 移除所有空白，连续的'-'/'_'合并为一个空格
+        model = ''.join(model.split())
+        return ' '.join(part for part in model.replace('_', '-').split('-') if part)
+
+    @staticmethod
+    def _clean_scene_name(scene: str) -> str:
+        """清理场景名称"""
+        # 绝大多数文件名中的场景已是标准形式
+        if scene in _CANONICAL_SCENES:
+            return scene
+
+        # 移除末尾的版本信息（空白 + V + 数字，如 " V2"）
+        end = len(scene)
+        while end > 0 and scene[end - 1].isdecimal():
+            end -= 1
+        if 1 < end < len(scene) and scene[end - 1] == 'V' and scene[end - 2].isspace():
+            start = end - 2
+            while start > 0 and scene[start - 1].isspace():
+                start -= 1
+            scene = scene[:start]
+
+        # 标准化场景名称
+        scene_lower = scene.lower().strip()
+        return sys.intern(_SCENE_MAPPING.get(scene_lower) or scene.title())
+
+    def scan_icm_files(self, force: bool = False) -> Mapping[str, Mapping[str, Tuple[str, ...]]]:
+        """
+        扫描ICM文件并建立品牌-型号-场景映射
+
+        已扫描过时直接返回已有结果；force为True时检查目录，修改时间变化才重新扫描。
+        新实例优先使用磁盘缓存的解析结果。
+
+        Args:
+            force: 是否重新检查ICM目录
+
+        Returns:
+            品牌 -> 型号 -> 场景元组的只读映射
+        """
+        if self._ready.is_set() and not force:
+            return self._map_view
+
+        try:
+            mtime_ns = os.stat(self.icm_directory).st_mtime_ns
+        except OSError:
+            print(f"警告: ICM目录不存在: {self.icm_directory}")
+            return MappingProxyType({})
+
+        with self._lock:
+            # 等锁期间其他线程已完成扫描，或目录内容未变化（增删改名都会更新目录修改时间）
+            if self._ready.is_set() and (not force or mtime_ns == self._last_mtime):
+                return self._map_view
+
+            # 清空现有数据
+            self._invalidate_views()
+            self._path_index.clear()
+            self.icm_cache.clear()
+            self._blob_cache.clear()
+
+            index_key = os.path.abspath(self.icm_directory)
+            cached = _load_icm_index(index_key, mtime_ns)
+
+            if cached is not None:
+                self._map = {
+                    sys.intern(brand): {model: tuple(map(sys.intern, scenes)) for model, scenes in models.items()}
+                    for brand, models in cached['map'].items()
+                }
+                for brand, model, scene, filename in cached['files']:
+                    key = (sys.intern(brand), model, sys.intern(scene))
+                    self._path_index[key] = os.path.join(self.icm_directory, filename)
+                scanned_count = len(cached['files'])
+                print(f"使用ICM文件索引缓存: {self.icm_directory}")
+            else:
+                print(f"正在扫描ICM文件目录: {self.icm_directory}")
+                scanned_count = 0
+                files = {}  # (品牌, 型号, 场景) -> 文件名
+                scene_sets = defaultdict(lambda: defaultdict(set))  # 品牌 -> 型号 -> 场景集合
+
+                # 扫描目录中的所有.icm文件
+                with os.scandir(self.icm_directory) as entries:
+                    for entry in entries:
+                        filename = entry.name
+                        if filename[-4:].lower() != '.icm' or not entry.is_file():
+                            continue
+
+                        parsed = self._parse_icm_filename(filename)
+                        if parsed:
+                            # 品牌和场景取值很少，驻留后所有键共享同一字符串对象
+                            brand, model, scene = parsed
+                            brand = sys.intern(brand)
+                            scene = sys.intern(scene)
+
+                            # 添加到品牌-型号-场景映射（集合去重）
+                            scene_sets[brand][model].add(scene)
+
+                            # 记录实际文件名；多个文件解析结果相同时优先标准命名
+                            key = (brand, model, scene)
+                            if key not in files or filename == self._canonical_filename(brand, model, scene):
+                                files[key] = filename
+                                self._path_index[key] = entry.path
+
+                            scanned_count += 1
+
+                # 一次性转换为排序后的场景元组
+                self._map = {
+                    brand: {model: tuple(sorted(scenes)) for model, scenes in models.items()}
+                    for brand, models in scene_sets.items()
+                }
+
+                _save_icm_index(index_key, mtime_ns, self._map,
+                                [[*key, filename] for key, filename in files.items()])
+
+            # 扫描时一次性统计，查询统计信息时无需再遍历映射
+            total_models = 0
+            total_scenes = 0
+            for models in self._map.values():
+                total_models += len(models)
+                for scenes in models.values():
+                    total_scenes += len(scenes)
+            self._stats = {
+                'brands': len(self._map),
+                'models': total_models,
+                'scenes': total_scenes,
+                'icm_files': total_scenes
+            }
+
+            self._last_mtime = mtime_ns
+            self._ready.set()
+            print(f"ICM文件扫描完成，共处理 {scanned_count} 个文件")
+            print(f"发现品牌: {len(self._map)}, 型号: {total_models}")
+
+            # 后台预读文件字节，切换品牌/型号/场景时无需再读磁盘
+            if self._preload_budget > 0 and self._path_index:
+                threading.Thread(
+                    target=self._preload_blobs,
+                    args=(mtime_ns, sorted(set(self._path_index.values()))),
+                    daemon=True
+                ).start()
+
+            return self._map_view
+
+    def _preload_blobs(self, mtime_ns: int, paths: List[str]):
+        """在预读预算内读取ICM文件字节；期间重新扫描过则放弃"""
+        total = 0
+        for path in paths:
+            try:
+                size = os.path.getsize(path)
+                if total + size > self._preload_budget:
+                    continue
+                with open(path, 'rb') as f:
+                    blob = f.read()
+            except OSError:
+                continue
+
+            with self._lock:
+                if self._last_mtime != mtime_ns:
+                    return
+                self._blob_cache[path] = blob
+            total += len(blob)
+
+    @functools.cached_property
+    def _map_view(self) -> Mapping[str, Mapping[str, Tuple[str, ...]]]:
+        """品牌-型号-场景映射的只读视图（不复制数据）"""
+        return MappingProxyType({brand: MappingProxyType(models) for brand, models in self._map.items()})
+
+    @functools.cached_property
+    def _brands(self) -> Tuple[str, ...]:
+        """排序后的品牌元组"""
+        return tuple(sorted(self._map))
+
+    @functools.cached_property
+    def _models(self) -> Dict[str, Tuple[str, ...]]:
+        """品牌 -> 排序后的型号元组"""
+        return {brand: tuple(sorted(models)) for brand, models in self._map.items()}
+
+    @functools.cached_property
+    def _scenes(self) -> Dict[Tuple[str, str], Tuple[str, ...]]:
+        """(品牌, 型号) -> 排序后的场景元组"""
+        return {
+            (brand, model): scenes
+            for brand, models in self._map.items()
+            for model, scenes in models.items()
+        }
+
+    def _invalidate_views(self):
+        """映射变化后清除派生的缓存视图"""
+        for name in ('_map_view', '_brands', '_models', '_scenes'):
+            self.__dict__.pop(name, None)
+
+    def get_available_brands(self) -> Tuple[str, ...]:
+        """
+        获取所有可用品牌列表
+
+        Returns:
+            品牌元组（只读，需要修改时由调用方复制）
+        """
+        if not self._ready.is_set():
+            self.scan_icm_files()
+        return self._brands
+
+    def get_available_models(self, brand: str) -> Tuple[str, ...]:
+        """
+        获取指定品牌的型号列表
+
+        Args:
+            brand: 相机品牌
+
+        Returns:
+            型号元组
+        """
+        if not self._ready.is_set():
+            self.scan_icm_files()
+        return self._models.get(brand, ())
+
+    def get_all_models(self) -> Mapping[str, Tuple[str, ...]]:
+        """
+        一次获取所有品牌的型号列表
+
+        Returns:
+            品牌 -> 型号元组的只读映射
+        """
+        if not self._ready.is_set():
+            self.scan_icm_files()
+        return MappingProxyType(self._models)
+
+    def get_available_scenes(self, brand: str, model: str) -> Tuple[str, ...]:
+        """
+        获取指定品牌型号的可用场景列表
+
+        Args:
+            brand: 相机品牌
+            model: 相机型号
+
+        Returns:
+            场景元组
+        """
+        if not self._ready.is_set():
+            self.scan_icm_files()
+        key = (brand, model)
+        return self._scenes.get(key, ())
+
+    def get_icm_file(self, brand: str, model: str, scene: str) -> Optional[str]:
+        """
+        获取指定的ICM文件路径
+
+        Args:
+            brand: 相机品牌
+            model: 相机型号
+            scene: 校色场景
+
+        Returns:
+            ICM文件完整路径，如果不存在返回None
+        """
+        if not self._ready.is_set():
+            self.scan_icm_files()
+
+        return self._path_index.get((brand, model, scene))
+
+    @staticmethod
+    def _canonical_filename(brand: str, model: str, scene: str) -> str:
+        """品牌型号场景对应的标准ICM文件名"""
+        # 特殊处理FileSystem
+        if brand == 'FileSystem':
+            return f"FileSystem{model}-{scene}.icm"
+        # 去掉型号中的空格，匹配文件名格式
+        return f"{brand}{model.replace(' ', '')}-{scene}.icm"
+
+    def load_icc_profile(self, icm_path: str) -> Optional[ImageCms.ImageCmsProfile]:
+        """
+        加载ICC配置文件
+
+        Args:
+            icm_path: ICM文件路径
+
+        Returns:
+            ICC Profile对象，失败返回None
+        """
+        entry = self._load_profile_entry(icm_path)
+        return entry[0] if entry else None
+
+    def get_profile_bytes(self, icm_path: str) -> Optional[bytes]:
+        """
+        获取ICC配置文件的原始字节，与load_icc_profile共用缓存
+
+        Args:
+            icm_path: ICM文件路径
+
+        Returns:
+            配置文件字节，失败返回None
+        """
+        entry = self._load_profile_entry(icm_path)
+        return entry[1] if entry else None
+
+    def _load_profile_entry(self, icm_path: str) -> Optional[Tuple[ImageCms.ImageCmsProfile, bytes]]:
+        """加载并缓存 (ICC Profile, 文件字节)，失败返回None"""
+        if not os.path.exists(icm_path):
+            return None
+
+        # 检查缓存，命中时标记为最近使用
+        with self._lock:
+            entry = self.icm_cache.get(icm_path)
+            if entry is not None:
+                self.icm_cache.move_to_end(icm_path)
+                return entry
+
+            # 同一文件正在被其他线程加载时等待其结果，而不是重复解析
+            event = self._inflight.get(icm_path)
+            is_loader = event is None
+            if is_loader:
+                event = self._inflight[icm_path] = threading.Event()
+
+        if not is_loader:
+            event.wait()
+            with self._lock:
+                return self.icm_cache.get(icm_path)
+
+        try:
+            # 优先使用预读的字节，否则一次读入文件；由LittleCMS从内存解析，解析时不持有锁
+            blob = self._blob_cache.get(icm_path)
+            if blob is None:
+                with open(icm_path, 'rb') as f:
+                    blob = f.read()
+            entry = (ImageCms.getOpenProfile(io.BytesIO(blob)), blob)
+        except Exception as e:
+            print(f"警告: 加载ICM文件失败 {icm_path}: {str(e)}")
+            entry = None
+
+        # 缓存配置文件（限制缓存大小）
+        with self._lock:
+            if entry is not None:
+                self.icm_cache[icm_path] = entry
+                if len(self.icm_cache) > 100:  # 限制缓存数量
+                    # 移除最久未使用的缓存项
+                    self.icm_cache.popitem(last=False)
+            del self._inflight[icm_path]
+        event.set()
+
+        return entry
+
+    def refresh_icm_database(self):
+        """刷新ICM文件数据库"""
+        print("正在刷新ICM文件数据库...")
+        self.scan_icm_files(force=True)
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        获取ICM文件统计信息
+
+        Returns:
+            统计信息字典
+        """
+        if not self._ready.is_set():
+            self.scan_icm_files()
+
+        return dict(self._stats)
+
+
+# 全局ICM管理器实例
+_icm_manager = None
+
+def get_icm_manager(preload: bool = False) -> ICMManager:
+    """
+    获取全局ICM管理器实例
+
+    Args:
+        preload: 首次创建时是否在扫描后预读ICM文件字节。只应由图形界面进程开启；
+            每个转换工作进程只用到少量配置文件，预读会使内存和磁盘读取随进程数成倍增加
+    """
+    global _icm_manager
+    if _icm_manager is None:
+        _icm_manager = ICMManager(preload_budget=_PRELOAD_BUDGET if preload else 0)
+    return _icm_manager
+
+
+if __name__ == "__main__":
+    # 测试代码
+    manager = ICMManager()
+
+    print("=== ICM文件管理器测试 ===")
+
+    # 显示统计信息
+    stats = manager.get_statistics()
+    print(f"统计信息: {stats}")
+
+    # 显示品牌列表
+    brands = manager.get_available_brands()
+    print(f"可用品牌 ({len(brands)}): {brands[:10]}...")  # 显示前10个
+
+    # 显示每个品牌的型号数量
+    for brand in brands[:5]:  # 前5个品牌
+        models = manager.get_available_models(brand)
+        print(f"{brand}: {len(models)} 个型号")
+        if models:
+            print(f"  示例型号: {models[:3]}")  # 显示前3个型号
+
+            # 显示第一个型号的场景
+            scenes = manager.get_available_scenes(brand, models[0])
+            print(f"  {models[0]} 场景: {scenes}")
+
+    # 测试文件查找
+    test_brand = "Canon"
+    if test_brand in brands:
+        models = manager.get_available_models(test_brand)
+        if models:
+            test_model = models[0]
+            scenes = manager.get_available_scenes(test_brand, test_model)
+            if scenes:
+                test_scene = scenes[0]
+                icm_path = manager.get_icm_file(test_brand, test_model, test_scene)
+                print(f"\n测试查找: {test_brand} {test_model} {test_scene}")
+                print(f"ICM文件路径: {icm_path}")
+
+                # 测试加载ICC配置
+                if icm_path:
+                    profile = manager.load_icc_profile(icm_path)
+                    if profile:
+                        print(f"ICC配置加载成功: {os.path.basename(icm_path)}")
+                    else:
                         print("ICC配置加载失败")
\ No newline at end of file
@@ -1,1205 +1,1709 @@
-#!/usr/bin/env python3
-"""
-现代化RAW to JPEG转换器
-浅色简约界面设计，重点优化转换性能和用户体验
-"""
-
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import customtkinter as ctk
-import os
-import threading
-import queue
-import time
-from typing import List, Optional, Callable
-from dataclasses import dataclass
-from pathlib import Path
-
-# 导入增强转换器和ICM组件
-try:
-    from enhanced_converter import EnhancedRAWConverter, ConversionConfig
-    from icm_manager import get_icm_manager
-    from camera_detector import get_camera_detector
-    ICM_AVAILABLE = True
-except ImportError:
-    ICM_AVAILABLE = False
-    print("警告: ICM功能模块未找到，校色功能将被禁用")
-
-# 设置CustomTkinter为浅色主题
-ctk.set_appearance_mode("light")
-ctk.set_default_color_theme("blue")
-
-# 支持的RAW格式
-SUPPORTED_FORMATS = ['.arw', '.cr2', '.cr3', '.dng', '.nef', '.raw', '.orf', '.rw2', '.pef', '.srw', '.mos']
-
-# 浅色现代化配色方案
-COLORS = {
-    'primary': '#2196F3',
-    'secondary': '#1976D2',
-    'accent': '#FF6B35',
-    'surface': '#FFFFFF',
-    'surface_variant': '#F5F5F5',
-    'background': '#FAFAFA',
-    'error': '#F44336',
-    'success': '#4CAF50',
-    'warning': '#FF9800',
-    'outline': '#E0E0E0',
-    'text_primary': '#212121',
-    'text_secondary': '#757575'
-}
-
-@dataclass
-class ConversionTask:
-    """转换任务数据类"""
-    input_path: str
-    output_path: str
-    status: str = "pending"  # pending, processing, completed, failed
-    progress: float = 0.0
-    error_message: str = ""
-    file_size: int = 0
-
-    # ICM校色相关信息
-    camera_brand: str = ""
-    camera_model: str = ""
-    icm_applied: bool = False
-    icm_file: str = ""
-
-class ModernConverter:
-    """现代化RAW转JPEG转换器主类"""
-
-    def __init__(self):
-        # 创建主窗口
-        self.root = ctk.CTk()
-        self.root.title("RAW to JPEG 现代化转换器")
-        self.root.geometry("1200x800")  # 调整窗口大小以适应文件列表
-        self.root.resizable(True, True)
-
-        # 设置窗口图标和样式
-        self.setup_window_style()
-
-        # 状态变量
-        self.input_folder = tk.StringVar(value="")
-        self.output_folder = tk.StringVar(value="")
-        self.jpeg_quality = tk.IntVar(value=95)
-        self.is_converting = False
-        self.conversion_thread = None
-
-        # ICM校色状态变量
-        self.enable_icm = tk.BooleanVar(value=True if ICM_AVAILABLE else False)
-        self.icm_brand = tk.StringVar(value="")
-        self.icm_model = tk.StringVar(value="")
-        self.icm_scene = tk.StringVar(value="Generic")
-        self.auto_detect_camera = tk.BooleanVar(value=True)
-
-        # ICM搜索和筛选变量
-        self.icm_search_enabled = tk.BooleanVar(value=False)  # 搜索功能默认关闭
-        self.brand_search_var = tk.StringVar(value="")
-        self.model_search_var = tk.StringVar(value="")
-
-        # ICM数据缓存
-        self.all_brands = []
-        self.all_models = {}
-        self.filtered_brands = []
-        self.filtered_models = {}
-
-        # ICM组件
-        self.icm_manager = None
-        self.camera_detector = None
-
-        # 任务管理
-        self.conversion_queue = queue.Queue()
-        self.conversion_tasks: List[ConversionTask] = []
-
-        # 初始化ICM组件
-        if ICM_AVAILABLE:
-            self.init_icm_components()
-
-        # 创建UI
-        self.create_widgets()
-
-        # 启动队列处理
-        self.process_queue()
-
-    def init_icm_components(self):
-        """初始化ICM组件"""
-        try:
-            self.icm_manager = get_icm_manager()
-            self.camera_detector = get_camera_detector()
-            print("ICM组件初始化成功")
-        except Exception as e:
-            print(f"ICM组件初始化失败: {str(e)}")
-            self.enable_icm.set(False)
-
-    def setup_window_style(self):
-        """设置窗口样式"""
-        # 设置窗口背景色
-        self.root.configure(fg_color=COLORS['background'])
-
-    def create_widgets(self):
-        """创建所有UI组件"""
-        # 主容器
-        main_container = ctk.CTkFrame(self.root, corner_radius=15, fg_color=COLORS['surface'])
-        main_container.pack(fill="both", expand=True, padx=20, pady=20)
-
-        # 标题区域
-        self.create_header(main_container)
-
-        # 文件选择区域
-        self.create_file_selection(main_container)
-
-        # 设置区域
-        self.create_settings(main_container)
-
-        # 控制按钮区域
-        self.create_controls(main_container)
-
-        # 进度显示区域
-        self.create_progress_section(main_container)
-
-        # 文件列表区域
-        self.create_file_list(main_container)
-
-    def create_header(self, parent):
-        """创建标题区域"""
-        header_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color="transparent")
-        header_frame.pack(fill="x", pady=(0, 20))
-
-        # 标题
-        title_label = ctk.CTkLabel(
-            header_frame,
-            text="🖼️ RAW to JPEG 转换器",
-            font=ctk.CTkFont(size=28, weight="bold"),
-            text_color=COLORS['text_primary']
-        )
-        title_label.pack(anchor="w", pady=(10, 5))
-
-        # 副标题
-        subtitle_label = ctk.CTkLabel(
-            header_frame,
-            text="高性能RAW图像批量转换工具 - 支持主流相机RAW格式",
-            font=ctk.CTkFont(size=14),
-            text_color=COLORS['text_secondary']
-        )
-        subtitle_label.pack(anchor="w", pady=(0, 10))
-
-    def create_file_selection(self, parent):
-        """创建文件选择区域"""
-        selection_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
-        selection_frame.pack(fill="x", pady=(0, 20))
-
-        # 输入文件夹选择
-        input_frame = ctk.CTkFrame(selection_frame, fg_color="transparent")
-        input_frame.pack(fill="x", padx=20, pady=(15, 10))
-
-        input_label = ctk.CTkLabel(
-            input_frame,
-            text="📁 输入文件夹:",
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color=COLORS['text_primary'],
-            width=120
-        )
-        input_label.pack(side="left", padx=(0, 10))
-
-        self.input_entry = ctk.CTkEntry(
-            input_frame,
-            textvariable=self.input_folder,
-            placeholder_text="选择包含RAW文件的文件夹...",
-            font=ctk.CTkFont(size=14),
-            height=40
-        )
-        self.input_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
-
-        input_browse_btn = ctk.CTkButton(
-            input_frame,
-            text="浏览",
-            command=self.browse_input_folder,
-            width=80,
-            height=40,
-            fg_color=COLORS['primary'],
-            hover_color=COLORS['secondary']
-        )
-        input_browse_btn.pack(side="right")
-
-        # 输出文件夹选择
-        output_frame = ctk.CTkFrame(selection_frame, fg_color="transparent")
-        output_frame.pack(fill="x", padx=20, pady=(10, 15))
-
-        output_label = ctk.CTkLabel(
-            output_frame,
-            text="📁 输出文件夹:",
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color=COLORS['text_primary'],
-            width=120
-        )
-        output_label.pack(side="left", padx=(0, 10))
-
-        self.output_entry = ctk.CTkEntry(
-            output_frame,
-            textvariable=self.output_folder,
-            placeholder_text="选择输出JPEG文件的文件夹...",
-            font=ctk.CTkFont(size=14),
-            height=40
-        )
-        self.output_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
-
-        output_browse_btn = ctk.CTkButton(
-            output_frame,
-            text="浏览",
-            command=self.browse_output_folder,
-            width=80,
-            height=40,
-            fg_color=COLORS['primary'],
-            hover_color=COLORS['secondary']
-        )
-        output_browse_btn.pack(side="right")
-
-    def create_settings(self, parent):
-        """创建设置区域"""
-        settings_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
-        settings_frame.pack(fill="x", pady=(0, 20))
-
-        # JPEG质量设置
-        quality_frame = ctk.CTkFrame(settings_frame, fg_color="transparent")
-        quality_frame.pack(fill="x", padx=20, pady=15)
-
-        quality_label = ctk.CTkLabel(
-            quality_frame,
-            text="🎯 JPEG质量:",
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color=COLORS['text_primary'],
-            width=120
-        )
-        quality_label.pack(side="left", padx=(0, 15))
-
-        # 质量滑块
-        self.quality_slider = ctk.CTkSlider(
-            quality_frame,
-            from_=60,
-            to=100,
-            number_of_steps=40,
-            variable=self.jpeg_quality,
-            width=200,
-            height=20,
-            progress_color=COLORS['primary']
-        )
-        self.quality_slider.pack(side="left", padx=(0, 15))
-
-        self.quality_label = ctk.CTkLabel(
-            quality_frame,
-            text=f"{self.jpeg_quality.get()}%",
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=COLORS['primary'],
-            width=40
-        )
-        self.quality_label.pack(side="left")
-
-        # 绑定质量滑块变化事件
-        self.quality_slider.configure(command=self.update_quality_label)
-
-        # ICM校色设置 (仅在ICM可用时显示)
-        if ICM_AVAILABLE:
-            self.create_icm_settings(settings_frame)
-
-        # 支持格式说明
-        format_info = ctk.CTkLabel(
-            settings_frame,
-            text=f"支持格式: {', '.join([fmt.upper() for fmt in SUPPORTED_FORMATS])}",
-            font=ctk.CTkFont(size=12),
-            text_color=COLORS['text_secondary']
-        )
-        format_info.pack(padx=20, pady=(0, 15))
-
-    def create_icm_settings(self, parent):
-        """创建ICM校色设置区域"""
-        icm_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
-        icm_frame.pack(fill="x", pady=(10, 0))
-
-        # 标题
-        title_label = ctk.CTkLabel(
-            icm_frame,
-            text="🎨 相机校色设置 (ICM)",
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color=COLORS['text_primary']
-        )
-        title_label.pack(anchor="w", padx=20, pady=(15, 10))
-
-        # 启用ICM校色选项
-        enable_frame = ctk.CTkFrame(icm_frame, fg_color="transparent")
-        enable_frame.pack(fill="x", padx=20, pady=(0, 10))
-
-        enable_cb = ctk.CTkCheckBox(
-            enable_frame,
-            text="启用相机校色 (提升色彩准确性)",
-            variable=self.enable_icm,
-            command=self.on_icm_toggled,
-            font=ctk.CTkFont(size=14),
-            text_color=COLORS['text_primary']
-        )
-        enable_cb.pack(side="left")
-
-        # 自动检测相机选项
-        auto_detect_cb = ctk.CTkCheckBox(
-            enable_frame,
-            text="自动检测相机型号",
-            variable=self.auto_detect_camera,
-            command=self.on_auto_detect_toggled,
-            font=ctk.CTkFont(size=14),
-            text_color=COLORS['text_primary']
-        )
-        auto_detect_cb.pack(side="left", padx=(20, 0))
-
-        # 搜索功能开关
-        search_cb = ctk.CTkCheckBox(
-            enable_frame,
-            text="启用搜索筛选",
-            variable=self.icm_search_enabled,
-            command=self.on_search_toggled,
-            font=ctk.CTkFont(size=14),
-            text_color=COLORS['text_primary']
-        )
-        search_cb.pack(side="left", padx=(20, 0))
-
-        # 手动选择区域 (使用滚动框架)
-        self.manual_selection_frame = ctk.CTkFrame(icm_frame, fg_color="transparent")
-        self.manual_selection_frame.pack(fill="x", padx=20, pady=(10, 15))
-
-        # 创建可滚动的容器
-        self.scrollable_frame = ctk.CTkScrollableFrame(
-            self.manual_selection_frame,
-            height=250,  # 限制高度
-            fg_color="transparent"
-        )
-        self.scrollable_frame.pack(fill="both", expand=True)
-
-        # 搜索区域
-        self.search_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
-        self.search_frame.pack(fill="x", pady=(0, 10))
-
-        # 品牌搜索
-        brand_search_frame = ctk.CTkFrame(self.search_frame, fg_color="transparent")
-        brand_search_frame.pack(fill="x", pady=(0, 5))
-
-        brand_search_label = ctk.CTkLabel(brand_search_frame, text="品牌搜索:", width=80, font=ctk.CTkFont(size=12))
-        brand_search_label.pack(side="left")
-
-        self.brand_search_entry = ctk.CTkEntry(
-            brand_search_frame,
-            textvariable=self.brand_search_var,
-            placeholder_text="输入品牌名称搜索...",
-            width=200,
-            height=28
-        )
-        self.brand_search_entry.pack(side="left", padx=(10, 10))
-        self.brand_search_entry.bind("<KeyRelease>", self.on_brand_search_changed)
-
-        # 型号搜索
-        model_search_frame = ctk.CTkFrame(self.search_frame, fg_color="transparent")
-        model_search_frame.pack(fill="x")
-
-        model_search_label = ctk.CTkLabel(model_search_frame, text="型号搜索:", width=80, font=ctk.CTkFont(size=12))
-        model_search_label.pack(side="left")
-
-        self.model_search_entry = ctk.CTkEntry(
-            model_search_frame,
-            textvariable=self.model_search_var,
-            placeholder_text="输入型号名称搜索...",
-            width=200,
-            height=28
-        )
-        self.model_search_entry.pack(side="left", padx=(10, 10))
-        self.model_search_entry.bind("<KeyRelease>", self.on_model_search_changed)
-
-        # 选择区域
-        self.selection_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
-        self.selection_frame.pack(fill="both", expand=True)
-
-        # 第一行：品牌和场景选择
-        first_row = ctk.CTkFrame(self.selection_frame, fg_color="transparent")
-        first_row.pack(fill="x", pady=(0, 10))
-
-        # 品牌选择 (使用Combobox替代OptionMenu以支持滚动)
-        brand_label = ctk.CTkLabel(first_row, text="品牌:", width=60, font=ctk.CTkFont(size=14))
-        brand_label.pack(side="left")
-
-        self.brand_combobox = ctk.CTkComboBox(
-            first_row,
-            values=["请先扫描ICM文件"],
-            variable=self.icm_brand,
-            command=self.on_brand_selected,
-            width=150,
-            height=28
-        )
-        self.brand_combobox.pack(side="left", padx=(10, 20))
-
-        # 场景选择
-        scene_label = ctk.CTkLabel(first_row, text="场景:", width=60, font=ctk.CTkFont(size=14))
-        scene_label.pack(side="left")
-
-        self.scene_menu = ctk.CTkOptionMenu(
-            first_row,
-            values=["Generic", "Flat", "Landscape", "Monochrome",
-                   "Neutral", "Portrait", "Standard", "Vivid", "ProStandard"],
-            variable=self.icm_scene,
-            width=120,
-            height=32
-        )
-        self.scene_menu.pack(side="left", padx=(10, 0))
-
-        # 第二行：型号选择和刷新按钮
-        second_row = ctk.CTkFrame(self.selection_frame, fg_color="transparent")
-        second_row.pack(fill="x", pady=(10, 0))
-
-        # 型号选择 (使用Combobox)
-        model_label = ctk.CTkLabel(second_row, text="型号:", width=60, font=ctk.CTkFont(size=14))
-        model_label.pack(side="left")
-
-        self.model_combobox = ctk.CTkComboBox(
-            second_row,
-            values=["请先选择品牌"],
-            variable=self.icm_model,
-            command=self.on_model_selected,
-            width=300,  # 加宽以显示完整型号名称
-            height=28
-        )
-        self.model_combobox.pack(side="left", padx=(10, 20))
-
-        # 刷新按钮
-        refresh_btn = ctk.CTkButton(
-            second_row,
-            text="刷新ICM列表",
-            command=self.refresh_icm_list,
-            width=120,
-            height=32,
-            fg_color=COLORS['primary'],
-            hover_color=COLORS['secondary']
-        )
-        refresh_btn.pack(side="right")
-
-        # 初始状态
-        self.on_icm_toggled()
-        self.on_search_toggled()
-
-        # 异步刷新ICM列表
-        self.root.after(100, self.async_refresh_icm_list)
-
-        # 状态显示
-        self.icm_status_label = ctk.CTkLabel(
-            icm_frame,
-            text="正在扫描ICM文件...",
-            font=ctk.CTkFont(size=12),
-            text_color=COLORS['text_secondary']
-        )
-        self.icm_status_label.pack(anchor="w", padx=20, pady=(0, 15))
-
-    def on_icm_toggled(self):
-        """ICM校色开关状态改变"""
-        enabled = self.enable_icm.get()
-        state = "normal" if enabled else "disabled"
-
-        # 更新手动选择控件状态
-        if not self.auto_detect_camera.get():
-            self.update_manual_selection_state(state)
-
-        # 如果启用，立即刷新ICM列表
-        if enabled:
-            self.async_refresh_icm_list()
-
-    def on_auto_detect_toggled(self):
-        """自动检测开关状态改变"""
-        auto_enabled = self.auto_detect_camera.get()
-        icm_enabled = self.enable_icm.get()
-
-        if icm_enabled:
-            if auto_enabled:
-                # 自动检测模式，禁用手动选择
-                self.update_manual_selection_state("disabled")
-            else:
-                # 手动选择模式，启用手动选择
-                self.update_manual_selection_state("normal")
-
-    def on_search_toggled(self):
-        """搜索功能开关状态改变"""
-        search_enabled = self.icm_search_enabled.get()
-
-        if hasattr(self, 'search_frame'):
-            if search_enabled:
-                self.search_frame.pack(fill="x", pady=(0, 10))
-            else:
-                self.search_frame.pack_forget()
-
-    def on_brand_search_changed(self, event=None):
-        """品牌搜索内容改变"""
-        if not self.icm_search_enabled.get() or not hasattr(self, 'all_brands'):
-            return
-
-        search_text = self.brand_search_var.get().lower()
-        if search_text:
-            self.filtered_brands = [brand for brand in self.all_brands if search_text in brand.lower()]
-        else:
-            self.filtered_brands = self.all_brands.copy()
-
-        # 更新combobox
-        self.brand_combobox.configure(values=self.filtered_brands)
-
-        # 如果当前选择不在筛选结果中，清空选择
-        current_brand = self.icm_brand.get()
-        if current_brand and current_brand not in self.filtered_brands:
-            self.icm_brand.set("")
-            self.update_model_list("")  # 清空型号列表
-
-    def on_model_search_changed(self, event=None):
-        """型号搜索内容改变"""
-        if not self.icm_search_enabled.get() or not hasattr(self, 'all_models'):
-            return
-
-        current_brand = self.icm_brand.get()
-        search_text = self.model_search_var.get().lower()
-
-        if current_brand and current_brand in self.all_models:
-            all_brand_models = self.all_models[current_brand]
-            if search_text:
-                self.filtered_models[current_brand] = [model for model in all_brand_models
-                                                    if search_text in model.lower()]
-            else:
-                self.filtered_models[current_brand] = all_brand_models.copy()
-        else:
-            self.filtered_models = {}
-
-        # 更新combobox
-        if current_brand in self.filtered_models:
-            self.model_combobox.configure(values=self.filtered_models[current_brand])
-        else:
-            self.model_combobox.configure(values=[])
-
-        # 如果当前选择不在筛选结果中，清空选择
-        current_model = self.icm_model.get()
-        if current_model and current_brand in self.filtered_models:
-            if current_model not in self.filtered_models[current_brand]:
-                self.icm_model.set("")
-
-    def update_manual_selection_state(self, state):
-        """更新手动选择控件状态"""
-        self.brand_combobox.configure(state=state)
-        self.model_combobox.configure(state=state)
-        self.scene_menu.configure(state=state)
-
-        # 同时更新搜索控件状态
-        if hasattr(self, 'brand_search_entry'):
-            self.brand_search_entry.configure(state=state)
-        if hasattr(self, 'model_search_entry'):
-            self.model_search_entry.configure(state=state)
-
-    def on_brand_selected(self, brand):
-        """品牌选择变化"""
-        if not brand or brand == "请先扫描ICM文件":
-            return
-
-        # 清空型号搜索
-        self.model_search_var.set("")
-        # 更新型号列表
-        self.update_model_list(brand)
-
-    def on_model_selected(self, model):
-        """型号选择变化"""
-        # 这里可以添加型号选择后的处理逻辑
-        # 比如显示该型号支持的ICM场景等
-        pass
-
-    def update_model_list(self, brand):
-        """更新型号列表"""
-        if not self.icm_manager:
-            return
-
-        try:
-            # 如果启用了搜索，使用筛选后的数据
-            if self.icm_search_enabled.get() and brand in self.filtered_models:
-                models = self.filtered_models[brand]
-            else:
-                models = self.icm_manager.get_available_models(brand)
-
-            if models:
-                self.model_combobox.configure(values=models)
-                # 优先选择第一个型号
-                if models and (not self.icm_model.get() or self.icm_model.get() not in models):
-                    self.icm_model.set(models[0])
-            else:
-                self.model_combobox.configure(values=["该品牌暂无型号"])
-                self.icm_model.set("")
-        except Exception as e:
-            print(f"更新型号列表失败: {str(e)}")
-            self.model_combobox.configure(values=["加载失败"])
-            self.icm_model.set("")
-
-    def async_refresh_icm_list(self):
-        """异步刷新ICM文件列表"""
-        def refresh_worker():
-            try:
-                if self.icm_manager:
-                    self.icm_manager.refresh_icm_database()
-                    # 在主线程中更新UI
-                    self.root.after(0, self.update_icm_ui)
-            except Exception as e:
-                print(f"刷新ICM列表失败: {str(e)}")
-                self.root.after(0, lambda: self.icm_status_label.configure(
-                    text=f"ICM扫描失败: {str(e)}"
-                ))
-
-        # 在后台线程中执行
-        threading.Thread(target=refresh_worker, daemon=True).start()
-
-    def refresh_icm_list(self):
-        """刷新ICM文件列表"""
-        self.icm_status_label.configure(text="正在扫描ICM文件...")
-        self.async_refresh_icm_list()
-
-    def update_icm_ui(self):
-        """更新ICM相关UI"""
-        if not self.icm_manager:
-            self.icm_status_label.configure(text="ICM管理器未初始化")
-            return
-
-        try:
-            # 获取统计信息
-            stats = self.icm_manager.get_statistics()
-            self.icm_status_label.configure(
-                text=f"已发现 {stats['brands']} 个品牌，{stats['models']} 个型号，{stats['icm_files']} 个ICM文件"
-            )
-
-            # 获取并缓存所有数据
-            self.all_brands = self.icm_manager.get_available_brands()
-            self.all_models = {}
-            for brand in self.all_brands:
-                self.all_models[brand] = self.icm_manager.get_available_models(brand)
-
-            # 初始化筛选数据
-            self.filtered_brands = self.all_brands.copy()
-            self.filtered_models = self.all_models.copy()
-
-            # 更新品牌combobox
-            if self.all_brands:
-                self.brand_combobox.configure(values=self.filtered_brands)
-                if not self.icm_brand.get() or self.icm_brand.get() not in self.filtered_brands:
-                    self.icm_brand.set(self.filtered_brands[0])
-                    self.update_model_list(self.filtered_brands[0])
-            else:
-                self.brand_combobox.configure(values=["未找到ICM文件"])
-                self.icm_brand.set("")
-
-        except Exception as e:
-            self.icm_status_label.configure(text=f"UI更新失败: {str(e)}")
-
-    def create_controls(self, parent):
-        """创建控制按钮区域"""
-        controls_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
-        controls_frame.pack(fill="x", pady=(0, 20))
-
-        # 按钮容器
-        button_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
-        button_frame.pack(pady=20)
-
-        # 开始转换按钮
-        self.start_btn = ctk.CTkButton(
-            button_frame,
-            text="🚀 开始转换",
-            command=self.start_conversion,
-            width=150,
-            height=45,
-            font=ctk.CTkFont(size=16, weight="bold"),
-            fg_color=COLORS['success'],
-            hover_color="#45a049"
-        )
-        self.start_btn.pack(side="left", padx=(0, 10))
-
-        # 停止转换按钮
-        self.stop_btn = ctk.CTkButton(
-            button_frame,
-            text="🛑 停止",
-            command=self.stop_conversion,
-            width=120,
-            height=45,
-            font=ctk.CTkFont(size=16, weight="bold"),
-            fg_color=COLORS['error'],
-            hover_color="#d32f2f",
-            state="disabled"
-        )
-        self.stop_btn.pack(side="left", padx=(0, 10))
-
-        # 清除列表按钮
-        clear_btn = ctk.CTkButton(
-            button_frame,
-            text="🗑️ 清除列表",
-            command=self.clear_file_list,
-            width=120,
-            height=45,
-            font=ctk.CTkFont(size=16, weight="bold"),
-            fg_color=COLORS['warning'],
-            hover_color="#f57c00"
-        )
-        clear_btn.pack(side="left")
-
-    def create_progress_section(self, parent):
-        """创建进度显示区域"""
-        progress_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
-        progress_frame.pack(fill="x", pady=(0, 20))
-
-        # 进度条容器
-        progress_container = ctk.CTkFrame(progress_frame, fg_color="transparent")
-        progress_container.pack(fill="x", padx=20, pady=15)
-
-        # 进度条
-        self.progress_bar = ctk.CTkProgressBar(
-            progress_container,
-            height=25,
-            corner_radius=12,
-            progress_color=COLORS['primary']
-        )
-        self.progress_bar.pack(fill="x", pady=(0, 10))
-        self.progress_bar.set(0)
-
-        # 进度信息
-        progress_info = ctk.CTkFrame(progress_container, fg_color="transparent")
-        progress_info.pack(fill="x")
-
-        self.progress_label = ctk.CTkLabel(
-            progress_info,
-            text="准备就绪",
-            font=ctk.CTkFont(size=14, weight="bold"),
-            text_color=COLORS['text_primary']
-        )
-        self.progress_label.pack(side="left")
-
-        self.progress_count = ctk.CTkLabel(
-            progress_info,
-            text="0/0 文件",
-            font=ctk.CTkFont(size=14),
-            text_color=COLORS['text_secondary']
-        )
-        self.progress_count.pack(side="right")
-
-    def create_file_list(self, parent):
-        """创建文件列表区域"""
-        list_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
-        list_frame.pack(fill="both", expand=True, pady=(0, 0))
-
-        # 列表标题
-        list_header = ctk.CTkFrame(list_frame, corner_radius=10, fg_color=COLORS['primary'])
-        list_header.pack(fill="x", padx=1, pady=(1, 10))
-
-        header_label = ctk.CTkLabel(
-            list_header,
-            text="📋 文件列表",
-            font=ctk.CTkFont(size=16, weight="bold"),
-            text_color="white",
-            height=30
-        )
-        header_label.pack(pady=10)
-
-        # 文件列表容器（滚动区域）
-        self.file_list_frame = ctk.CTkScrollableFrame(
-            list_frame,
-            height=300,  # 增加文件列表高度
-            corner_radius=8,
-            fg_color=COLORS['surface']
-        )
-        self.file_list_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
-
-        # 空状态提示
-        self.empty_label = ctk.CTkLabel(
-            self.file_list_frame,
-            text="暂无文件\n请选择输入文件夹后点击开始转换",
-            font=ctk.CTkFont(size=14),
-            text_color=COLORS['text_secondary']
-        )
-        self.empty_label.pack(expand=True)
-
-    def update_quality_label(self, value):
-        """更新质量标签"""
-        self.quality_label.configure(text=f"{int(value)}%")
-
-    def browse_input_folder(self):
-        """浏览输入文件夹"""
-        folder = filedialog.askdirectory(title="选择包含RAW文件的文件夹")
-        if folder:
-            self.input_folder.set(folder)
-            # 自动设置输出文件夹
-            if not self.output_folder.get():
-                output_folder = os.path.join(folder, "JPEG")
-                self.output_folder.set(output_folder)
-
-    def browse_output_folder(self):
-        """浏览输出文件夹"""
-        folder = filedialog.askdirectory(title="选择输出文件夹")
-        if folder:
-            self.output_folder.set(folder)
-
-    def scan_raw_files(self) -> List[str]:
-        """扫描输入文件夹中的RAW文件"""
-        input_folder = self.input_folder.get()
-        if not input_folder or not os.path.exists(input_folder):
-            return []
-
-        raw_files = []
-        try:
-            for root, dirs, files in os.walk(input_folder):
-                for file in files:
-                    if any(file.lower().endswith(ext) for ext in SUPPORTED_FORMATS):
-                        raw_files.append(os.path.join(root, file))
-        except Exception as e:
-            messagebox.showerror("错误", f"扫描文件夹时出错: {str(e)}")
-            return []
-
-        return sorted(raw_files)
-
-    def create_file_task(self, raw_file: str) -> ConversionTask:
-        """创建转换任务"""
-        # 生成输出文件路径
-        relative_path = os.path.relpath(raw_file, self.input_folder.get())
-        name_without_ext = os.path.splitext(relative_path)[0]
-        output_path = os.path.join(self.output_folder.get(), f"{name_without_ext}.jpg")
-
-        # 确保输出目录存在
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        return ConversionTask(
-            input_path=raw_file,
-            output_path=output_path,
-            file_size=os.path.getsize(raw_file) if os.path.exists(raw_file) else 0
-        )
-
-    def start_conversion(self):
-        """开始转换"""
-        # 验证输入
-        if not self.input_folder.get():
-            messagebox.showwarning("警告", "请选择输入文件夹")
-            return
-
-        if not self.output_folder.get():
-            messagebox.showwarning("警告", "请选择输出文件夹")
-            return
-
-        # 扫描文件
-        raw_files = self.scan_raw_files()
-        if not raw_files:
-            messagebox.showwarning("警告", "在输入文件夹中未找到RAW文件")
-            return
-
-        # 创建转换任务
-        self.conversion_tasks = [self.create_file_task(f) for f in raw_files]
-
-        # 更新UI状态
-        self.is_converting = True
-        self.start_btn.configure(state="disabled")
-        self.stop_btn.configure(state="normal")
-        self.progress_bar.set(0)
-        self.progress_label.configure(text="准备转换...")
-
-        # 更新文件列表显示
-        self.update_file_list_display()
-
-        # 启动转换线程
-        self.conversion_thread = threading.Thread(target=self.conversion_worker, daemon=True)
-        self.conversion_thread.start()
-
-    def stop_conversion(self):
-        """停止转换"""
-        self.is_converting = False
-        self.start_btn.configure(state="normal")
-        self.stop_btn.configure(state="disabled")
-        self.progress_label.configure(text="转换已停止")
-
-    def conversion_worker(self):
-        """转换工作线程"""
-        # 创建转换器配置
-        config = ConversionConfig(
-            jpeg_quality=self.jpeg_quality.get(),
-            use_camera_wb=True,
-            use_auto_wb=False,
-            output_bps=8,
-            bright=1.0,
-            no_auto_bright=False,
-            half_size=False,
-            exp_preserve_highlights=True,
-            four_color_rgb=False,
-            max_threads=None,
-            # ICM配置
-            enable_icm_correction=self.enable_icm.get(),
-            icm_brand=self.icm_brand.get(),
-            icm_model=self.icm_model.get(),
-            icm_scene=self.icm_scene.get(),
-            manual_icm_path=None,
-            strict_icm=True,
-            auto_detect_camera=self.auto_detect_camera.get()
-        )
-
-        # 创建增强转换器
-        converter = EnhancedRAWConverter(config)
-
-        # 准备文件列表
-        input_files = [task.input_path for task in self.conversion_tasks]
-        output_dir = self.output_folder.get()
-
-        # 设置进度回调
-        def progress_callback(completed, total):
-            if self.is_converting:
-                progress_percent = completed / total if total > 0 else 0
-                completed_count = completed
-
-                # 更新任务状态
-                for i in range(min(completed, len(self.conversion_tasks))):
-                    task = self.conversion_tasks[i]
-                    if task.status != "completed":
-                        task.status = "completed"
-                        task.progress = 100.0
-
-                self.conversion_queue.put(("progress", {
-                    "percent": progress_percent,
-                    "completed": completed_count,
-                    "total": total,
-                    "current_file": "处理中..." if completed < total else "转换完成"
-                }))
-
-        # 设置状态回调
-        def status_callback(message):
-            if self.is_converting:
-                self.conversion_queue.put(("status", message))
-
-        converter.set_progress_callback(progress_callback)
-        converter.set_status_callback(status_callback)
-
-        try:
-            # 执行批量转换
-            results = converter.convert_batch(input_files, output_dir)
-
-            # 更新任务结果
-            completed_count = 0
-            for i, result in enumerate(results):
-                if i < len(self.conversion_tasks):
-                    task = self.conversion_tasks[i]
-
-                    # 更新任务信息
-                    task.status = "completed" if result.status.value == "completed" else "failed"
-                    task.progress = 100.0 if result.status.value == "completed" else 0.0
-                    task.error_message = result.error_message
-                    task.camera_brand = result.camera_brand
-                    task.camera_model = result.camera_model
-                    task.icm_applied = result.icm_applied
-                    task.icm_file = result.icm_file
-
-                    if result.status.value == "completed":
-                        completed_count += 1
-
-                    # 更新任务显示
-                    self.conversion_queue.put(("update_task", task))
-
-            # 转换完成
-            total_files = len(self.conversion_tasks)
-            failed_count = total_files - completed_count
-            self.conversion_queue.put(("completed", {
-                "total": total_files,
-                "completed": completed_count,
-                "failed": failed_count
-            }))
-
-        except Exception as e:
-            # 转换失败
-            error_msg = str(e)
-            for task in self.conversion_tasks:
-                if task.status == "processing":
-                    task.status = "failed"
-                    task.error_message = error_msg
-                    self.conversion_queue.put(("update_task", task))
-
-            self.conversion_queue.put(("error", {
-                "file": "批量转换",
-                "error": error_msg
-            }))
-
-    def process_queue(self):
-        """处理队列消息"""
-        try:
-            while True:
-                try:
-                    # 非阻塞获取消息
-                    msg_type, data = self.conversion_queue.get_nowait()
-
-                    if msg_type == "progress":
-                        self.update_progress(data)
-                    elif msg_type == "error":
-                        self.show_error(data)
-                    elif msg_type == "update_task":
-                        self.update_task_display(data)
-                    elif msg_type == "completed":
-                        self.conversion_completed(data)
-
-                except queue.Empty:
-                    break
-        finally:
-            # 继续处理队列
-            self.root.after(100, self.process_queue)
-
-    def update_progress(self, data):
-        """更新进度显示"""
-        self.progress_bar.set(data["percent"])
-        self.progress_label.configure(text=f"正在转换: {data['current_file']}")
-        self.progress_count.configure(text=f"{data['completed']}/{data['total']} 文件")
-
-    def show_error(self, data):
-        """显示错误信息"""
-        print(f"错误: {data['file']} - {data['error']}")
-
-    def update_task_display(self, task: ConversionTask):
-        """更新任务显示"""
-        pass  # 在文件列表中更新显示
-
-    def conversion_completed(self, data):
-        """转换完成"""
-        self.is_converting = False
-        self.start_btn.configure(state="normal")
-        self.stop_btn.configure(state="disabled")
-
-        if data["failed"] == 0:
-            self.progress_label.configure(text="✅ 转换完成")
-            messagebox.showinfo("完成", f"成功转换 {data['completed']} 个文件")
-        else:
-            self.progress_label.configure(text=f"⚠️ 转换完成 ({data['failed']} 个失败)")
-            messagebox.showwarning("完成",
-                f"转换完成: {data['completed']} 成功, {data['failed']} 失败")
-
-    def update_file_list_display(self):
-        """更新文件列表显示"""
-        # 清除空状态提示
-        if hasattr(self, 'empty_label'):
-            self.empty_label.pack_forget()
-
-        # 清除现有显示
-        for widget in self.file_list_frame.winfo_children():
-            widget.destroy()
-
-        # 显示文件任务
-        for task in self.conversion_tasks:
-            self.create_file_task_widget(task)
-
-    def create_file_task_widget(self, task: ConversionTask):
-        """创建文件任务显示组件"""
-        task_frame = ctk.CTkFrame(self.file_list_frame, corner_radius=8, fg_color=COLORS['surface'])
-        task_frame.pack(fill="x", pady=2)
-
-        # 文件信息
-        info_frame = ctk.CTkFrame(task_frame, fg_color="transparent")
-        info_frame.pack(fill="x", padx=10, pady=6)
-
-        # 第一行：文件名和状态
-        first_row = ctk.CTkFrame(info_frame, fg_color="transparent")
-        first_row.pack(fill="x")
-
-        # 文件名
-        filename = os.path.basename(task.input_path)
-        name_label = ctk.CTkLabel(
-            first_row,
-            text=filename,
-            font=ctk.CTkFont(size=12, weight="bold"),
-            text_color=COLORS['text_primary'],
-            anchor="w"
-        )
-        name_label.pack(side="left", fill="x", expand=True)
-
-        # 状态标签
-        status_color = {
-            "pending": COLORS['text_secondary'],
-            "processing": COLORS['primary'],
-            "completed": COLORS['success'],
-            "failed": COLORS['error']
-        }.get(task.status, COLORS['text_secondary'])
-
-        status_text = {
-            "pending": "等待中",
-            "processing": "转换中...",
-            "completed": "✅ 完成",
-            "failed": "❌ 失败"
-        }.get(task.status, "未知")
-
-        status_label = ctk.CTkLabel(
-            first_row,
-            text=status_text,
-            font=ctk.CTkFont(size=11),
-            text_color=status_color,
-            width=80
-        )
-        status_label.pack(side="right", padx=(10, 0))
-
-        # 第二行：ICM信息（如果有）
-        if ICM_AVAILABLE and (task.camera_brand or task.icm_applied):
-            second_row = ctk.CTkFrame(info_frame, fg_color="transparent")
-            second_row.pack(fill="x", pady=(2, 0))
-
-            # 相机信息
-            if task.camera_brand and task.camera_model:
-                camera_info = f"📷 {task.camera_brand} {task.camera_model}"
-                camera_label = ctk.CTkLabel(
-                    second_row,
-                    text=camera_info,
-                    font=ctk.CTkFont(size=10),
-                    text_color=COLORS['text_secondary'],
-                    anchor="w"
-                )
-                camera_label.pack(side="left")
-
-            # ICM校色信息
-            if task.icm_applied:
-                icm_info = "🎨 ICM校色已应用"
-                if task.icm_file:
-                    icm_filename = os.path.basename(task.icm_file)
-                    icm_info += f" ({icm_filename})"
-
-                icm_label = ctk.CTkLabel(
-                    second_row,
-                    text=icm_info,
-                    font=ctk.CTkFont(size=10),
-                    text_color=COLORS['primary'],
-                    anchor="w"
-                )
-                icm_label.pack(side="right", padx=(10, 0))
-
-        # 错误信息（如果有）
-        if task.error_message:
-            error_row = ctk.CTkFrame(info_frame, fg_color="transparent")
-            error_row.pack(fill="x", pady=(2, 0))
-
-            error_label = ctk.CTkLabel(
-                error_row,
-                text=f"⚠️ {task.error_message}",
-                font=ctk.CTkFont(size=10),
-                text_color=COLORS['error'],
-                anchor="w"
-            )
-            error_label.pack(fill="x")
-
-    def clear_file_list(self):
-        """清除文件列表"""
-        self.conversion_tasks = []
-
-        # 清除显示
-        for widget in self.file_list_frame.winfo_children():
-            widget.destroy()
-
-        # 显示空状态提示
-        self.empty_label = ctk.CTkLabel(
-            self.file_list_frame,
-            text="暂无文件\n请选择输入文件夹后点击开始转换",
-            font=ctk.CTkFont(size=14),
-            text_color=COLORS['text_secondary']
-        )
-        self.empty_label.pack(expand=True)
-
-        # 重置进度
-        self.progress_bar.set(0)
-        self.progress_label.configure(text="准备就绪")
-        self.progress_count.configure(text="0/0 文件")
-
-    def run(self):
-        """运行应用"""
-        self.root.mainloop()
-
-if __name__ == "__main__":
-    app = ModernConverter()
+#!/usr/bin/env python3
+"""
+现代化RAW to JPEG转换器
+浅色简约界面设计，重点优化转换性能和用户体验
+"""
+
+import tkinter as tk
+from tkinter import filedialog, messagebox
+import os
+import re
+import sys
+import threading
+import multiprocessing
+import concurrent.futures
+import queue
+import time
+from typing import List, Optional, Callable, Tuple, Iterator
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+
+# 导入增强转换器和ICM组件
+try:
+    from enhanced_converter import (EnhancedRAWConverter, ConversionConfig, shutdown_process_pool,
+                                    _available_cpu_count)
+    from icm_manager import get_icm_manager
+    from camera_detector import get_camera_detector
+    ICM_AVAILABLE = True
+except ImportError:
+    ICM_AVAILABLE = False
+    print("警告: ICM功能模块未找到，校色功能将被禁用")
+
+# CustomTkinter在创建界面时才导入，不使用图形界面时无需加载
+ctk = None
+
+def _load_ctk():
+    """导入CustomTkinter并设置为浅色主题（只执行一次）"""
+    global ctk
+    if ctk is None:
+        import customtkinter
+        customtkinter.set_appearance_mode("light")
+        customtkinter.set_default_color_theme("blue")
+        ctk = customtkinter
+    return ctk
+
+# 支持的RAW格式
+SUPPORTED_FORMATS = ['.arw', '.cr2', '.cr3', '.dng', '.nef', '.raw', '.orf', '.rw2', '.pef', '.srw', '.mos']
+SUPPORTED_FORMATS_SET = frozenset(SUPPORTED_FORMATS)
+# 匹配路径末尾的RAW扩展名，用于一次替换为.jpg
+_RAW_EXT_RE = re.compile(r'\.(?:' + '|'.join(re.escape(ext[1:]) for ext in SUPPORTED_FORMATS) + r')$', re.IGNORECASE)
+
+# 色度抽样选项 -> PIL/libjpeg抽样编号
+CHROMA_SUBSAMPLING = {"4:4:4": 0, "4:2:2": 1, "4:2:0": 2}
+# 质量不低于该值时自动使用4:4:4，保留完整色度
+FULL_CHROMA_QUALITY = 95
+
+# 搜索框输入停止多久后再筛选（毫秒）
+SEARCH_DEBOUNCE_MS = 150
+
+# 进度条最短重绘间隔（秒），约30次/秒
+PROGRESS_PAINT_INTERVAL = 0.033
+
+# 转换消息队列容量，主线程处理不及时时限制内存占用
+CONVERSION_QUEUE_SIZE = 256
+
+# 主线程每次最多处理的队列消息数，其余的让出事件循环后继续处理
+QUEUE_DRAIN_BATCH = 128  # 须小于CONVERSION_QUEUE_SIZE，否则分批处理不会触发
+
+def drain_queue(q: queue.Queue, max_n: Optional[int] = None) -> list:
+    """在一次加锁中取出队列里最多max_n条消息（None表示全部），保持先后顺序"""
+    with q.mutex:
+        items = q.queue
+        if max_n is None or max_n >= len(items):
+            batch = list(items)
+            items.clear()
+        else:
+            batch = [items.popleft() for _ in range(max_n)]
+        if batch:
+            q.not_full.notify_all()
+    return batch
+
+# 浅色现代化配色方案
+COLORS = {
+    'primary': '#2196F3',
+    'secondary': '#1976D2',
+    'accent': '#FF6B35',
+    'surface': '#FFFFFF',
+    'surface_variant': '#F5F5F5',
+    'background': '#FAFAFA',
+    'error': '#F44336',
+    'success': '#4CAF50',
+    'warning': '#FF9800',
+    'outline': '#E0E0E0',
+    'text_primary': '#212121',
+    'text_secondary': '#757575'
+}
+
+# Python 3.10+ 的dataclass支持__slots__，大批量文件时每个任务对象更小
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+class TaskStatus(IntEnum):
+    """转换任务状态，数值用作显示文字/颜色元组的下标"""
+    PENDING = 0
+    PROCESSING = 1
+    COMPLETED = 2
+    FAILED = 3
+
+@dataclass(**_DATACLASS_OPTIONS)
+class ConversionTask:
+    """转换任务数据类"""
+    input_path: str
+    output_path: str
+    filename: str = ""  # 输入文件名，创建任务时计算一次供列表显示
+    status: TaskStatus = TaskStatus.PENDING
+    progress: float = 0.0
+    error_message: str = ""
+    file_size: int = 0
+
+    # ICM校色相关信息
+    camera_brand: str = ""
+    camera_model: str = ""
+    icm_applied: bool = False
+    icm_file: str = ""
+    icm_filename: str = ""  # ICM文件名，随结果更新时计算一次
+
+class VirtualFileList:
+    """虚拟化文件列表：只为可见行创建组件，滚动时复用固定数量的行组件"""
+
+    ROW_HEIGHT = 72  # 每行固定高度（像素）
+    ROW_POOL_SIZE = 30  # 行组件池大小，即最多同时显示的行数
+
+    # 按TaskStatus数值索引
+    STATUS_COLORS = (COLORS['text_secondary'], COLORS['primary'], COLORS['success'], COLORS['error'])
+    STATUS_TEXTS = ("等待中", "转换中...", "✅ 完成", "❌ 失败")
+
+    def __init__(self, parent):
+        self.tasks: List[ConversionTask] = []
+        self.first_visible = 0
+
+        self.container = ctk.CTkFrame(parent, corner_radius=8, fg_color=COLORS['surface'], height=300)
+        # 容器尺寸不随显示的行数变化，避免渲染行数与可见高度互相影响
+        self.container.pack_propagate(False)
+        self.scrollbar = ctk.CTkScrollbar(self.container, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", padx=(0, 4), pady=4)
+        self.rows_frame = ctk.CTkFrame(self.container, fg_color="transparent")
+        self.rows_frame.pack(side="left", fill="both", expand=True, padx=6, pady=4)
+
+        # 空状态提示
+        self.empty_label = ctk.CTkLabel(
+            self.rows_frame,
+            text="暂无文件\n请选择输入文件夹后点击开始转换",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_secondary']
+        )
+        self.empty_label.pack(expand=True)
+
+        # 行组件池，创建一次后只修改文字
+        self.rows = [self._create_row() for _ in range(self.ROW_POOL_SIZE)]
+
+        self.rows_frame.bind("<Configure>", lambda event: self.render())
+        # 滚动条自带滚轮处理，只为列表区域绑定
+        self._bind_wheel(self.rows_frame)
+
+    def pack(self, **kwargs):
+        self.container.pack(**kwargs)
+
+    def _create_row(self) -> dict:
+        """创建一个可复用的行组件"""
+        frame = ctk.CTkFrame(self.rows_frame, corner_radius=8, fg_color=COLORS['surface_variant'],
+                             height=self.ROW_HEIGHT - 4)
+        frame.pack_propagate(False)
+
+        info_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        info_frame.pack(fill="x", padx=10, pady=6)
+
+        # 第一行：文件名和状态
+        first_row = ctk.CTkFrame(info_frame, fg_color="transparent")
+        first_row.pack(fill="x")
+        name_label = ctk.CTkLabel(
+            first_row,
+            text="",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=COLORS['text_primary'],
+            anchor="w",
+            height=18
+        )
+        name_label.pack(side="left", fill="x", expand=True)
+        status_label = ctk.CTkLabel(first_row, text="", font=ctk.CTkFont(size=11), width=80, height=18)
+        status_label.pack(side="right", padx=(10, 0))
+
+        # 第二行：相机和ICM信息
+        second_row = ctk.CTkFrame(info_frame, fg_color="transparent")
+        second_row.pack(fill="x")
+        camera_label = ctk.CTkLabel(
+            second_row,
+            text="",
+            font=ctk.CTkFont(size=10),
+            text_color=COLORS['text_secondary'],
+            anchor="w",
+            height=16
+        )
+        camera_label.pack(side="left")
+        icm_label = ctk.CTkLabel(
+            second_row,
+            text="",
+            font=ctk.CTkFont(size=10),
+            text_color=COLORS['primary'],
+            anchor="w",
+            height=16
+        )
+        icm_label.pack(side="right", padx=(10, 0))
+
+        # 第三行：错误信息
+        error_label = ctk.CTkLabel(
+            info_frame,
+            text="",
+            font=ctk.CTkFont(size=10),
+            text_color=COLORS['error'],
+            anchor="w",
+            height=16
+        )
+        error_label.pack(fill="x")
+
+        return {
+            'frame': frame,
+            'index': None,
+            'name': name_label,
+            'status': status_label,
+            'camera': camera_label,
+            'icm': icm_label,
+            'error': error_label
+        }
+
+    def _bind_wheel(self, widget):
+        """为组件及其所有内部tkinter组件绑定鼠标滚轮"""
+        # 直接绑定到每个tkinter组件，CTk组件的bind会再转发给内部组件导致重复触发
+        tk.Misc.bind(widget, "<MouseWheel>", self._on_mousewheel, add="+")
+        tk.Misc.bind(widget, "<Button-4>", lambda event: self.scroll(-1), add="+")
+        tk.Misc.bind(widget, "<Button-5>", lambda event: self.scroll(1), add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+    def _on_scrollbar(self, *args):
+        """滚动条回调：('moveto', 比例) 或 ('scroll', 数量, 单位)"""
+        if args[0] == "moveto":
+            self.first_visible = int(float(args[1]) * len(self.tasks))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.first_visible += step * (self.visible_count() if args[2] == "pages" else 1)
+        self.render()
+
+    def scroll(self, rows: int):
+        self.first_visible += rows
+        self.render()
+
+    def visible_count(self) -> int:
+        """当前高度能显示的行数"""
+        height = self.rows_frame.winfo_height()
+        row_height = self.ROW_HEIGHT * ctk.ScalingTracker.get_widget_scaling(self.rows_frame)
+        return max(1, min(self.ROW_POOL_SIZE, int(height // row_height)))
+
+    def set_tasks(self, tasks: List[ConversionTask]):
+        """设置任务列表并回到顶部"""
+        self.tasks = tasks
+        self.first_visible = 0
+        self.render()
+
+    def render(self):
+        """只渲染可见范围内的行"""
+        total = len(self.tasks)
+        if total:
+            self.empty_label.pack_forget()
+        else:
+            self.empty_label.pack(expand=True)
+
+        visible = self.visible_count()
+        self.first_visible = max(0, min(self.first_visible, total - visible))
+
+        for offset, row in enumerate(self.rows):
+            index = self.first_visible + offset
+            if offset < visible and index < total:
+                self._fill_row(row, self.tasks[index])
+                row['index'] = index
+                if not row['frame'].winfo_manager():
+                    row['frame'].pack(fill="x", pady=2)
+            else:
+                row['index'] = None
+                row['frame'].pack_forget()
+
+        if total:
+            self.scrollbar.set(self.first_visible / total, min(1.0, (self.first_visible + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def refresh_rows(self, indices):
+        """只更新显示指定任务索引的可见行"""
+        for row in self.rows:
+            if row['index'] in indices:
+                self._fill_row(row, self.tasks[row['index']])
+
+    def _fill_row(self, row: dict, task: ConversionTask):
+        """用任务信息更新行组件的文字"""
+        row['name'].configure(text=task.filename)
+        row['status'].configure(
+            text=self.STATUS_TEXTS[task.status],
+            text_color=self.STATUS_COLORS[task.status]
+        )
+
+        camera_info = ""
+        icm_info = ""
+        if ICM_AVAILABLE:
+            # 相机信息
+            if task.camera_brand and task.camera_model:
+                camera_info = f"📷 {task.camera_brand} {task.camera_model}"
+            # ICM校色信息
+            if task.icm_applied:
+                icm_info = "🎨 ICM校色已应用"
+                if task.icm_filename:
+                    icm_info += f" ({task.icm_filename})"
+        row['camera'].configure(text=camera_info)
+        row['icm'].configure(text=icm_info)
+        row['error'].configure(text=f"⚠️ {task.error_message}" if task.error_message else "")
+
+class ModernConverter:
+    """现代化RAW转JPEG转换器主类"""
+
+    def __init__(self):
+        _load_ctk()
+
+        # 创建主窗口
+        self.root = ctk.CTk()
+        self.root.title("RAW to JPEG 现代化转换器")
+        self.root.geometry("1200x800")  # 调整窗口大小以适应文件列表
+        self.root.resizable(True, True)
+
+        # 设置窗口图标和样式
+        self.setup_window_style()
+
+        # 状态变量
+        self.input_folder = tk.StringVar(value="")
+        self.output_folder = tk.StringVar(value="")
+        self.jpeg_quality = tk.IntVar(value=95)
+        self.optimize_huffman = tk.BooleanVar(value=False)  # 哈夫曼表优化需要额外一遍编码，默认关闭
+        self._full_chroma_quality = self.jpeg_quality.get() >= FULL_CHROMA_QUALITY
+        self.jpeg_subsampling = tk.StringVar(value="4:4:4" if self._full_chroma_quality else "4:2:0")
+        # 并行转换进程数，默认使用一半CPU核心，避免占满所有核心导致界面卡顿
+        # 与进程池大小使用同一核心数（遵循CPU亲和性/容器限制）
+        self._cpu_count = _available_cpu_count() if ICM_AVAILABLE else (os.cpu_count() or 1)
+        self.max_workers = tk.IntVar(value=max(1, self._cpu_count // 2))
+        self.is_converting = False
+        self.conversion_thread = None
+        self.converter = None  # 当前批量转换使用的转换器，停止时通知其取消剩余任务
+
+        # ICM校色状态变量
+        self.enable_icm = tk.BooleanVar(value=True if ICM_AVAILABLE else False)
+        self.icm_brand = tk.StringVar(value="")
+        self.icm_model = tk.StringVar(value="")
+        self.icm_scene = tk.StringVar(value="Generic")
+        self.auto_detect_camera = tk.BooleanVar(value=True)
+
+        # ICM搜索和筛选变量
+        self.icm_search_enabled = tk.BooleanVar(value=False)  # 搜索功能默认关闭
+        self.brand_search_var = tk.StringVar(value="")
+        self.model_search_var = tk.StringVar(value="")
+
+        # ICM数据缓存
+        self.all_brands = []
+        self.all_models = {}
+        self._all_brands_lower = []  # 与all_brands一一对应的小写品牌名，搜索时使用
+        self._all_models_lower = {}  # 品牌 -> 与型号一一对应的小写型号名
+        self._brand_search_after_id = None
+        self._model_search_after_id = None
+        self.filtered_brands = []
+        self.filtered_models = {}
+        self._icm_ui_mtime = None  # 当前ICM界面数据对应的ICM目录修改时间
+        # ICM刷新在单个后台线程中串行执行，避免多次刷新同时扫描
+        self._icm_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='icm')
+        self._icm_refresh_future = None
+
+        # ICM组件
+        self.icm_manager = None
+        self.camera_detector = None
+
+        # 任务管理
+        self.conversion_queue = queue.Queue(maxsize=CONVERSION_QUEUE_SIZE)
+        # 工作线程放入消息后通过虚拟事件通知主线程处理，空闲时不轮询
+        self._result_event = "<<ConversionResult>>"
+        self._result_posted = threading.Event()  # 已发出通知、主线程尚未开始处理
+
+        # 后台线程的界面更新消息 (类型, 内容)，由主线程统一处理，同类型只保留最后一条
+        self._ui_msg_q = queue.Queue()
+        self._ui_msg_event = "<<UIMsg>>"
+        self._ui_msg_posted = threading.Event()
+        # 进度消息只保留最新一条，按 PROGRESS_PAINT_INTERVAL 限制重绘频率
+        self._pending_progress = None
+        self._last_paint = 0.0
+        self._progress_after_id = None
+        self.conversion_tasks: List[ConversionTask] = []
+        self._scan_id = 0  # 每次开始转换递增，用于忽略已停止的扫描线程的消息
+        self._scan_roots = ("", "")  # 当前扫描的 (输入根目录, 输出根目录)
+
+        # 初始化ICM组件
+        if ICM_AVAILABLE:
+            self.init_icm_components()
+
+        # 创建UI
+        # 队列有新消息时由虚拟事件触发处理（在创建界面前绑定，界面初始化时即会启动后台ICM扫描）
+        self.root.bind(self._result_event, self.process_queue)
+        self.root.bind(self._ui_msg_event, self._drain_ui_q)
+
+        self.create_widgets()
+
+    def init_icm_components(self):
+        """初始化ICM组件"""
+        try:
+            # 图形界面进程预读ICM文件，转换工作进程中的管理器不预读
+            self.icm_manager = get_icm_manager(preload=True)
+            self.camera_detector = get_camera_detector()
+            print("ICM组件初始化成功")
+        except Exception as e:
+            print(f"ICM组件初始化失败: {str(e)}")
+            self.enable_icm.set(False)
+
+    def setup_window_style(self):
+        """设置窗口样式"""
+        # 设置窗口背景色
+        self.root.configure(fg_color=COLORS['background'])
+
+    def create_widgets(self):
+        """创建所有UI组件"""
+        # 主容器
+        main_container = ctk.CTkFrame(self.root, corner_radius=15, fg_color=COLORS['surface'])
+        main_container.pack(fill="both", expand=True, padx=20, pady=20)
+
+        # 标题区域
+        self.create_header(main_container)
+
+        # 文件选择区域
+        self.create_file_selection(main_container)
+
+        # 设置区域
+        self.create_settings(main_container)
+
+        # 控制按钮区域
+        self.create_controls(main_container)
+
+        # 进度显示区域
+        self.create_progress_section(main_container)
+
+        # 文件列表区域
+        self.create_file_list(main_container)
+
+    def create_header(self, parent):
+        """创建标题区域"""
+        header_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color="transparent")
+        header_frame.pack(fill="x", pady=(0, 20))
+
+        # 标题
+        title_label = ctk.CTkLabel(
+            header_frame,
+            text="🖼️ RAW to JPEG 转换器",
+            font=ctk.CTkFont(size=28, weight="bold"),
+            text_color=COLORS['text_primary']
+        )
+        title_label.pack(anchor="w", pady=(10, 5))
+
+        # 副标题
+        subtitle_label = ctk.CTkLabel(
+            header_frame,
+            text="高性能RAW图像批量转换工具 - 支持主流相机RAW格式",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_secondary']
+        )
+        subtitle_label.pack(anchor="w", pady=(0, 10))
+
+    def create_file_selection(self, parent):
+        """创建文件选择区域"""
+        selection_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
+        selection_frame.pack(fill="x", pady=(0, 20))
+
+        # 输入文件夹选择
+        input_frame = ctk.CTkFrame(selection_frame, fg_color="transparent")
+        input_frame.pack(fill="x", padx=20, pady=(15, 10))
+
+        input_label = ctk.CTkLabel(
+            input_frame,
+            text="📁 输入文件夹:",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=COLORS['text_primary'],
+            width=120
+        )
+        input_label.pack(side="left", padx=(0, 10))
+
+        self.input_entry = ctk.CTkEntry(
+            input_frame,
+            textvariable=self.input_folder,
+            placeholder_text="选择包含RAW文件的文件夹...",
+            font=ctk.CTkFont(size=14),
+            height=40
+        )
+        self.input_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        input_browse_btn = ctk.CTkButton(
+            input_frame,
+            text="浏览",
+            command=self.browse_input_folder,
+            width=80,
+            height=40,
+            fg_color=COLORS['primary'],
+            hover_color=COLORS['secondary']
+        )
+        input_browse_btn.pack(side="right")
+
+        # 输出文件夹选择
+        output_frame = ctk.CTkFrame(selection_frame, fg_color="transparent")
+        output_frame.pack(fill="x", padx=20, pady=(10, 15))
+
+        output_label = ctk.CTkLabel(
+            output_frame,
+            text="📁 输出文件夹:",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=COLORS['text_primary'],
+            width=120
+        )
+        output_label.pack(side="left", padx=(0, 10))
+
+        self.output_entry = ctk.CTkEntry(
+            output_frame,
+            textvariable=self.output_folder,
+            placeholder_text="选择输出JPEG文件的文件夹...",
+            font=ctk.CTkFont(size=14),
+            height=40
+        )
+        self.output_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+
+        output_browse_btn = ctk.CTkButton(
+            output_frame,
+            text="浏览",
+            command=self.browse_output_folder,
+            width=80,
+            height=40,
+            fg_color=COLORS['primary'],
+            hover_color=COLORS['secondary']
+        )
+        output_browse_btn.pack(side="right")
+
+    def create_settings(self, parent):
+        """创建设置区域"""
+        settings_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
+        settings_frame.pack(fill="x", pady=(0, 20))
+
+        # JPEG质量设置
+        quality_frame = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        quality_frame.pack(fill="x", padx=20, pady=15)
+
+        quality_label = ctk.CTkLabel(
+            quality_frame,
+            text="🎯 JPEG质量:",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=COLORS['text_primary'],
+            width=120
+        )
+        quality_label.pack(side="left", padx=(0, 15))
+
+        # 质量滑块
+        self.quality_slider = ctk.CTkSlider(
+            quality_frame,
+            from_=60,
+            to=100,
+            number_of_steps=40,
+            variable=self.jpeg_quality,
+            width=200,
+            height=20,
+            progress_color=COLORS['primary']
+        )
+        self.quality_slider.pack(side="left", padx=(0, 15))
+
+        self.quality_label = ctk.CTkLabel(
+            quality_frame,
+            text=f"{self.jpeg_quality.get()}%",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            text_color=COLORS['primary'],
+            width=40
+        )
+        self.quality_label.pack(side="left")
+
+        # 绑定质量滑块变化事件
+        self.quality_slider.configure(command=self.update_quality_label)
+
+        # 哈夫曼表优化（文件略小，编码更慢）
+        optimize_cb = ctk.CTkCheckBox(
+            quality_frame,
+            text="优化哈夫曼表 (文件略小，速度较慢)",
+            variable=self.optimize_huffman,
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_primary']
+        )
+        optimize_cb.pack(side="left", padx=(20, 0))
+
+        # 色度抽样（4:2:0编码数据量更少、文件更小）
+        subsampling_label = ctk.CTkLabel(
+            quality_frame,
+            text="色度抽样:",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_primary']
+        )
+        subsampling_label.pack(side="left", padx=(20, 5))
+
+        subsampling_menu = ctk.CTkOptionMenu(
+            quality_frame,
+            values=list(CHROMA_SUBSAMPLING),
+            variable=self.jpeg_subsampling,
+            width=90,
+            height=32
+        )
+        subsampling_menu.pack(side="left")
+
+        # 并行进程数设置
+        workers_frame = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        workers_frame.pack(fill="x", padx=20, pady=(0, 15))
+
+        workers_title = ctk.CTkLabel(
+            workers_frame,
+            text="⚙️ 并行进程:",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=COLORS['text_primary'],
+            width=120
+        )
+        workers_title.pack(side="left", padx=(0, 15))
+
+        workers_slider = ctk.CTkSlider(
+            workers_frame,
+            from_=1,
+            to=max(2, self._cpu_count),  # 单核时滑块仍需有效范围
+            number_of_steps=max(1, self._cpu_count - 1),
+            variable=self.max_workers,
+            command=self.update_workers_label,
+            width=200,
+            height=20,
+            progress_color=COLORS['primary']
+        )
+        workers_slider.pack(side="left", padx=(0, 15))
+        if self._cpu_count == 1:
+            workers_slider.configure(state="disabled")
+
+        self.workers_label = ctk.CTkLabel(
+            workers_frame,
+            text=f"{self.max_workers.get()}/{self._cpu_count}",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            text_color=COLORS['primary'],
+            width=40
+        )
+        self.workers_label.pack(side="left")
+
+        # ICM校色设置 (仅在ICM可用时显示)
+        if ICM_AVAILABLE:
+            self.create_icm_settings(settings_frame)
+
+        # 支持格式说明
+        format_info = ctk.CTkLabel(
+            settings_frame,
+            text=f"支持格式: {', '.join([fmt.upper() for fmt in SUPPORTED_FORMATS])}",
+            font=ctk.CTkFont(size=12),
+            text_color=COLORS['text_secondary']
+        )
+        format_info.pack(padx=20, pady=(0, 15))
+
+    def create_icm_settings(self, parent):
+        """创建ICM校色设置区域"""
+        icm_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
+        icm_frame.pack(fill="x", pady=(10, 0))
+
+        # 标题
+        title_label = ctk.CTkLabel(
+            icm_frame,
+            text="🎨 相机校色设置 (ICM)",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=COLORS['text_primary']
+        )
+        title_label.pack(anchor="w", padx=20, pady=(15, 10))
+
+        # 启用ICM校色选项
+        enable_frame = ctk.CTkFrame(icm_frame, fg_color="transparent")
+        enable_frame.pack(fill="x", padx=20, pady=(0, 10))
+
+        enable_cb = ctk.CTkCheckBox(
+            enable_frame,
+            text="启用相机校色 (提升色彩准确性)",
+            variable=self.enable_icm,
+            command=self.on_icm_toggled,
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_primary']
+        )
+        enable_cb.pack(side="left")
+
+        # 自动检测相机选项
+        auto_detect_cb = ctk.CTkCheckBox(
+            enable_frame,
+            text="自动检测相机型号",
+            variable=self.auto_detect_camera,
+            command=self.on_auto_detect_toggled,
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_primary']
+        )
+        auto_detect_cb.pack(side="left", padx=(20, 0))
+
+        # 搜索功能开关
+        search_cb = ctk.CTkCheckBox(
+            enable_frame,
+            text="启用搜索筛选",
+            variable=self.icm_search_enabled,
+            command=self.on_search_toggled,
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_primary']
+        )
+        search_cb.pack(side="left", padx=(20, 0))
+
+        # 手动选择区域 (使用滚动框架)
+        self.manual_selection_frame = ctk.CTkFrame(icm_frame, fg_color="transparent")
+        self.manual_selection_frame.pack(fill="x", padx=20, pady=(10, 15))
+
+        # 创建可滚动的容器
+        self.scrollable_frame = ctk.CTkScrollableFrame(
+            self.manual_selection_frame,
+            height=250,  # 限制高度
+            fg_color="transparent"
+        )
+        self.scrollable_frame.pack(fill="both", expand=True)
+
+        # 搜索区域
+        self.search_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
+        self.search_frame.pack(fill="x", pady=(0, 10))
+
+        # 品牌搜索
+        brand_search_frame = ctk.CTkFrame(self.search_frame, fg_color="transparent")
+        brand_search_frame.pack(fill="x", pady=(0, 5))
+
+        brand_search_label = ctk.CTkLabel(brand_search_frame, text="品牌搜索:", width=80, font=ctk.CTkFont(size=12))
+        brand_search_label.pack(side="left")
+
+        self.brand_search_entry = ctk.CTkEntry(
+            brand_search_frame,
+            textvariable=self.brand_search_var,
+            placeholder_text="输入品牌名称搜索...",
+            width=200,
+            height=28
+        )
+        self.brand_search_entry.pack(side="left", padx=(10, 10))
+        self.brand_search_entry.bind("<KeyRelease>", self.on_brand_search_changed)
+
+        # 型号搜索
+        model_search_frame = ctk.CTkFrame(self.search_frame, fg_color="transparent")
+        model_search_frame.pack(fill="x")
+
+        model_search_label = ctk.CTkLabel(model_search_frame, text="型号搜索:", width=80, font=ctk.CTkFont(size=12))
+        model_search_label.pack(side="left")
+
+        self.model_search_entry = ctk.CTkEntry(
+            model_search_frame,
+            textvariable=self.model_search_var,
+            placeholder_text="输入型号名称搜索...",
+            width=200,
+            height=28
+        )
+        self.model_search_entry.pack(side="left", padx=(10, 10))
+        self.model_search_entry.bind("<KeyRelease>", self.on_model_search_changed)
+
+        # 选择区域
+        self.selection_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
+        self.selection_frame.pack(fill="both", expand=True)
+
+        # 第一行：品牌和场景选择
+        first_row = ctk.CTkFrame(self.selection_frame, fg_color="transparent")
+        first_row.pack(fill="x", pady=(0, 10))
+
+        # 品牌选择 (使用Combobox替代OptionMenu以支持滚动)
+        brand_label = ctk.CTkLabel(first_row, text="品牌:", width=60, font=ctk.CTkFont(size=14))
+        brand_label.pack(side="left")
+
+        self.brand_combobox = ctk.CTkComboBox(
+            first_row,
+            values=["请先扫描ICM文件"],
+            variable=self.icm_brand,
+            command=self.on_brand_selected,
+            width=150,
+            height=28
+        )
+        self.brand_combobox.pack(side="left", padx=(10, 20))
+
+        # 场景选择
+        scene_label = ctk.CTkLabel(first_row, text="场景:", width=60, font=ctk.CTkFont(size=14))
+        scene_label.pack(side="left")
+
+        self.scene_menu = ctk.CTkOptionMenu(
+            first_row,
+            values=["Generic", "Flat", "Landscape", "Monochrome",
+                   "Neutral", "Portrait", "Standard", "Vivid", "ProStandard"],
+            variable=self.icm_scene,
+            width=120,
+            height=32
+        )
+        self.scene_menu.pack(side="left", padx=(10, 0))
+
+        # 第二行：型号选择和刷新按钮
+        second_row = ctk.CTkFrame(self.selection_frame, fg_color="transparent")
+        second_row.pack(fill="x", pady=(10, 0))
+
+        # 型号选择 (使用Combobox)
+        model_label = ctk.CTkLabel(second_row, text="型号:", width=60, font=ctk.CTkFont(size=14))
+        model_label.pack(side="left")
+
+        self.model_combobox = ctk.CTkComboBox(
+            second_row,
+            values=["请先选择品牌"],
+            variable=self.icm_model,
+            command=self.on_model_selected,
+            width=300,  # 加宽以显示完整型号名称
+            height=28
+        )
+        self.model_combobox.pack(side="left", padx=(10, 20))
+
+        # 刷新按钮
+        refresh_btn = ctk.CTkButton(
+            second_row,
+            text="刷新ICM列表",
+            command=self.refresh_icm_list,
+            width=120,
+            height=32,
+            fg_color=COLORS['primary'],
+            hover_color=COLORS['secondary']
+        )
+        refresh_btn.pack(side="right")
+
+        # 初始状态
+        self.on_icm_toggled()
+        self.on_search_toggled()
+
+        # 异步刷新ICM列表
+        self.root.after(100, self.async_refresh_icm_list)
+
+        # 状态显示
+        self.icm_status_label = ctk.CTkLabel(
+            icm_frame,
+            text="正在扫描ICM文件...",
+            font=ctk.CTkFont(size=12),
+            text_color=COLORS['text_secondary']
+        )
+        self.icm_status_label.pack(anchor="w", padx=20, pady=(0, 15))
+
+    def on_icm_toggled(self):
+        """ICM校色开关状态改变"""
+        enabled = self.enable_icm.get()
+        state = "normal" if enabled else "disabled"
+
+        # 更新手动选择控件状态
+        if not self.auto_detect_camera.get():
+            self.update_manual_selection_state(state)
+
+        # 如果启用，立即刷新ICM列表
+        if enabled:
+            self.async_refresh_icm_list()
+
+    def on_auto_detect_toggled(self):
+        """自动检测开关状态改变"""
+        auto_enabled = self.auto_detect_camera.get()
+        icm_enabled = self.enable_icm.get()
+
+        if icm_enabled:
+            if auto_enabled:
+                # 自动检测模式，禁用手动选择
+                self.update_manual_selection_state("disabled")
+            else:
+                # 手动选择模式，启用手动选择
+                self.update_manual_selection_state("normal")
+
+    def on_search_toggled(self):
+        """搜索功能开关状态改变"""
+        search_enabled = self.icm_search_enabled.get()
+
+        if hasattr(self, 'search_frame'):
+            if search_enabled:
+                self.search_frame.pack(fill="x", pady=(0, 10))
+            else:
+                self.search_frame.pack_forget()
+
+    def on_brand_search_changed(self, event=None):
+        """品牌搜索内容改变（停止输入后再筛选）"""
+        if self._brand_search_after_id is not None:
+            self.root.after_cancel(self._brand_search_after_id)
+        self._brand_search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self._do_brand_filter)
+
+    def _do_brand_filter(self):
+        """按品牌搜索内容筛选品牌列表"""
+        self._brand_search_after_id = None
+        if not self.icm_search_enabled.get() or not hasattr(self, 'all_brands'):
+            return
+
+        search_text = self.brand_search_var.get().lower()
+        if search_text:
+            self.filtered_brands = [brand for brand, brand_lower in zip(self.all_brands, self._all_brands_lower)
+                                    if search_text in brand_lower]
+        else:
+            self.filtered_brands = list(self.all_brands)
+
+        # 更新combobox
+        self.brand_combobox.configure(values=self.filtered_brands)
+
+        # 如果当前选择不在筛选结果中，清空选择
+        current_brand = self.icm_brand.get()
+        if current_brand and current_brand not in self.filtered_brands:
+            self.icm_brand.set("")
+            self.update_model_list("")  # 清空型号列表
+
+    def on_model_search_changed(self, event=None):
+        """型号搜索内容改变（停止输入后再筛选）"""
+        if self._model_search_after_id is not None:
+            self.root.after_cancel(self._model_search_after_id)
+        self._model_search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self._do_model_filter)
+
+    def _do_model_filter(self):
+        """按型号搜索内容筛选当前品牌的型号列表"""
+        self._model_search_after_id = None
+        if not self.icm_search_enabled.get() or not hasattr(self, 'all_models'):
+            return
+
+        current_brand = self.icm_brand.get()
+        search_text = self.model_search_var.get().lower()
+
+        if current_brand and current_brand in self.all_models:
+            all_brand_models = self.all_models[current_brand]
+            if search_text:
+                self.filtered_models[current_brand] = [
+                    model for model, model_lower in zip(all_brand_models, self._all_models_lower[current_brand])
+                    if search_text in model_lower
+                ]
+            else:
+                self.filtered_models[current_brand] = list(all_brand_models)
+        else:
+            self.filtered_models = {}
+
+        # 更新combobox
+        if current_brand in self.filtered_models:
+            self.model_combobox.configure(values=self.filtered_models[current_brand])
+        else:
+            self.model_combobox.configure(values=[])
+
+        # 如果当前选择不在筛选结果中，清空选择
+        current_model = self.icm_model.get()
+        if current_model and current_brand in self.filtered_models:
+            if current_model not in self.filtered_models[current_brand]:
+                self.icm_model.set("")
+
+    def update_manual_selection_state(self, state):
+        """更新手动选择控件状态"""
+        self.brand_combobox.configure(state=state)
+        self.model_combobox.configure(state=state)
+        self.scene_menu.configure(state=state)
+
+        # 同时更新搜索控件状态
+        if hasattr(self, 'brand_search_entry'):
+            self.brand_search_entry.configure(state=state)
+        if hasattr(self, 'model_search_entry'):
+            self.model_search_entry.configure(state=state)
+
+    def on_brand_selected(self, brand):
+        """品牌选择变化"""
+        if not brand or brand == "请先扫描ICM文件":
+            return
+
+        # 清空型号搜索
+        self.model_search_var.set("")
+        # 更新型号列表
+        self.update_model_list(brand)
+
+    def on_model_selected(self, model):
+        """型号选择变化"""
+        # 这里可以添加型号选择后的处理逻辑
+        # 比如显示该型号支持的ICM场景等
+        pass
+
+    def update_model_list(self, brand):
+        """更新型号列表"""
+        if not self.icm_manager:
+            return
+
+        try:
+            # 如果启用了搜索，使用筛选后的数据
+            if self.icm_search_enabled.get() and brand in self.filtered_models:
+                models = self.filtered_models[brand]
+            else:
+                models = self.icm_manager.get_available_models(brand)
+
+            if models:
+                self.model_combobox.configure(values=models)
+                # 优先选择第一个型号
+                if models and (not self.icm_model.get() or self.icm_model.get() not in models):
+                    self.icm_model.set(models[0])
+            else:
+                self.model_combobox.configure(values=["该品牌暂无型号"])
+                self.icm_model.set("")
+        except Exception as e:
+            print(f"更新型号列表失败: {str(e)}")
+            self.model_combobox.configure(values=["加载失败"])
+            self.icm_model.set("")
+
+    def async_refresh_icm_list(self, force: bool = False):
+        """
+        异步刷新ICM文件列表
+
+        Args:
+            force: 为False时ICM目录未变化则保留当前界面数据，不重新扫描和更新UI；
+                   已有刷新在进行时直接返回
+        """
+        if not force and self._icm_refresh_future and not self._icm_refresh_future.done():
+            return
+        self._icm_refresh_future = self._icm_executor.submit(self._icm_refresh_worker, force)
+
+    def _icm_refresh_worker(self, force: bool):
+        """ICM刷新后台任务"""
+        try:
+            if self.icm_manager:
+                try:
+                    mtime_ns = os.stat(self.icm_manager.icm_directory).st_mtime_ns
+                except OSError:
+                    mtime_ns = None
+
+                if not force and mtime_ns is not None and mtime_ns == self._icm_ui_mtime:
+                    return
+
+                self.icm_manager.refresh_icm_database()
+                self._icm_ui_mtime = mtime_ns
+                # 在主线程中更新UI
+                self.post_ui_message("icm_refreshed")
+        except Exception as e:
+            print(f"刷新ICM列表失败: {str(e)}")
+            self.post_ui_message("status", f"ICM扫描失败: {str(e)}")
+
+    def refresh_icm_list(self):
+        """刷新ICM文件列表"""
+        self.icm_status_label.configure(text="正在扫描ICM文件...")
+        self.async_refresh_icm_list(force=True)
+
+    def update_icm_ui(self):
+        """更新ICM相关UI"""
+        if not self.icm_manager:
+            self.icm_status_label.configure(text="ICM管理器未初始化")
+            return
+
+        try:
+            # 获取统计信息
+            stats = self.icm_manager.get_statistics()
+            self.icm_status_label.configure(
+                text=f"已发现 {stats['brands']} 个品牌，{stats['models']} 个型号，{stats['icm_files']} 个ICM文件"
+            )
+
+            # 获取并缓存所有数据
+            self.all_brands = self.icm_manager.get_available_brands()
+            self.all_models = self.icm_manager.get_all_models()
+
+            # 预先计算小写名称，搜索时每次按键不再逐个转换
+            self._all_brands_lower = [brand.lower() for brand in self.all_brands]
+            self._all_models_lower = {
+                brand: [model.lower() for model in models] for brand, models in self.all_models.items()
+            }
+
+            # 初始化筛选数据
+            self.filtered_brands = list(self.all_brands)
+            self.filtered_models = self.all_models.copy()
+
+            # 更新品牌combobox
+            if self.all_brands:
+                self.brand_combobox.configure(values=self.filtered_brands)
+                if not self.icm_brand.get() or self.icm_brand.get() not in self.filtered_brands:
+                    self.icm_brand.set(self.filtered_brands[0])
+                    self.update_model_list(self.filtered_brands[0])
+            else:
+                self.brand_combobox.configure(values=["未找到ICM文件"])
+                self.icm_brand.set("")
+
+        except Exception as e:
+            self.icm_status_label.configure(text=f"UI更新失败: {str(e)}")
+
+    def create_controls(self, parent):
+        """创建控制按钮区域"""
+        controls_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
+        controls_frame.pack(fill="x", pady=(0, 20))
+
+        # 按钮容器
+        button_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
+        button_frame.pack(pady=20)
+
+        # 开始转换按钮
+        self.start_btn = ctk.CTkButton(
+            button_frame,
+            text="🚀 开始转换",
+            command=self.start_conversion,
+            width=150,
+            height=45,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            fg_color=COLORS['success'],
+            hover_color="#45a049"
+        )
+        self.start_btn.pack(side="left", padx=(0, 10))
+
+        # 停止转换按钮
+        self.stop_btn = ctk.CTkButton(
+            button_frame,
+            text="🛑 停止",
+            command=self.stop_conversion,
+            width=120,
+            height=45,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            fg_color=COLORS['error'],
+            hover_color="#d32f2f",
+            state="disabled"
+        )
+        self.stop_btn.pack(side="left", padx=(0, 10))
+
+        # 清除列表按钮
+        clear_btn = ctk.CTkButton(
+            button_frame,
+            text="🗑️ 清除列表",
+            command=self.clear_file_list,
+            width=120,
+            height=45,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            fg_color=COLORS['warning'],
+            hover_color="#f57c00"
+        )
+        clear_btn.pack(side="left")
+
+    def create_progress_section(self, parent):
+        """创建进度显示区域"""
+        progress_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
+        progress_frame.pack(fill="x", pady=(0, 20))
+
+        # 进度条容器
+        progress_container = ctk.CTkFrame(progress_frame, fg_color="transparent")
+        progress_container.pack(fill="x", padx=20, pady=15)
+
+        # 进度条
+        self.progress_bar = ctk.CTkProgressBar(
+            progress_container,
+            height=25,
+            corner_radius=12,
+            progress_color=COLORS['primary']
+        )
+        self.progress_bar.pack(fill="x", pady=(0, 10))
+        self.progress_bar.set(0)
+
+        # 进度信息
+        progress_info = ctk.CTkFrame(progress_container, fg_color="transparent")
+        progress_info.pack(fill="x")
+
+        self.progress_label = ctk.CTkLabel(
+            progress_info,
+            text="准备就绪",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            text_color=COLORS['text_primary']
+        )
+        self.progress_label.pack(side="left")
+
+        self.progress_count = ctk.CTkLabel(
+            progress_info,
+            text="0/0 文件",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS['text_secondary']
+        )
+        self.progress_count.pack(side="right")
+
+    def create_file_list(self, parent):
+        """创建文件列表区域"""
+        list_frame = ctk.CTkFrame(parent, corner_radius=12, fg_color=COLORS['surface_variant'])
+        list_frame.pack(fill="both", expand=True, pady=(0, 0))
+
+        # 列表标题
+        list_header = ctk.CTkFrame(list_frame, corner_radius=10, fg_color=COLORS['primary'])
+        list_header.pack(fill="x", padx=1, pady=(1, 10))
+
+        header_label = ctk.CTkLabel(
+            list_header,
+            text="📋 文件列表",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color="white",
+            height=30
+        )
+        header_label.pack(pady=10)
+
+        # 文件列表容器（虚拟化滚动区域，大量文件时只创建可见行）
+        self.file_list = VirtualFileList(list_frame)
+        self.file_list.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    def update_quality_label(self, value):
+        """更新质量标签"""
+        self.quality_label.configure(text=f"{int(value)}%")
+        # 质量跨过阈值时自动切换：高质量使用4:4:4，否则使用4:2:0；未跨过时保留手动选择
+        full_chroma = int(value) >= FULL_CHROMA_QUALITY
+        if full_chroma != self._full_chroma_quality:
+            self._full_chroma_quality = full_chroma
+            self.jpeg_subsampling.set("4:4:4" if full_chroma else "4:2:0")
+
+    def update_workers_label(self, value):
+        """更新并行进程数标签"""
+        self.workers_label.configure(text=f"{int(value)}/{self._cpu_count}")
+
+    def get_max_workers(self) -> int:
+        """当前并行进程数，限制在 [1, CPU核心数]"""
+        return min(max(1, int(self.max_workers.get())), self._cpu_count)
+
+    def browse_input_folder(self):
+        """浏览输入文件夹"""
+        folder = filedialog.askdirectory(title="选择包含RAW文件的文件夹")
+        if folder:
+            self.input_folder.set(folder)
+            # 自动设置输出文件夹
+            if not self.output_folder.get():
+                output_folder = os.path.join(folder, "JPEG")
+                self.output_folder.set(output_folder)
+
+    def browse_output_folder(self):
+        """浏览输出文件夹"""
+        folder = filedialog.askdirectory(title="选择输出文件夹")
+        if folder:
+            self.output_folder.set(folder)
+
+    def scan_raw_files(self) -> List[Tuple[str, int]]:
+        """扫描输入文件夹中的RAW文件，返回按路径排序的 (文件路径, 文件大小) 列表"""
+        input_folder = self.input_folder.get()
+        if not input_folder or not os.path.exists(input_folder):
+            return []
+
+        try:
+            raw_files = list(self._iter_raw_files(input_folder))
+        except Exception as e:
+            messagebox.showerror("错误", f"扫描文件夹时出错: {str(e)}")
+            return []
+
+        raw_files.sort()
+        return raw_files
+
+    def _iter_raw_files(self, input_folder: str) -> Iterator[Tuple[str, int]]:
+        """逐个产出输入文件夹中的RAW文件 (文件路径, 文件大小)，顺序为目录遍历顺序"""
+        pending_dirs = [input_folder]
+        while pending_dirs:
+            directory = pending_dirs.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        # 与os.walk一致：不进入符号链接指向的目录
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_dirs.append(entry.path)
+                        elif self._is_raw_filename(entry.name) and entry.is_file():
+                            # 复用scandir得到的文件信息，不再单独获取文件大小
+                            yield entry.path, entry.stat().st_size
+            except OSError:
+                # 与os.walk一致：跳过无法访问的目录
+                continue
+
+    def _scan_worker(self, scan_id: int, input_folder: str):
+        """后台扫描线程：每发现一个RAW文件就放入队列，界面可以边扫描边显示"""
+        try:
+            for raw_file, file_size in self._iter_raw_files(input_folder):
+                if not self.is_converting or scan_id != self._scan_id:
+                    # 已停止或已开始新的扫描
+                    return
+                self.post_message(("file", (scan_id, raw_file, file_size)))
+        except Exception as e:
+            self.post_message(("scan_error", (scan_id, str(e))))
+            return
+        self.post_message(("scan_done", scan_id))
+
+    @staticmethod
+    def _is_raw_filename(name: str) -> bool:
+        """判断文件名是否为支持的RAW格式"""
+        # 只取扩展名转小写后查集合，不逐个比较所有格式
+        dot = name.rfind('.')
+        return dot >= 0 and name[dot:].lower() in SUPPORTED_FORMATS_SET
+
+    def create_file_task(self, raw_file: str, file_size: int, in_root: str, out_root: str) -> ConversionTask:
+        """
+        创建转换任务
+
+        Args:
+            raw_file: RAW文件路径（由扫描得到，以in_root开头）
+            file_size: 文件大小
+            in_root: 以路径分隔符结尾的输入文件夹
+            out_root: 输出文件夹
+        """
+        # 生成输出文件路径：扫描得到的路径以输入文件夹开头，直接截取相对路径
+        if raw_file.startswith(in_root):
+            relative_path = raw_file[len(in_root):]
+        else:
+            relative_path = os.path.relpath(raw_file, in_root)
+        jpeg_relative_path, replaced = _RAW_EXT_RE.subn('.jpg', relative_path)
+        if not replaced:
+            jpeg_relative_path = os.path.splitext(relative_path)[0] + '.jpg'
+        output_path = os.path.join(out_root, jpeg_relative_path)
+
+        return ConversionTask(
+            input_path=raw_file,
+            output_path=output_path,
+            filename=os.path.basename(raw_file),
+            file_size=file_size
+        )
+
+    def start_conversion(self):
+        """开始转换"""
+        # 验证输入
+        if not self.input_folder.get():
+            messagebox.showwarning("警告", "请选择输入文件夹")
+            return
+
+        if not self.output_folder.get():
+            messagebox.showwarning("警告", "请选择输出文件夹")
+            return
+
+        # 输入输出根目录只取一次，扫描到的文件逐个创建任务
+        self._scan_roots = (os.path.join(self.input_folder.get(), ""), self.output_folder.get())
+        self.conversion_tasks = []
+
+        # 更新UI状态
+        self.is_converting = True
+        self.start_btn.configure(state="disabled")
+        self.stop_btn.configure(state="normal")
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="正在扫描文件...")
+
+        # 更新文件列表显示（扫描过程中逐步增加）
+        self.update_file_list_display()
+
+        # 在后台线程扫描文件，界面不等待整个目录遍历完成
+        self._scan_id += 1
+        threading.Thread(
+            target=self._scan_worker,
+            args=(self._scan_id, self.input_folder.get()),
+            daemon=True
+        ).start()
+
+    def on_file_found(self, data):
+        """扫描线程发现RAW文件：创建任务并加入列表"""
+        scan_id, raw_file, file_size = data
+        if scan_id != self._scan_id or not self.is_converting:
+            return
+        self.conversion_tasks.append(self.create_file_task(raw_file, file_size, *self._scan_roots))
+
+    def on_scan_done(self, scan_id):
+        """扫描完成：排序任务并启动转换线程"""
+        if scan_id != self._scan_id or not self.is_converting:
+            return
+
+        if not self.conversion_tasks:
+            self.is_converting = False
+            self.start_btn.configure(state="normal")
+            self.stop_btn.configure(state="disabled")
+            self.progress_label.configure(text="准备就绪")
+            messagebox.showwarning("警告", "在输入文件夹中未找到RAW文件")
+            return
+
+        # 与一次性扫描的结果顺序一致
+        self.conversion_tasks.sort(key=lambda task: task.input_path)
+        self.update_file_list_display()
+        self.progress_label.configure(text="准备转换...")
+
+        # 启动转换线程
+        self.conversion_thread = threading.Thread(
+            target=self.conversion_worker,
+            args=(self._scan_id, self.conversion_tasks),
+            daemon=True
+        )
+        self.conversion_thread.start()
+
+    def on_scan_error(self, data):
+        """扫描线程出错"""
+        scan_id, error = data
+        if scan_id != self._scan_id or not self.is_converting:
+            return
+
+        self.is_converting = False
+        self.start_btn.configure(state="normal")
+        self.stop_btn.configure(state="disabled")
+        self.progress_label.configure(text="准备就绪")
+        messagebox.showerror("错误", f"扫描文件夹时出错: {error}")
+
+    def stop_conversion(self):
+        """停止转换"""
+        self.is_converting = False
+        if self.converter:
+            # 取消进程池中尚未开始的任务
+            self.converter.stop_conversion()
+        # 丢弃尚未绘制的进度，避免覆盖停止状态
+        self._pending_progress = None
+        if self._progress_after_id is not None:
+            self.root.after_cancel(self._progress_after_id)
+            self._progress_after_id = None
+        self.start_btn.configure(state="normal")
+        self.stop_btn.configure(state="disabled")
+        self.progress_label.configure(text="转换已停止")
+
+    def conversion_worker(self, batch_id: int, tasks: List[ConversionTask]):
+        """
+        转换工作线程
+
+        Args:
+            batch_id: 本批次的扫描编号；停止后重新开始时编号变化，旧线程不再更新界面
+            tasks: 本批次的任务列表（重新开始时conversion_tasks会被替换）
+        """
+        def is_current():
+            return self.is_converting and batch_id == self._scan_id
+
+        # 创建转换器配置
+        config = ConversionConfig(
+            jpeg_quality=self.jpeg_quality.get(),
+            jpeg_optimize=self.optimize_huffman.get(),
+            jpeg_subsampling=CHROMA_SUBSAMPLING[self.jpeg_subsampling.get()],
+            use_camera_wb=True,
+            use_auto_wb=False,
+            output_bps=8,
+            bright=1.0,
+            no_auto_bright=False,
+            half_size=False,
+            exp_preserve_highlights=True,
+            four_color_rgb=False,
+            max_threads=self.get_max_workers(),
+            # ICM配置
+            enable_icm_correction=self.enable_icm.get(),
+            icm_brand=self.icm_brand.get(),
+            icm_model=self.icm_model.get(),
+            icm_scene=self.icm_scene.get(),
+            manual_icm_path=None,
+            strict_icm=True,
+            auto_detect_camera=self.auto_detect_camera.get()
+        )
+
+        # 创建增强转换器
+        converter = EnhancedRAWConverter(config)
+        self.converter = converter
+
+        # 准备文件列表
+        input_files = [task.input_path for task in tasks]
+        output_dir = self.output_folder.get()
+
+        # 设置进度回调
+        def progress_callback(completed, total):
+            if is_current():
+                progress_percent = completed / total if total > 0 else 0
+                completed_count = completed
+
+                self.post_message(("progress", {
+                    "percent": progress_percent,
+                    "completed": completed_count,
+                    "total": total,
+                    "current_file": "处理中..." if completed < total else "转换完成"
+                }))
+
+        # 设置状态回调
+        def status_callback(message):
+            if is_current():
+                self.post_message(("status", message))
+
+        converter.set_progress_callback(progress_callback)
+        converter.set_status_callback(status_callback)
+
+        completed_count = 0
+        try:
+            # 执行批量转换：进程池中任一文件完成即更新对应任务
+            for index, result in converter.convert_batch_iter(input_files, output_dir,
+                                                              input_root=self.input_folder.get()):
+                if not is_current():
+                    # 已停止（或已开始新的批次），结束迭代并取消剩余任务
+                    break
+                task = tasks[index]
+                self.apply_result_to_task(task, result)
+                if task.status == TaskStatus.COMPLETED:
+                    completed_count += 1
+                self.post_message(("update_task", index))
+
+            if not is_current():
+                # 用户已停止转换，界面状态已在stop_conversion中恢复
+                return
+
+            # 转换完成
+            total_files = len(tasks)
+            failed_count = total_files - completed_count
+            self.post_message(("completed", {
+                "total": total_files,
+                "completed": completed_count,
+                "failed": failed_count
+            }))
+
+        except Exception as e:
+            # 转换失败
+            if not is_current():
+                return
+            error_msg = str(e)
+            for index, task in enumerate(tasks):
+                if task.status == TaskStatus.PROCESSING:
+                    task.status = TaskStatus.FAILED
+                    task.error_message = error_msg
+                    self.post_message(("update_task", index))
+
+            self.post_message(("error", {
+                "file": "批量转换",
+                "error": error_msg
+            }))
+        finally:
+            # 新批次可能已设置自己的转换器
+            if self.converter is converter:
+                self.converter = None
+
+    @staticmethod
+    def apply_result_to_task(task: ConversionTask, result):
+        """用转换结果更新任务信息"""
+        completed = result.status == "completed"
+        task.status = TaskStatus.COMPLETED if completed else TaskStatus.FAILED
+        task.progress = 100.0 if completed else 0.0
+        task.error_message = result.error_message
+        task.camera_brand = result.camera_brand
+        task.camera_model = result.camera_model
+        task.icm_applied = result.icm_applied
+        task.icm_file = result.icm_file
+        task.icm_filename = os.path.basename(result.icm_file) if result.icm_file else ""
+
+    def post_message(self, message):
+        """工作线程放入队列消息，并通知主线程处理"""
+        q = self.conversion_queue
+        if message[0] == "progress":
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # 队列已满时丢弃尚未处理的旧进度，只保留最新一条
+                with q.mutex:
+                    kept = [item for item in q.queue if item[0] != "progress"]
+                    dropped = len(q.queue) - len(kept)
+                    if dropped:
+                        q.queue.clear()
+                        q.queue.extend(kept)
+                        q.not_full.notify(dropped)
+                q.put(message)
+        else:
+            # 其他消息不能丢弃，队列满时等待主线程处理
+            q.put(message)
+        # 主线程尚未处理上一次通知时不重复发出事件，多条消息合并为一次处理
+        if not self._result_posted.is_set():
+            self._result_posted.set()
+            try:
+                self.root.event_generate(self._result_event, when="tail")
+            except (tk.TclError, RuntimeError):
+                # 窗口已关闭
+                pass
+
+    def post_ui_message(self, kind: str, value=None):
+        """后台线程提交界面更新，由主线程在_drain_ui_q中执行"""
+        self._ui_msg_q.put((kind, value))
+        if not self._ui_msg_posted.is_set():
+            self._ui_msg_posted.set()
+            try:
+                self.root.event_generate(self._ui_msg_event, when="tail")
+            except (tk.TclError, RuntimeError):
+                # 窗口已关闭
+                pass
+
+    def _drain_ui_q(self, event=None):
+        """取出全部界面更新消息，同类型合并后一次性执行"""
+        self._ui_msg_posted.clear()
+        latest = {}
+        for kind, value in drain_queue(self._ui_msg_q):
+            # 同类型消息只保留最后一条，按最后出现的先后顺序执行
+            latest.pop(kind, None)
+            latest[kind] = value
+
+        try:
+            for kind, value in latest.items():
+                if kind == "icm_refreshed":
+                    self.update_icm_ui()
+                elif kind == "status":
+                    self.icm_status_label.configure(text=value)
+        except tk.TclError:
+            # 窗口关闭过程中组件已销毁
+            pass
+
+    def process_queue(self, event=None):
+        """处理队列消息"""
+        # 先清除通知标志再取消息，处理期间新放入的消息会发出新的通知
+        self._result_posted.clear()
+        dirty_indices = set()  # 本次有更新的任务索引
+        files_found = False
+        # 一次加锁取出一批消息
+        messages = drain_queue(self.conversion_queue, QUEUE_DRAIN_BATCH)
+        try:
+            for msg_type, data in messages:
+                if msg_type == "progress":
+                    # 中间进度直接覆盖，只绘制最新的一条
+                    self._pending_progress = data
+                elif msg_type == "error":
+                    self.show_error(data)
+                elif msg_type == "update_task":
+                    # 多个任务更新合并为一次列表刷新
+                    dirty_indices.add(data)
+                elif msg_type == "completed":
+                    # 先立即绘制最后的进度，再显示完成状态
+                    self._paint_progress(force=True)
+                    self.conversion_completed(data)
+                elif msg_type == "file":
+                    self.on_file_found(data)
+                    files_found = True
+                elif msg_type == "scan_done":
+                    self.on_scan_done(data)
+                    files_found = False  # 已重新显示排序后的列表
+                elif msg_type == "scan_error":
+                    self.on_scan_error(data)
+        finally:
+            if files_found:
+                # 本次新发现的文件合并为一次列表渲染
+                self.file_list.render()
+                self.progress_label.configure(text=f"正在扫描文件... 已发现 {len(self.conversion_tasks)} 个")
+            if dirty_indices:
+                self.update_task_display(dirty_indices)
+            self._paint_progress()
+            if len(messages) == QUEUE_DRAIN_BATCH and not self._result_posted.is_set():
+                # 队列中可能还有消息，先让出事件循环再继续处理
+                self._result_posted.set()
+                try:
+                    self.root.event_generate(self._result_event, when="tail")
+                except tk.TclError:
+                    # 窗口已关闭
+                    pass
+
+    def _paint_progress(self, force=False):
+        """绘制待显示的进度，距上次绘制不足间隔时延后到间隔结束"""
+        if self._pending_progress is None:
+            return
+        now = time.monotonic()
+        remaining = PROGRESS_PAINT_INTERVAL - (now - self._last_paint)
+        if force or remaining <= 0:
+            if self._progress_after_id is not None:
+                self.root.after_cancel(self._progress_after_id)
+                self._progress_after_id = None
+            data, self._pending_progress = self._pending_progress, None
+            self._last_paint = now
+            self.update_progress(data)
+        elif self._progress_after_id is None:
+            # 间隔内不再有新消息时，保证最新进度最终也能显示
+            self._progress_after_id = self.root.after(int(remaining * 1000) + 1, self._flush_progress)
+
+    def _flush_progress(self):
+        """延后的进度绘制"""
+        self._progress_after_id = None
+        self._paint_progress(force=True)
+
+    def update_progress(self, data):
+        """更新进度显示"""
+        self.progress_bar.set(data["percent"])
+        self.progress_label.configure(text=f"正在转换: {data['current_file']}")
+        self.progress_count.configure(text=f"{data['completed']}/{data['total']} 文件")
+
+    def show_error(self, data):
+        """显示错误信息"""
+        print(f"错误: {data['file']} - {data['error']}")
+
+    def update_task_display(self, indices):
+        """更新任务显示（只刷新有变化且可见的行）"""
+        self.file_list.refresh_rows(indices)
+
+    def conversion_completed(self, data):
+        """转换完成"""
+        self.is_converting = False
+        self.start_btn.configure(state="normal")
+        self.stop_btn.configure(state="disabled")
+
+        if data["failed"] == 0:
+            self.progress_label.configure(text="✅ 转换完成")
+            messagebox.showinfo("完成", f"成功转换 {data['completed']} 个文件")
+        else:
+            self.progress_label.configure(text=f"⚠️ 转换完成 ({data['failed']} 个失败)")
+            messagebox.showwarning("完成",
+                f"转换完成: {data['completed']} 成功, {data['failed']} 失败")
+
+    def update_file_list_display(self):
+        """更新文件列表显示"""
+        self.file_list.set_tasks(self.conversion_tasks)
+
+    def clear_file_list(self):
+        """清除文件列表"""
+        self.conversion_tasks = []
+
+        # 清除显示（显示空状态提示）
+        self.file_list.set_tasks(self.conversion_tasks)
+
+        # 重置进度
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="准备就绪")
+        self.progress_count.configure(text="0/0 文件")
+
+    def run(self):
+        """运行应用"""
+        self.root.mainloop()
+        self._icm_executor.shutdown(wait=False, cancel_futures=True)
+        if ICM_AVAILABLE:
+            # 转换进程池在多次转换间复用，退出时关闭
+            shutdown_process_pool()
+
+if __name__ == "__main__":
+    # 打包后的程序使用多进程转换时必需
+    multiprocessing.freeze_support()
+    app = ModernConverter()
     app.run()
\ No newline at end of file
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+相机型号标准化回归测试
+对比合并后的单次扫描正则与原有的逐条清理规则链
+"""
+
+import itertools
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera_detector import CameraDetector
+
+
+# 原有的通用清理规则链
+_OLD_MODEL_CLEANUP_RULES = [
+    # 移除公司名称
+    (r'\b(Canon|NIKON|SONY|Fujifilm|FUJIFILM|Olympus|Panasonic|Leica|Pentax|Samsung|Apple)\s+', ''),
+    # 移除常见前缀
+    (r'^(EOS|DSC|ILCE|DMC|GR|K-|X-T|GFX|Hasselblad|Phase\s+One)\s*', ''),
+    # 清理多余空格和符号
+    (r'\s+', ' '),
+    (r'[()]', ''),
+    (r'\s*-\s*', ' '),
+]
+
+# 原有的品牌特定清理规则链
+_OLD_BRAND_RULES = {
+    'Canon': [
+        (r'Canon\s*', ''),
+        (r'^EOS\s+', 'EOS'),
+        (r'Rebel\s+([A-Z]\d+)', r'EOS \1'),
+    ],
+    'Nikon': [
+        (r'Nikon\s*', ''),
+        (r'^D(\d+)', r'D\1'),
+        (r'^Z\s*(\d+)', r'Z\1'),
+    ],
+    'Sony': [
+        (r'Sony\s*', ''),
+        (r'^ILCE[-\s]*(\d+)', r'α\1'),
+        (r'^α\s*(\d+)', r'α\1'),
+    ],
+    'Fujifilm': [
+        (r'Fujifilm\s*', ''),
+        (r'^X[-\s]*(\w+)', r'X-\1'),
+        (r'^GFX\s*(\w+)', r'GFX\1'),
+    ],
+    'Olympus': [
+        (r'Olympus\s*', ''),
+    ],
+    'Panasonic': [
+        (r'Panasonic\s*', ''),
+        (r'^DMC[-\s]*(\w+)', r'DMC-\1'),
+    ],
+}
+
+
+def _old_normalize_model(model: str, brand: str) -> str:
+    """按原有规则链逐条标准化型号"""
+    if not model:
+        return 'Unknown'
+
+    model_clean = model.strip()
+    for pattern, replacement in _OLD_MODEL_CLEANUP_RULES:
+        model_clean = re.sub(pattern, replacement, model_clean, flags=re.IGNORECASE)
+    for pattern, replacement in _OLD_BRAND_RULES.get(brand, ()):
+        model_clean = re.sub(pattern, replacement, model_clean, flags=re.IGNORECASE)
+    model_clean = re.sub(r'\s+', ' ', model_clean).strip()
+
+    return model_clean or 'Unknown'
+
+
+class NormalizeModelTest(unittest.TestCase):
+    """型号标准化结果需与原有规则链一致"""
+
+    MAKES = [
+        '', 'Canon', 'canon', 'NIKON CORPORATION', 'nikon', 'SONY', 'sony',
+        'FUJIFILM', 'OLYMPUS IMAGING CORP.', 'Panasonic', 'LEICA', 'PENTAX',
+        'RICOH IMAGING COMPANY, LTD.', 'Samsung', 'Apple', 'Hasselblad',
+        'Phase One', 'Foo',
+    ]
+    MODELS = [
+        '', ' EOS R ', 'Canon EOS R5', 'canon eos r3', 'Canon Canon EOS R',
+        'EOS 5D Mark IV', 'Canon EOS Rebel T7i', 'Canon-EOS', 'EOS  R  (test)',
+        'Canon PowerShot G7 X Mark III', 'NIKON Z9', 'Nikon D850', 'NIKON Z 6_2',
+        'NIKON CORPORATION NIKON D5', 'D5 (Nikon)', 'Z 7', 'COOLPIX P1000',
+        'ILCE-7RM4', 'ILCE-1', 'Sony ILCE-7M3', 'Sony Sony A7', 'DSC-RX100M7',
+        'α7 IV', 'X-T4', 'X-H2S', 'X-Pro3', 'Fujifilm X100V', 'GFX100S',
+        'GFX 50S', 'E-M1 Mark III', 'OLYMPUS E-M5', 'Olympus  PEN-F',
+        'DMC-GH4', 'Panasonic DC-S1R', 'LEICA M10', 'Leica Q2',
+        'PENTAX K-1 Mark II', 'K-3', 'GR III', 'Samsung NX1', 'Apple iPhone',
+        'iPhone 13 Pro', 'Hasselblad X1D', 'Phase One IQ4', 'Leaf Aptus',
+        'Sony-A7', 'Fujifilm-X100F', 'E-M10 (Olympus)', 'DC-G9 Panasonic',
+    ]
+
+    def setUp(self):
+        self.detector = CameraDetector()
+
+    def test_matches_old_rule_chain(self):
+        for make, model in itertools.product(self.MAKES, self.MODELS):
+            brand, normalized = self.detector.normalize_camera_model(make, model)
+            with self.subTest(make=make, model=model):
+                self.assertEqual(normalized, _old_normalize_model(model, brand))
+
+    def test_make_before_paren_or_dash(self):
+        self.assertEqual(self.detector.normalize_camera_model('Nikon', 'D5 (Nikon)'), ('Nikon', 'D5'))
+        self.assertEqual(self.detector.normalize_camera_model('Canon', 'Canon-EOS'), ('Canon', 'EOS'))
+
+
+if __name__ == '__main__':
+    unittest.main()